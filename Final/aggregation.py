@@ -0,0 +1,64 @@
+"""Grouped aggregations behind the maps and heatmaps.
+
+- `summarize_by_country` computes project count, mean/total cost and the top-k
+  sectors for every country with grouped reductions only (no per-group Python
+  lambdas); `country_summary` memoizes it per filter combination.
+- `summarize_by_category` computes the category x group ESG matrices for any
+  grouping column in one pass; `category_summary` memoizes it per grouping.
+"""
+import streamlit as st
+
+from data import load_df_app, load_projects
+
+
+def summarize_by_country(df, cost_col, country_col='countryname', sector_col='sector1',
+                         id_col='projectid', k=3):
+    """One row per country: total_projects, avg_cost, total_cost and main_sectors (top-k, by count)."""
+    stats = df.groupby(country_col, observed=True).agg(
+        total_projects=(id_col, 'count'),
+        avg_cost=(cost_col, 'mean'),
+        total_cost=(cost_col, 'sum'),
+    )
+    counts = df.groupby([country_col, sector_col], observed=True).size().rename('n').reset_index()
+    counts[sector_col] = counts[sector_col].astype(str)
+    top = (counts.sort_values([country_col, 'n', sector_col], ascending=[True, False, True])
+                 .groupby(country_col, observed=True).head(k))
+    stats['main_sectors'] = top.groupby(country_col, observed=True)[sector_col].agg(', '.join)
+    return stats.reset_index()
+
+
+@st.cache_data(show_spinner=False)
+def country_summary(filters=(), cost_col='base+contingency', k=3):
+    """Memoized `summarize_by_country` over the 280 projects; `filters` is a tuple of (column, value)."""
+    columns = {'projectid', 'countryname', 'sector1', cost_col} | {col for col, _ in filters}
+    df = load_projects(columns=sorted(columns))
+    for col, value in filters:
+        df = df[df[col] == value]
+    return summarize_by_country(df, cost_col, k=k)
+
+
+def summarize_by_category(df, group_col, categories):
+    """Category x group matrices of mean appraisal coverage, completion frequency and emergence rate.
+
+    The app_{cat}_pct and {cat}_emergence_rate columns are melted once and reduced
+    in a single groupby; completion is appraisal coverage plus emergence rate.
+    """
+    value_cols = {f'app_{cat}_pct': ('appraisal', cat) for cat in categories}
+    value_cols.update({f'{cat}_emergence_rate': ('emergence', cat) for cat in categories})
+    long = df[[group_col, *value_cols]].melt(id_vars=group_col, var_name='column')
+    long['measure'] = long['column'].map({col: m for col, (m, _) in value_cols.items()})
+    long['category'] = long['column'].map({col: c for col, (_, c) in value_cols.items()})
+    means = long.groupby(['measure', 'category', group_col], observed=True)['value'].mean()
+    matrices = {
+        measure: means.loc[measure].unstack(group_col).reindex(list(categories))
+        for measure in ('appraisal', 'emergence')
+    }
+    matrices['completion'] = matrices['appraisal'] + matrices['emergence']
+    return matrices
+
+
+@st.cache_data(show_spinner=False)
+def category_summary(group_col, categories):
+    """Memoized `summarize_by_category` over df_app, one entry per grouping column."""
+    columns = [group_col] + [f'app_{cat}_pct' for cat in categories] + [f'{cat}_emergence_rate' for cat in categories]
+    return summarize_by_category(load_df_app(columns=columns), group_col, categories)
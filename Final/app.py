@@ -1,36 +1,27 @@
-from re import S
+import html
 import streamlit as st
-from pathlib import Path
 import pandas as pd
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from scipy import stats
 import numpy as np
 import plotly.express as px
-
-st.set_page_config(
-    page_title="Infrastructure Project ESG Risk Analysis",
-    page_icon="🏗️",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from data import (
+    BASE, load_projects, load_df_app, load_seed_source, load_seed_terms,
+    load_esg_dict, load_viz_dict, load_wb_plr, load_us_ppi,
 )
+from figures import CAT_LABELS, CATEGORY_NAMES, HEATMAP_GROUPS, PILLAR_NAMES, cached_figure
+from bootstrap import N_RESAMPLES, bootstrap_intervals
+from clustering import has_embeddings
+from permutation import N_PERMUTATIONS, permutation_tests
+from regression import ALPHA, category_models, decomposition, subcategories, subcategory_models
+from scoring import score_document, screening_models
+from textstore import WORDS_PER_PAGE, list_projects, read_window, word_count
+from tfidf import ngram_tables
+from trends import trend_fits
 
-st.title("ESG Challenges in Large-scale Infrastructure Project with Text Analysis")
-
-# create tab
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "Research Introduction",
-    "Infrastructure Projects Introduction",
-    "ESG challenges Seed Term Extraxtion",
-    "Project Metadata",
-    "Project Text Data",
-    "Analysis",
-    
-])
-
-BASE = Path(__file__).parent
+# each section is a page function, run by its page file in app_pages/; st.navigation (bottom of file)
+# runs only the selected page
 
-with tab1:
+def page_introduction():
     st.header("Research Overview")
     st.markdown("##### This research investigates ESG-related challenges in large-scale infrastructure construction projects, combining metadata (e.g., region, country, project sector, cancellation of subprojects, cost, duration, etc.) and text data that are extracted from project documents. I first develop an ESG Taxonomy (i.e., dictionary) from the extracted text data using NLP considering TFIDF scores and N-gram extractions, conduct contextual embedding using Transformer-based NLP model, and run regression to see how ESG challenges influence various infrastructure project performance outcomes.")
     st.markdown("---")
@@ -137,12 +128,12 @@ with tab1:
         """, unsafe_allow_html=True)
     st.markdown("---")
 
-with tab2:
+def page_projects():
     st.header("Infrastructure Projects Overview")
     st.markdown("##### This research uses data from the World Bank, specifically, sovereign infrastructure development projects that the World Bank funded. This page shows the introductory overview of the infrastructure projects, and some basic summary statistics.")
     st.markdown("---")
     st.subheader("Summary Statistics")
-    final_projects = pd.read_csv(BASE / "fin_project_metadata_280.csv")
+    final_projects = load_projects()
     
     # Key metrics at the top
     col1, col2, col3, col4, col5, col6 = st.columns(6)
@@ -168,72 +159,7 @@ with tab2:
     st.subheader("Geographic Distribution")
     st.markdown("Hover over the map to see detailed information for each country.")
     
-    # Prepare data for choropleth maps
-    country_total = final_projects.groupby('countryname').agg({
-        'projectid': 'count',
-        'sector1': lambda x: ', '.join(x.value_counts().index[:3])
-    }).reset_index()
-    country_total.columns = ['countryname', 'total_projects', 'main_sectors']
-    
-    country_avg_cost = final_projects.groupby('countryname').agg({
-        'projectid': 'count',
-        'base+contingency': 'mean',
-        'sector1': lambda x: ', '.join(x.value_counts().index[:3])
-    }).reset_index()
-    country_avg_cost.columns = ['countryname', 'total_projects', 'avg_cost', 'main_sectors']
-    
-    # Create side-by-side choropleth maps
-    fig_maps = make_subplots(
-        rows=1, cols=2,
-        subplot_titles=('Number of Projects per Country', 'Average Project Cost per Country'),
-        specs=[[{'type': 'choropleth'}, {'type': 'choropleth'}]],
-        horizontal_spacing=0.01
-    )
-    
-    fig_maps.add_trace(
-        go.Choropleth(
-            locations=country_total['countryname'],
-            locationmode='country names',
-            z=country_total['total_projects'],
-            customdata=country_total[['total_projects', 'main_sectors']],
-            hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Main Sectors: %{customdata[1]}<extra></extra>',
-            colorscale='Pinkyl',
-            colorbar=dict(x=0.4, y=0.8, len=0.5, title='Projects'),
-            showscale=True
-        ),
-        row=1, col=1
-    )
-    
-    fig_maps.add_trace(
-        go.Choropleth(
-            locations=country_avg_cost['countryname'],
-            locationmode='country names',
-            z=country_avg_cost['avg_cost'],
-            customdata=country_avg_cost[['total_projects', 'avg_cost', 'main_sectors']],
-            hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Avg Cost: $%{customdata[1]:.2f}M<br>Main Sectors: %{customdata[2]}<extra></extra>',
-            colorscale='Pinkyl',
-            colorbar=dict(x=0.95, y=0.8, len=0.5, title='Avg Cost (M USD)'),
-            showscale=True
-        ),
-        row=1, col=2
-    )
-    
-    fig_maps.update_geos(
-        projection_type='natural earth',
-        showland=True,
-        landcolor='rgb(243, 243, 243)',
-        coastlinecolor='rgb(204, 204, 204)',
-        showcountries=True,
-        countrycolor='rgb(204, 204, 204)'
-    )
-    
-    fig_maps.update_layout(
-        height=500,
-        font=dict(family='Arial'),
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig_maps, use_container_width=True)
+    st.plotly_chart(cached_figure('country_maps'), use_container_width=True)
     
     st.markdown("---")
     st.subheader("Sector Information")
@@ -343,9 +269,9 @@ with tab2:
     # fig_timeline.update_layout(margin=dict(t=30, b=20, l=20, r=20))
     # st.plotly_chart(fig_timeline, use_container_width=True)
 
-with tab3:
-    subtab1, subtab2 = st.tabs(["Data & Processing", "Result"])
-    with subtab1:
+def page_seed_terms():
+    view = st.radio("View", ["Data & Processing", "Result"], horizontal=True, label_visibility="collapsed", key="seed_view")
+    if view == "Data & Processing":
         st.header("ESG Challenges in Infrastructure Projects")
         st.markdown("##### Large-scale infrastructure projects are physically large, complex, unique, involve a lot of stakeholders and shareholders, and have great impacts on society. Due to this nature, they inherently involve various environmental, social, and governance (ESG) challenges. According to World Bank, those challenges can be categorized into the following categories.")        
 
@@ -389,7 +315,7 @@ with tab3:
         st.subheader("Source Documents for Term Extraction")
         st.markdown("From the source document, each category (E1-G5) was considered as one document, and terms were extracted from each document. Cleaned and n-gram preserved text is shown below.")
         st.caption("E: Environmental, S: Social, G: Governance")
-        seed_source = pd.read_json(BASE / "seed_streamlit.json")
+        seed_source = load_seed_source()
         st.dataframe(seed_source[['pillar', 'code', 'description']], use_container_width=True, hide_index=True)
         selected_row = st.selectbox(
             "Select a category to view full text:",
@@ -448,9 +374,9 @@ with tab3:
             st.info("**3: TF-IDF Scoring**\n\nRank and select final terms based on TF-IDF scores across categories")
 
         st.markdown("---")
-    with subtab2:
+    if view == "Result":
         # Load seed terms
-        seed_terms = pd.read_csv(BASE / "seed_final_314.csv")
+        seed_terms = load_seed_terms()
         st.header("Seed Term Extraction Result")
         st.markdown("##### Important terms are extracted from the corpus for each pillar, and for each category. Categories include different themes, so sub-categories were created based on embedding scores using transformer-based MPNET model, clustering, and manual curation.")
         st.markdown("---")
@@ -477,7 +403,6 @@ with tab3:
         # Extract category code (e.g., "E1" from "E1: Pollution Prevention...")
         category_code = selected_category.split(":")[0].strip()
         dendrogram_path = BASE / f"dendrogram_{category_code}_horizontal.png"
-        # Show dendrogram
 
         filtered_df = seed_terms[
             (seed_terms['Pillar'] == selected_pillar) & 
@@ -500,7 +425,13 @@ with tab3:
             st.markdown("")
         st.markdown(f"Click the following expander to see dendrogram - subcategories clustered together.")
         with st.expander(f"📊 View Dendrogram for {category_code}", expanded=False):
-            if dendrogram_path.exists():
+            if has_embeddings():
+                # level of detail: deeper merges are collapsed into "term (+n)" leaves
+                n_terms = len(filtered_df)
+                max_leaves = st.slider("Leaves shown", min_value=2, max_value=n_terms, value=min(n_terms, 30), key="dendrogram_leaves")
+                st.plotly_chart(cached_figure('dendrogram', category=selected_category, max_leaves=max_leaves), use_container_width=True)
+            elif dendrogram_path.exists():
+                # no MPNET embeddings stored yet (python clustering.py): the original figure
                 col1, col2, col3 = st.columns([1, 2, 1])
                 with col2:
                     st.image(str(dendrogram_path), use_container_width=True)
@@ -508,9 +439,10 @@ with tab3:
                 st.warning(f"Dendrogram image not found for {category_code}")
         st.markdown("---")
 
-with tab4:
-    subtab1, subtab2 = st.tabs(["Data & Processing", "Result"])
-    with subtab1:
+def page_metadata():
+    final_projects = load_projects()
+    view = st.radio("View", ["Data & Processing", "Result"], horizontal=True, label_visibility="collapsed", key="metadata_view")
+    if view == "Data & Processing":
         st.header("Data Processing for Metadata")
         st.markdown("##### This page summarizes the data preprocessing steps, including cost conversion and missing data handling to convert World Bank project costs to comparable **2019 USD values** for analysis. Project cost data are in nominal value at the year of approval, but the data spans from 1989 to 2012 (for the approval year) or 1999 to 2019 (for the completion year). For apple-to-apple comparison, every value was converted to 2019, to adjust for the following discrepancies. Essentially, it takes care of _What was the economic scale and resource commitment of this project within its own national economy?_ question.")
         st.markdown("""
@@ -567,7 +499,7 @@ with tab4:
             st.metric("Total", "462")
             
         with st.expander("View World Bank PLR Data"):
-            wb_plr = pd.read_csv(BASE / "WB_PLR.csv")
+            wb_plr = load_wb_plr()
             st.dataframe(wb_plr, use_container_width=True, hide_index=True)
         st.markdown("---")
             
@@ -594,7 +526,7 @@ with tab4:
             """)
         
         with st.expander("View IMF US PPI Data"):
-            ppi = pd.read_csv(BASE / "IMF_US_PPI.csv")
+            ppi = load_us_ppi()
             st.dataframe(ppi, use_container_width=True, hide_index=True)
             
         st.markdown("---")
@@ -634,7 +566,7 @@ with tab4:
         # st.markdown("Final project list can be downloaded in the next tab.")
 
         st.markdown("---")
-    with subtab2:
+    if view == "Result":
         # st.markdown("##### In this page, you can see the processed metadata.")
         # st.markdown("""
         # Source: World Bank\n
@@ -654,7 +586,7 @@ with tab4:
         # st.dataframe(df.head(100), use_container_width=True)
 
         st.header("Project Metadata (Processed)")
-        final_projects = pd.read_csv(BASE / "fin_project_metadata_280.csv")
+        final_projects = load_projects()
             
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -723,9 +655,10 @@ with tab4:
         st.markdown("---")
     
 
-with tab5:
-    subtab1, subtab2 = st.tabs(["Data & Processing", "Result"])
-    with subtab1:
+def page_text_data():
+    esg_dict = load_esg_dict()
+    view = st.radio("View", ["Data & Processing", "Result"], horizontal=True, label_visibility="collapsed", key="text_view")
+    if view == "Data & Processing":
         st.header("Data Processing for Text Data")
         st.markdown("##### This page summarizes the data preprocessing steps for the text data extracted from the project-related reports from the World Bank. For each of the 280 projects, we use two types of projects, that allow us to see _what happened during the project.")
         col1, col2 = st.columns(2)
@@ -739,33 +672,38 @@ with tab5:
                 st.download_button("📥 Download Sample ICR", f, file_name="P130164_ICR.pdf")
         st.markdown("---")
         st.subheader("Text Data Overview")
-        text_data = pd.read_json(BASE / "text_data_sample.json")
+        projects = list_projects()
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Total Projects", len(text_data))
+            st.metric("Total Projects", len(projects))
         with col2:
             st.metric("Appraisal Documents", "6,728,587 words", "24,031 avg per project")
         with col3:
             st.metric("Completion Documents", "3,716,244 words", "13,272 avg per project")
-        selected_project = st.selectbox("Select a project to view text data, BEFORE and AFTER cleaning and ngram preservation:", options=text_data['projectid'].tolist())
-        doc_type = st.radio("Select document type:", ["Appraisal Document", "Completion Document"], horizontal=True)
-        row = text_data[text_data['projectid'] == selected_project].iloc[0]
-        if doc_type == "Appraisal Document":
-            raw_text = row['text_appraisal']
-            cleaned_text = row['text_appraisal_ngram']
-            raw_color, clean_color = "#e8f4e8", "#d4edda"
+        if not projects:
+            st.warning("Text store not found. Build it with `python textstore.py <corpus.json>`.")
         else:
-            raw_text = row['text_completion']
-            cleaned_text = row['text_completion_ngram']
-            raw_color, clean_color = "#e8f0f4", "#d1ecf1"
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**📄 Raw Text (BEFORE cleaning)**")
-            st.markdown(f"<div style='background-color:{raw_color}; padding:15px; border-radius:10px; max-height:500px; overflow-y:auto; font-size:11px;'>{raw_text}</div>", unsafe_allow_html=True)
-        with col2:
-            st.markdown("**📄 Cleaned Text (AFTER cleaning)**")
-            st.markdown(f"<div style='background-color:{clean_color}; padding:15px; border-radius:10px; max-height:500px; overflow-y:auto; font-size:11px;'>{cleaned_text}</div>", unsafe_allow_html=True)
-        st.caption("Note: Text truncated to first 2,000 + last 2,000 words. Underscores indicate multi-word terms (n-grams).")
+            selected_project = st.selectbox("Select a project to view text data, BEFORE and AFTER cleaning and ngram preservation:", options=projects)
+            doc_type = st.radio("Select document type:", ["Appraisal Document", "Completion Document"], horizontal=True)
+            if doc_type == "Appraisal Document":
+                doc = 'appraisal'
+                raw_color, clean_color = "#e8f4e8", "#d4edda"
+            else:
+                doc = 'completion'
+                raw_color, clean_color = "#e8f0f4", "#d1ecf1"
+            # only the visible page of each document is read from the store
+            col1, col2 = st.columns(2)
+            for col, version, label, color in [(col1, 'raw', "Raw Text (BEFORE cleaning)", raw_color),
+                                               (col2, 'clean', "Cleaned Text (AFTER cleaning)", clean_color)]:
+                with col:
+                    n_words = word_count(selected_project, doc, version)
+                    n_pages = max(1, -(-n_words // WORDS_PER_PAGE))
+                    st.markdown(f"**📄 {label}**")
+                    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"text_page_{version}")
+                    window = html.escape(read_window(selected_project, doc, version, (page - 1) * WORDS_PER_PAGE, WORDS_PER_PAGE))
+                    st.markdown(f"<div style='background-color:{color}; padding:15px; border-radius:10px; max-height:500px; overflow-y:auto; font-size:11px;'>{window}</div>", unsafe_allow_html=True)
+                    st.caption(f"{n_words:,} words")
+            st.caption(f"Note: Text is paged at {WORDS_PER_PAGE:,} words per page. Underscores indicate multi-word terms (n-grams).")
         st.markdown("---")
         st.subheader("Text Preprocessing")
         col1, col2, col3 = st.columns(3)
@@ -821,78 +759,23 @@ with tab5:
         with col3:
             st.info("**Step 3: TF-IDF Scoring**\n\nRank and select final terms based on TF-IDF scores across categories")
         st.markdown("##### N-gram Filtering Results")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**Bigrams Preserved: 2,033**")
-            st.caption("TF-IDF ≥ 99th percentile, Doc Freq 5-100%")
-            with st.expander("View top 50 bigrams"):
-                bigrams_data = [
-                    ("development planning", 0.0296, 11.1), ("expansion program", 0.0296, 18.2),
-                    ("monthly progress", 0.0296, 17.1), ("maintenance practices", 0.0296, 18.6),
-                    ("financial returns", 0.0295, 15.7), ("payment obligations", 0.0295, 6.8),
-                    ("complaint handling", 0.0295, 5.0), ("water companies", 0.0295, 6.4),
-                    ("street lighting", 0.0294, 6.8), ("trucking industry", 0.0294, 8.6),
-                    ("post_completion phase", 0.0294, 27.9), ("financial aspects", 0.0294, 21.8),
-                    ("joint supervision", 0.0294, 8.2), ("rail network", 0.0294, 9.6),
-                    ("project sites", 0.0294, 21.4), ("implementation issues", 0.0293, 28.9),
-                    ("complex project", 0.0293, 16.4), ("transport conditions", 0.0293, 6.8),
-                    ("project budget", 0.0293, 18.2), ("performance indicator", 0.0293, 15.0),
-                    ("timely completion", 0.0293, 24.6), ("resettlement compensation", 0.0293, 15.7),
-                    ("project operations", 0.0293, 10.0), ("transport systems", 0.0293, 13.2),
-                    ("implementation agencies", 0.0293, 18.9), ("electricity production", 0.0293, 12.9),
-                    ("performance government", 0.0292, 46.1), ("resettlement sites", 0.0292, 11.8),
-                    ("key elements", 0.0292, 24.3), ("qualified staff", 0.0292, 28.9),
-                    ("satisfaction survey", 0.0292, 6.1), ("energy production", 0.0292, 13.2),
-                    ("maintenance strategy", 0.0292, 9.6), ("original design", 0.0292, 21.4),
-                    ("plant operation", 0.0292, 11.1), ("vehicle weight", 0.0291, 5.0),
-                    ("service obligations", 0.0291, 16.1), ("road surface", 0.0291, 16.1),
-                    ("bad condition", 0.0291, 10.4), ("local economy", 0.0291, 21.4),
-                    ("environmental policy", 0.0291, 8.6), ("financial assistance", 0.0291, 23.2),
-                    ("bid opening", 0.0291, 16.4), ("financial plan", 0.0290, 13.9),
-                    ("wastepaper systems", 0.0290, 6.4), ("supply service", 0.0290, 8.9),
-                    ("power transfer", 0.0290, 6.1), ("bid prices", 0.0290, 22.1),
-                    ("related activities", 0.0290, 7.1), ("significant improvement", 0.0290, 27.9)
-                ]
-                bigrams_df = pd.DataFrame(bigrams_data, columns=["term", "tfidf", "doc_freq_%"])
-                st.dataframe(bigrams_df, height=400, use_container_width=True, hide_index=True)
-        with col2:
-            st.markdown("**Trigrams Preserved: 408**")
-            st.caption("TF-IDF ≥ 99.5th percentile, Doc Freq 5-100%")
-            with st.expander("View top 50 trigrams"):
-                trigrams_data = [
-                    ("project development objectives", 1.0000, 36.1), ("private sector participation", 0.8092, 57.5),
-                    ("resettlement action plan", 0.7621, 21.8), ("vehicle operating costs", 0.7072, 36.8),
-                    ("rural water supply", 0.6818, 7.9), ("financial management system", 0.6791, 54.6),
-                    ("debt service coverage", 0.6688, 31.4), ("project appraisal document", 0.6618, 5.4),
-                    ("national road network", 0.6524, 8.9), ("financial management specialist", 0.6478, 11.4),
-                    ("civil works contracts", 0.6314, 52.9), ("power sector reform", 0.6269, 17.1),
-                    ("environmental management plan", 0.6187, 22.9), ("project development objective", 0.6107, 43.9),
-                    ("task team leader", 0.6040, 10.0), ("core road network", 0.5385, 6.4),
-                    ("key performance indicators", 0.5348, 46.1), ("urban water supply", 0.5238, 10.7),
-                    ("solid waste management", 0.5125, 11.8), ("environmental impact assessment", 0.5086, 30.0),
-                    ("net present value", 0.5020, 51.8), ("total project cost", 0.4906, 47.9),
-                    ("project management unit", 0.4844, 10.4), ("management information system", 0.4570, 32.9),
-                    ("water supply systems", 0.4509, 12.9), ("road user charges", 0.4247, 17.1),
-                    ("wastepaper treatment plant", 0.4216, 11.4), ("service coverage ratio", 0.4212, 23.9),
-                    ("renewable energy development", 0.4183, 9.3), ("water supply system", 0.4094, 15.0),
-                    ("country assistance strategy", 0.4079, 5.4), ("project implementation plan", 0.4019, 14.3),
-                    ("water resources management", 0.3984, 10.0), ("resettlement policy framework", 0.3924, 10.4),
-                    ("private sector development", 0.3896, 51.1), ("total project costs", 0.3877, 25.7),
-                    ("water quality monitoring", 0.3848, 16.4), ("road safety program", 0.3746, 9.3),
-                    ("international competitive bidding", 0.3666, 36.8), ("loan closing date", 0.3565, 33.2),
-                    ("power sector restructuring", 0.3563, 6.8), ("standard bidding documents", 0.3504, 32.5),
-                    ("project management office", 0.3488, 9.3), ("financial management systems", 0.3420, 29.3),
-                    ("road sector development", 0.3407, 5.4), ("project closing date", 0.3379, 31.4),
-                    ("economic internal rate", 0.3373, 31.8), ("technical assistance component", 0.3346, 32.1),
-                    ("thermal power plant", 0.3345, 9.3), ("national competitive bidding", 0.3343, 18.6)
-                ]
-                trigrams_df = pd.DataFrame(trigrams_data, columns=["term", "tfidf", "doc_freq_%"])
-                st.dataframe(trigrams_df, height=400, use_container_width=True, hide_index=True)
+        ngram_summary = ngram_tables()
+        if ngram_summary['source'] == 'legacy':
+            st.caption("Legacy values from the original analysis. Their TF-IDF scores are on a different scale from the "
+                       "mean TF-IDF of the current pipeline (tfidf.py), which has not been run on the parsed corpus yet.")
+        for col, table in zip(st.columns(2), ngram_summary['tables']):
+            with col:
+                name = table['name'].capitalize()
+                low, high = table['doc_freq']
+                st.markdown(f"**{name}s Preserved: {table['preserved']:,}**")
+                st.caption(f"TF-IDF ≥ {table['percentile']:g}th percentile, Doc Freq {low:g}-{high:g}%")
+                with st.expander(f"View top {len(table['top'])} {table['name']}s"):
+                    top_df = pd.DataFrame(table['top'], columns=["term", "tfidf", "doc_freq_%"])
+                    st.dataframe(top_df, height=400, use_container_width=True, hide_index=True)
         
         st.markdown("---")
         st.subheader("Embedding Analysis & Final ESG Taxonomy")
         st.markdown("##### The seed terms and candidate terms (extracted unigrams and ngrams from the project corpus) were embedded using the pretrained MPNET model. Currently used the vanilla model, but in the future, I will train this model with my corpus to enhance the contextual understanding of the model.")
-        esg_dict = pd.read_csv(BASE / "esg_dictionary_final_2407.csv")
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("""
@@ -949,7 +832,7 @@ with tab5:
             st.metric("Total", "2,407 terms", "13 categories, 35 subcategories")
         st.markdown("---")
 
-    with subtab2:
+    if view == "Result":
         st.markdown("##### Final Result")
         res_col1, res_col2, res_col3, res_col4 = st.columns(4)
         with res_col1:
@@ -1070,77 +953,27 @@ with tab5:
             st.markdown(f"<span style='background-color:{color_expanded}; padding:4px 8px; border-radius:10px;'>■</span> **Expanded Terms**", unsafe_allow_html=True)
         st.markdown("---")
         st.subheader("Interactive Cluster Visualization")
-        viz_df = pd.read_csv(BASE / "esg_dictionary_viz.csv")
+        viz_df = load_viz_dict()
         viz_col1, viz_col2 = st.columns([1, 3])
         with viz_col1:
             viz_pillar = st.radio("Select Pillar", ['E', 'S', 'G'], 
                                 format_func=lambda x: pillar_labels[x],
                                 key="viz_pillar")
             pillar_categories = viz_df[viz_df['pillar'] == viz_pillar]['category'].unique().tolist()
-            cat_to_display = {
-                'ESS3_P': 'E1: Pollution Prevention and Management',
-                'ESS3_R': 'E2: Resource Efficiency',
-                'ESS6': 'E3: Biodiversity Conservation',
-                'ESS2': 'S1: Labor and Working Conditions',
-                'ESS4': 'S2: Community Health and Safety',
-                'ESS5': 'S3: Land Acquisition and Involuntary Resettlement',
-                'ESS7': 'S4: Indigenous Peoples',
-                'ESS8': 'S5: Cultural Heritage',
-                'DIM1': 'G1: Legal Framework and Institutional Capacity',
-                'DIM2_3': 'G2: Financial and Economic',
-                'DIM6': 'G3: Procurement and Contract Management',
-                'DIM7': 'G4: Operations and Performance',
-                'DIM8_9': 'G5: Transparency and Integrity'
-            }
             st.markdown("**Categories**")
             selected_cats = []
             for cat in pillar_categories:
-                if st.checkbox(cat_to_display.get(cat, cat), value=True, key=f"viz_cat_{cat}"):
+                if st.checkbox(CATEGORY_NAMES.get(cat, cat), value=True, key=f"viz_cat_{cat}"):
                     selected_cats.append(cat)
         with viz_col2:
-
-            fig = go.Figure()
-            other_df = viz_df[viz_df['pillar'] != viz_pillar]
-            fig.add_trace(go.Scatter(
-                x=other_df['x'], y=other_df['y'],
-                mode='markers',
-                marker=dict(size=6, color='lightgray', opacity=0.3),
-                name='Other pillars',
-                hoverinfo='skip'
-            ))
-            all_colors = px.colors.qualitative.Set2 + px.colors.qualitative.Set3 + px.colors.qualitative.Pastel1
-            color_idx = 0
-            for cat in selected_cats:
-                cat_df = viz_df[viz_df['category'] == cat]
-                cat_display = cat_to_display.get(cat, cat)
-                subcategories = cat_df['subcategory'].unique()
-                for subcat in subcategories:
-                    subcat_df = cat_df[cat_df['subcategory'] == subcat]
-                    fig.add_trace(go.Scatter(
-                        x=subcat_df['x'], y=subcat_df['y'],
-                        mode='markers',
-                        marker=dict(size=8, color=all_colors[color_idx % len(all_colors)], opacity=0.7),
-                        name=subcat,
-                        legendgroup=cat,
-                        legendgrouptitle_text=cat_display,
-                        text=subcat_df['term'],
-                        hovertemplate='<b>%{text}</b><br>' + subcat + '<extra></extra>'
-                    ))
-                    color_idx += 1
-            fig.update_layout(
-                height=600,
-                xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=True, linecolor='black', title='Dimension 1'),
-                yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=True, linecolor='black', title='Dimension 2'),
-                legend=dict(orientation='v', yanchor='top', y=1, xanchor='left', x=1.02, title='Categories', tracegroupgap=10),
-                margin=dict(l=20, r=20, t=20, b=20),
-                plot_bgcolor='white'
-            )
+            fig = cached_figure('cluster_scatter', pillar=viz_pillar, categories=tuple(selected_cats))
             st.plotly_chart(fig, use_container_width=True)
             st.markdown("---")
 
-with tab6:
-    subtab1, subtab2, subtab3 = st.tabs(["Initial Data Analysis", "Explolatory Data Analysis", "Regression Analysis"])
-    with subtab1:
+def page_analysis():
+    sector_colors = {'Energy': '#FF6B6B', 'Transport': '#A9C25E', 'Water': '#45B7D1'}
+    view = st.radio("View", ["Initial Data Analysis", "Explolatory Data Analysis", "Regression Analysis"], horizontal=True, label_visibility="collapsed", key="analysis_view")
+    if view == "Initial Data Analysis":
         st.subheader("Variable Encoding")
         st.markdown("There are three main dependent variables and for binary indicator, it was encoded as 1 and 0.")
         st.markdown("""
@@ -1148,21 +981,14 @@ with tab6:
         - **Cost change** in percentage
         - **Cancellation of subcomponents** in True/False""")
         st.markdown("---")
-        final_projects = pd.read_csv(BASE / "fin_project_metadata_280.csv")
-        import plotly.express as px
-        import plotly.graph_objects as go
-        # Convert cost_change_perc to numeric
-        final_projects['cost_change_numeric'] = final_projects['cost_change_perc'].str.replace('%', '').astype(float)
+        final_projects = load_projects()
         # Calculate stats
         cancel_count = (final_projects['cancellation'].astype(str).str.lower() == 'true').sum()
         cancel_pct = cancel_count / len(final_projects) * 100
-        final_projects['addition_label'] = final_projects['addition'].apply(
-            lambda x: 'Yes' if x == True or str(x).lower() == 'true' else ('No' if x == False or str(x).lower() == 'false' else 'Unknown')
-        )
         add_count = (final_projects['addition_label'] == 'Yes').sum()
         add_pct = add_count / len(final_projects) * 100
         avg_delay = final_projects['delay'].mean() / 12
-        avg_cost_change = final_projects['cost_change_numeric'].mean()
+        avg_cost_change = final_projects['cost_change_perc'].mean()
         # Summary statistics first
         st.subheader("Summary Statistics for the 280 Projects")
         col1, col2, col3, col4 = st.columns(4)
@@ -1176,10 +1002,9 @@ with tab6:
             st.metric("Expansion Rate", f"{add_pct:.1f}%")
         st.markdown("---")
         # Delay and Cost Change by Sector
-        sector_colors = {'Energy': '#FF6B6B', 'Transport': '#A9C25E', 'Water': '#45B7D1'}
-        sector_stats = final_projects.groupby('sector1').agg({
+        sector_stats = final_projects.groupby('sector1', observed=True).agg({
             'delay': 'mean',
-            'cost_change_numeric': 'mean'
+            'cost_change_perc': 'mean'
         }).reset_index()
         sector_stats['delay_years'] = sector_stats['delay'] / 12
         col1, col2 = st.columns(2)
@@ -1206,13 +1031,13 @@ with tab6:
             st.subheader("Average Cost Change by Sector")
             fig_cost = go.Figure(data=[go.Bar(
                 x=sector_stats['sector1'],
-                y=sector_stats['cost_change_numeric'],
+                y=sector_stats['cost_change_perc'],
                 marker_color=[sector_colors.get(s, '#888888') for s in sector_stats['sector1']],
-                text=[f"{v:.1f}%" for v in sector_stats['cost_change_numeric']],
+                text=[f"{v:.1f}%" for v in sector_stats['cost_change_perc']],
                 textposition='outside',
                 textfont=dict(size=14)
             )])
-            max_cost = sector_stats['cost_change_numeric'].max()
+            max_cost = sector_stats['cost_change_perc'].max()
             fig_cost.update_layout(
                 yaxis_title='Cost Change (%)',
                 yaxis=dict(range=[0, max_cost * 1.2], tickfont=dict(size=14), title_font=dict(size=16)),
@@ -1251,11 +1076,11 @@ with tab6:
             st.caption(f"{add_count} projects ({add_pct:.1f}%) had subcomponent expansions")
         st.markdown("---")
 
-    with subtab2:
-        df_app = pd.read_csv(BASE / "df_app_streamlit.csv")
+    if view == "Explolatory Data Analysis":
+        df_app = load_df_app()
         st.subheader("Outcomes by Sector")
         st.markdown("This study's key outcome variables are cost change (in %), delay, and cancellation of subprojects.")
-        sector_outcomes = df_app.groupby('sector_group').agg({
+        sector_outcomes = df_app.groupby('sector_group', observed=True).agg({
             'delay': 'mean',
             'cost_change_perc_num': 'mean',
             'cancellation': 'mean'
@@ -1315,115 +1140,34 @@ with tab6:
             )
             st.plotly_chart(fig_delay, use_container_width=True)
         st.markdown("---")
-        # ESG Frequency Heatmaps by Sector
-        cat_order = ['E1', 'E2', 'E3', 'S1', 'S2', 'S3', 'S4', 'S5', 'G1', 'G2', 'G3', 'G4', 'G5']
-        label_mapping = {
-            'E1': 'Pollution', 'E2': 'Resource Efficiency', 'E3': 'Biodiversity',
-            'S1': 'Workers & Labor', 'S2': 'Community Health', 'S3': 'Land & Resettlement', 'S4': 'Indigenous Peoples', 'S5': 'Cultural Heritage',
-            'G1': 'Institutional', 'G2': 'Financial & Economic', 'G3': 'Procurement', 'G4': 'Operations', 'G5': 'Transparency'
-        }
-        sectors_data = ['Transport', 'Water', 'Energy']  # Actual values in data
-        sectors_display = ['Transportation', 'Water', 'Energy']  # For display
-        
-        # Calculate appraisal frequency by sector
-        appraisal_data = []
-        for cat in cat_order:
-            row = []
-            for sector in sectors_data:  # Use data values for filtering
-                sector_data = df_app[df_app['sector_group'] == sector]
-                row.append(sector_data[f'app_{cat}_pct'].mean())
-            appraisal_data.append(row)
-        
-        # Calculate completion frequency by sector
-        completion_data = []
-        for cat in cat_order:
-            row = []
-            for sector in sectors_data:  # Use data values for filtering
-                sector_data = df_app[df_app['sector_group'] == sector]
-                app_val = sector_data[f'app_{cat}_pct'].mean()
-                emerg_val = sector_data[f'{cat}_emergence_rate'].mean()
-                row.append(app_val + emerg_val)
-            completion_data.append(row)
-        
-        # Calculate emergence rate by sector
-        emergence_data = []
-        for cat in cat_order:
-            row = []
-            for sector in sectors_data:  # Use data values for filtering
-                sector_data = df_app[df_app['sector_group'] == sector]
-                row.append(sector_data[f'{cat}_emergence_rate'].mean())
-            emergence_data.append(row)
-        
+        # ESG Frequency Heatmaps by Sector (or another grouping)
+        heatmap_group = st.radio(
+            "Group heatmaps by",
+            options=list(HEATMAP_GROUPS),
+            format_func=lambda g: HEATMAP_GROUPS[g],
+            horizontal=True,
+            key="heatmap_group"
+        )
+        group_label = HEATMAP_GROUPS[heatmap_group]
         col1, col2 = st.columns(2)
         with col1:
             st.markdown("**ESG Term Frequency at Appraisal**")
-            fig_app = go.Figure(data=go.Heatmap(
-                z=appraisal_data,
-                x=sectors_display,  # Use display values for x-axis
-                y=[label_mapping[c] for c in cat_order],
-                text=[[f"{v:.2f}" for v in row] for row in appraisal_data],
-                texttemplate="%{text}",
-                textfont=dict(size=12),
-                colorscale='YlGn',
-                colorbar=dict(title=dict(text='Frequency (%)', font=dict(size=12))),
-                hovertemplate='Category: %{y}<br>Sector: %{x}<br>Frequency: %{z:.2f}%<extra></extra>'
-            ))
-            fig_app.update_layout(
-                xaxis=dict(title='Sector', tickfont=dict(size=12), title_font=dict(size=14)),
-                yaxis=dict(title='ESG Category', tickfont=dict(size=11), title_font=dict(size=14), autorange='reversed'),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=500
-            )
-            st.plotly_chart(fig_app, use_container_width=True)
+            st.plotly_chart(cached_figure('category_heatmap', kind='appraisal', group=heatmap_group), use_container_width=True)
         
         with col2:
             st.markdown("**ESG Term Frequency at Completion**")
-            fig_comp = go.Figure(data=go.Heatmap(
-                z=completion_data,
-                x=sectors_display,  # Use display values for x-axis
-                y=[label_mapping[c] for c in cat_order],
-                text=[[f"{v:.2f}" for v in row] for row in completion_data],
-                texttemplate="%{text}",
-                textfont=dict(size=12),
-                colorscale='YlGn',
-                colorbar=dict(title=dict(text='Frequency (%)', font=dict(size=12))),
-                hovertemplate='Category: %{y}<br>Sector: %{x}<br>Frequency: %{z:.2f}%<extra></extra>'
-            ))
-            fig_comp.update_layout(
-                xaxis=dict(title='Sector', tickfont=dict(size=12), title_font=dict(size=14)),
-                yaxis=dict(title='ESG Category', tickfont=dict(size=11), title_font=dict(size=14), autorange='reversed'),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=500
-            )
-            st.plotly_chart(fig_comp, use_container_width=True)
+            st.plotly_chart(cached_figure('category_heatmap', kind='completion', group=heatmap_group), use_container_width=True)
         
         st.caption("Note: Completion frequency is estimated as appraisal coverage plus emergence rate.")
         st.markdown("---")
         
         # Emergence Rate Heatmap
-        st.subheader("ESG Emergence Rate by Sector and Category")
+        st.subheader(f"ESG Emergence Rate by {group_label} and Category")
         st.markdown("Emergence rate measures how much ESG issues **increased** from appraisal to completion — higher values indicate more 'surprises' during implementation.")
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            fig_emerg = go.Figure(data=go.Heatmap(
-                z=emergence_data,
-                x=sectors_display,  # Use display values for x-axis
-                y=[label_mapping[c] for c in cat_order],
-                text=[[f"{v:.2f}" for v in row] for row in emergence_data],
-                texttemplate="%{text}",
-                textfont=dict(size=12),
-                colorscale='RdYlGn_r',
-                colorbar=dict(title=dict(text='Emergence Rate', font=dict(size=12))),
-                hovertemplate='Category: %{y}<br>Sector: %{x}<br>Emergence: %{z:.2f}<extra></extra>'
-            ))
-            fig_emerg.update_layout(
-                xaxis=dict(title='Sector', tickfont=dict(size=12), title_font=dict(size=14)),
-                yaxis=dict(title='ESG Category', tickfont=dict(size=11), title_font=dict(size=14), autorange='reversed'),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=500
-            )
-            st.plotly_chart(fig_emerg, use_container_width=True)
+            st.plotly_chart(cached_figure('category_heatmap', kind='emergence', group=heatmap_group), use_container_width=True)
         
         st.caption("Red indicates higher emergence (more unexpected issues); Green indicates lower emergence (better planning).")
         st.markdown("---")
@@ -1508,7 +1252,7 @@ with tab6:
         
         # ESG Coverage by Sector
         st.subheader("ESG Coverage by Sector")
-        sector_esg = df_app.groupby('sector_group').agg({
+        sector_esg = df_app.groupby('sector_group', observed=True).agg({
             'app_E_pct': 'mean',
             'app_S_pct': 'mean',
             'app_G_pct': 'mean'
@@ -1539,196 +1283,140 @@ with tab6:
         st.markdown("---")
         
 
-    with subtab3:
-        df_app = pd.read_csv(BASE / "df_app_streamlit.csv")
-        
-        # Summary of Key Findings        
-        summary_data = {
-            'Outcome': ['Cancellation', 'Cancellation', 'Cancellation', 'Delay', 'Delay', 'Cost Change'],
-            'ESG Predictor': ['S3: Land & Resettlement (Coverage)', 'S4: Indigenous Peoples (Coverage)', 'G2: Fiscal (Emergence)', 'E3: Biodiversity (Coverage)', 'G5: Transparency (Coverage)', '—'],
-            'Effect': ['OR = 0.10', 'OR = 0.12', 'OR = 33.9', '-35.4 months', '+45.2 months', 'No significant predictors'],
-            'p-value': ['0.001**', '0.0006**', '0.028*', '0.030*', '0.029*', '—'],
-            'Interpretation': ['90% lower cancellation risk', '88% lower cancellation risk', '34x higher cancellation risk', '~3 years less delay', '~4 years more delay', 'ESG does not predict cost overruns']
-        }
-        st.dataframe(pd.DataFrame(summary_data), use_container_width=True, hide_index=True)
+    if view == "Regression Analysis":
+        df_app = load_df_app()
+        results = category_models().merge(permutation_tests(), on=['outcome', 'category', 'measure'])
+        subresults = subcategory_models()
+
+        def fitted(res, code, measure, outcome):
+            return res[(res['category'] == code) & (res['measure'] == measure) & (res['outcome'] == outcome)].iloc[0]
+
+        def stars(p):
+            return '***' if p < 0.001 else '**' if p < 0.01 else '*' if p < 0.05 else ''
+
+        def effect_text(row):
+            if row['outcome'] == 'cancellation':
+                return f"OR = {row['effect']:.2f}"
+            unit = 'months' if row['outcome'] == 'delay' else 'pp'
+            return f"{row['effect']:+.1f} {unit}"
+
+        def interpretation(row):
+            if row['outcome'] == 'cancellation':
+                if row['effect'] < 1:
+                    return f"{(1 - row['effect']) * 100:.0f}% lower cancellation odds"
+                return f"{row['effect']:.1f}x higher cancellation odds"
+            if row['outcome'] == 'delay':
+                return f"~{abs(row['effect']) / 12:.1f} years {'less' if row['effect'] < 0 else 'more'} delay"
+            return f"{abs(row['effect']):.1f} pp {'lower' if row['effect'] < 0 else 'higher'} cost change"
+
+        # Summary of Key Findings (every significant category-level effect)
+        outcome_labels = {'cancellation': 'Cancellation', 'delay': 'Delay', 'cost_change_perc_num': 'Cost Change'}
+        summary_rows = []
+        for outcome, outcome_label in outcome_labels.items():
+            sig = results[(results['outcome'] == outcome) & results['significant']].sort_values('p')
+            for _, row in sig.iterrows():
+                summary_rows.append({
+                    'Outcome': outcome_label,
+                    'ESG Predictor': f"{row['category']}: {CAT_LABELS[row['category']]} ({row['measure'].title()})",
+                    'Effect': effect_text(row),
+                    'p-value': f"{row['p']:.4f}{stars(row['p'])}",
+                    'Permutation p': f"{row['p_perm']:.4f}",
+                    'FDR q': f"{row['q_fdr']:.3f}",
+                    'Holm p': f"{row['p_holm']:.3f}",
+                    'Interpretation': interpretation(row)
+                })
+            if sig.empty:
+                summary_rows.append({'Outcome': outcome_label, 'ESG Predictor': '—', 'Effect': 'No significant predictors',
+                                     'p-value': '—', 'Permutation p': '—', 'FDR q': '—', 'Holm p': '—',
+                                     'Interpretation': f"ESG does not predict {outcome_label.lower()}"})
+        st.dataframe(pd.DataFrame(summary_rows), use_container_width=True, hide_index=True)
+        st.caption("Each row is a separate model per category: outcome ~ ESG measure + log(planned cost) + sector + era. "
+                   "Effects are per one-point increase in coverage (%) or emergence rate; logistic regression for cancellation, OLS for delay and cost change. "
+                   f"Permutation p-values use {N_PERMUTATIONS:,} outcome shuffles; FDR (Benjamini-Hochberg) and Holm adjust them across all {len(results)} tests.")
         st.markdown("---")
         
         # Coefficient Plots
         st.subheader("Coefficient Plots: ESG Effects on Outcomes")
+        coef_measure = st.radio("ESG measure", ['coverage', 'emergence'], format_func=str.title, horizontal=True, key="coef_measure")
+        ci_label = (f"95% BCa bootstrap intervals ({N_RESAMPLES:,} resamples)" if bootstrap_intervals() is not None
+                    else "95% Wald intervals")
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("**Cancellation (Odds Ratios)**")
-            cancel_results = {
-                'Category': ['S3: Land & Resettlement', 'S4: Indigenous Peoples', 'S5: Cultural Heritage', 'E3: Biodiversity', 'G1: Institutional', 'G2: Fiscal (Emergence)'],
-                'OR': [0.10, 0.12, 0.45, 0.78, 1.12, 33.9],
-                'Lower': [0.02, 0.03, 0.12, 0.35, 0.65, 1.8],
-                'Upper': [0.48, 0.45, 1.65, 1.75, 1.95, 650],
-                'Significant': [True, True, False, False, False, True]
-            }
-            df_cancel = pd.DataFrame(cancel_results)
-            fig_cancel = go.Figure()
-            colors = ['#EF553B' if sig else '#888888' for sig in df_cancel['Significant']]
-            fig_cancel.add_trace(go.Scatter(
-                x=df_cancel['OR'],
-                y=df_cancel['Category'],
-                mode='markers',
-                marker=dict(size=12, color=colors),
-                error_x=dict(
-                    type='data',
-                    symmetric=False,
-                    array=df_cancel['Upper'] - df_cancel['OR'],
-                    arrayminus=df_cancel['OR'] - df_cancel['Lower'],
-                    color='gray'
-                ),
-                hovertemplate='<b>%{y}</b><br>OR: %{x:.2f}<extra></extra>'
-            ))
-            fig_cancel.add_vline(x=1, line_dash="dash", line_color="black", annotation_text="OR=1")
-            fig_cancel.update_layout(
-                xaxis_title='Odds Ratio (log scale)',
-                xaxis=dict(type='log', tickfont=dict(size=12), title_font=dict(size=14)),
-                yaxis=dict(tickfont=dict(size=11)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=350
-            )
-            st.plotly_chart(fig_cancel, use_container_width=True)
-            st.caption("Red = significant (p < 0.05). OR < 1 means lower cancellation risk.")
+            st.plotly_chart(cached_figure('coefficient_plot', outcome='cancellation', measure=coef_measure), use_container_width=True)
+            st.caption(f"Red = significant (p < 0.05). OR < 1 means lower cancellation risk. Error bars: {ci_label}.")
         
         with col2:
             st.markdown("**Delay (Months)**")
-            delay_results = {
-                'Category': ['E3: Biodiversity', 'E1: Climate & GHG', 'S2: Safety', 'G3: Procurement', 'G5: Transparency'],
-                'Coef': [-35.4, -12.5, -8.2, 15.3, 45.2],
-                'Lower': [-67.5, -38.2, -42.1, -22.4, 4.6],
-                'Upper': [-3.3, 13.2, 25.7, 53.0, 85.8],
-                'Significant': [True, False, False, False, True]
-            }
-            df_delay = pd.DataFrame(delay_results)
-            colors = ['#636EFA' if sig else '#888888' for sig in df_delay['Significant']]
-            fig_delay = go.Figure()
-            fig_delay.add_trace(go.Scatter(
-                x=df_delay['Coef'],
-                y=df_delay['Category'],
-                mode='markers',
-                marker=dict(size=12, color=colors),
-                error_x=dict(
-                    type='data',
-                    symmetric=False,
-                    array=df_delay['Upper'] - df_delay['Coef'],
-                    arrayminus=df_delay['Coef'] - df_delay['Lower'],
-                    color='gray'
-                ),
-                hovertemplate='<b>%{y}</b><br>Effect: %{x:.1f} months<extra></extra>'
-            ))
-            fig_delay.add_vline(x=0, line_dash="dash", line_color="black", annotation_text="No effect")
-            fig_delay.update_layout(
-                xaxis_title='Effect on Delay (months)',
-                xaxis=dict(tickfont=dict(size=12), title_font=dict(size=14)),
-                yaxis=dict(tickfont=dict(size=11)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=350
-            )
-            st.plotly_chart(fig_delay, use_container_width=True)
-            st.caption("Blue = significant (p < 0.05). Negative = less delay.")
+            st.plotly_chart(cached_figure('coefficient_plot', outcome='delay', measure=coef_measure), use_container_width=True)
+            st.caption(f"Blue = significant (p < 0.05). Negative = less delay. Error bars: {ci_label}.")
         
         st.markdown("---")
         
-        # Subcategory Decomposition
-        st.subheader("Subcategory Decomposition: What Drives the Effects?")
+        # Key Insights: the significant category results by outcome and direction; notes only for findings that hold after FDR
+        notes = {
+            ('S3', 'coverage', 'cancellation'): "S3 and S4 are the categories with mandatory World Bank safeguard requirements — regulation works.",
+            ('S4', 'coverage', 'cancellation'): "S3 and S4 are the categories with mandatory World Bank safeguard requirements — regulation works.",
+            ('G2', 'emergence', 'cancellation'): "Even well-planned financial aspects face surprises — but the surprises are deadly for projects.",
+            ('E3', 'coverage', 'delay'): "Habitat and ecosystem assessments prevent costly project stoppages later.",
+        }
+
+        def p_text(p):
+            return "p &lt; 0.001" if p < 0.001 else f"p = {p:.3f}"
+
+        def insight_box(outcome, direction, title, background, border):
+            rows = results[(results['outcome'] == outcome) & results['significant'] & (np.sign(results['coef']) == direction)]
+            items, box_notes = [], []
+            for _, row in rows.sort_values('p').iterrows():
+                robust = row['q_fdr'] < ALPHA
+                items.append(f"• <b>{row['category']} ({CAT_LABELS[row['category']]})</b> {row['measure']}: {interpretation(row)} "
+                             f"({p_text(row['p'])}, FDR q = {row['q_fdr']:.3f}"
+                             f"{'' if robust else ', not significant after FDR'})")
+                note = notes.get((row['category'], row['measure'], outcome))
+                if robust and note and note not in box_notes:
+                    box_notes.append(note)
+            body = "<br>".join(items) if items else "No significant effect in this direction."
+            body += "".join(f"<br><br><i>{note}</i>" for note in box_notes)
+            st.markdown(f"""
+            <div style="background-color:{background}; padding:15px; border-radius:10px; border-left:4px solid {border};">
+            <b>{title}</b><br><br>
+            {body}
+            </div>
+            """, unsafe_allow_html=True)
+
+        cost_sig = results[(results['outcome'] == 'cost_change_perc_num') & results['significant']]
+        st.subheader("Key Insights")
         col1, col2 = st.columns(2)
-        
         with col1:
-            st.markdown("**S3 (Land & Resettlement) → Cancellation**")
-            s3_data = {
-                'Subcategory': ['S3a: Land Acquisition', 'S3b: Displacement & Resettlement'],
-                'OR': [0.01, 0.06],
-                'p-value': ['0.0001***', '0.011*']
-            }
-            df_s3 = pd.DataFrame(s3_data)
-            fig_s3 = go.Figure(data=[go.Bar(
-                x=df_s3['Subcategory'],
-                y=df_s3['OR'],
-                marker_color=['#EF553B', '#EF553B'],
-                text=[f"OR={v:.2f}" for v in df_s3['OR']],
-                textposition='outside',
-                textfont=dict(size=12)
-            )])
-            fig_s3.update_layout(
-                yaxis_title='Odds Ratio',
-                yaxis=dict(range=[0, 0.15]),
-                margin=dict(t=20, b=20, l=20, r=20),
-                height=300
-            )
-            st.plotly_chart(fig_s3, use_container_width=True)
-            st.caption("Both subcategories are significant drivers. Land acquisition planning is critical.")
-        
+            insight_box('cancellation', -1, "✓ What Reduces Cancellation Risk", '#E8F5E9', '#4CAF50')
         with col2:
-            st.markdown("**E3 (Biodiversity) → Delay**")
-            e3_data = {
-                'Subcategory': ['E3a: Habitat', 'E3d: Biodiversity', 'E3b: Species', 'E3c: Forest'],
-                'Coef': [-78.2, -675.7, -36.4, -36.9],
-                'Significant': [True, True, False, False]
-            }
-            df_e3 = pd.DataFrame(e3_data)
-            colors = ['#636EFA' if sig else '#CCCCCC' for sig in df_e3['Significant']]
-            fig_e3 = go.Figure(data=[go.Bar(
-                x=df_e3['Subcategory'],
-                y=df_e3['Coef'],
-                marker_color=colors,
-                text=[f"{v:.0f}mo" for v in df_e3['Coef']],
-                textposition='outside',
-                textfont=dict(size=12)
-            )])
-            fig_e3.update_layout(
-                yaxis_title='Effect on Delay (months)',
-                yaxis=dict(range=[-750, 50]),
-                margin=dict(t=20, b=20, l=20, r=20),
-                height=300
-            )
-            st.plotly_chart(fig_e3, use_container_width=True)
-            st.caption("Habitat and Biodiversity assessments are the key drivers.")
+            insight_box('cancellation', 1, "⚠️ What Increases Cancellation Risk", '#FFEBEE', '#EF553B')
         
-        st.markdown("---")
+        st.markdown("")
         
-        # Key Insights
-        st.subheader("Key Insights")
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown("""
-            <div style="background-color:#E8F5E9; padding:15px; border-radius:10px; border-left:4px solid #4CAF50;">
-            <b>✓ What Reduces Cancellation Risk</b><br><br>
-            Thorough coverage of <b>S3 (Land & Resettlement)</b> and <b>S4 (Indigenous Peoples)</b> at appraisal reduces cancellation risk by <b>88-90%</b>.<br><br>
-            <i>These are exactly the categories with mandatory World Bank safeguard requirements — regulation works.</i>
-            </div>
-            """, unsafe_allow_html=True)
+            insight_box('delay', -1, "🕐 What Reduces Delay", '#E3F2FD', '#2196F3')
         with col2:
-            st.markdown("""
-            <div style="background-color:#FFEBEE; padding:15px; border-radius:10px; border-left:4px solid #EF553B;">
-            <b>⚠️ What Increases Cancellation Risk</b><br><br>
-            <b>G2 Fiscal emergence</b> (financial surprises during implementation) increases cancellation risk by <b>34x</b>.<br><br>
-            <i>Even well-planned financial aspects face surprises — but the surprises are deadly for projects.</i>
-            </div>
-            """, unsafe_allow_html=True)
-        
+            insight_box('delay', 1, "⏳ What Increases Delay", '#F3E5F5', '#8E24AA')
+
         st.markdown("")
-        
+
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown("""
-            <div style="background-color:#E3F2FD; padding:15px; border-radius:10px; border-left:4px solid #2196F3;">
-            <b>🕐 What Reduces Delay</b><br><br>
-            Thorough <b>E3 (Biodiversity)</b> coverage at appraisal reduces delay by <b>~3 years</b>.<br><br>
-            <i>Habitat and ecosystem assessments prevent costly project stoppages later.</i>
-            </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            st.markdown("""
+            if cost_sig.empty:
+                cost_text = "ESG measures do <b>not significantly predict cost overruns</b>.<br><br><i>Cost changes appear driven by non-ESG factors: market conditions, scope changes, technical issues.</i>"
+            else:
+                cost_text = "Only " + ", ".join(f"<b>{r['category']} {r['measure']}</b>" for _, r in cost_sig.iterrows()) + " significantly predicts cost change."
+            st.markdown(f"""
             <div style="background-color:#FFF3E0; padding:15px; border-radius:10px; border-left:4px solid #FF9800;">
-            <b>💰 Cost Overruns: No ESG Signal</b><br><br>
-            ESG measures do <b>not significantly predict cost overruns</b>.<br><br>
-            <i>Cost changes appear driven by non-ESG factors: market conditions, scope changes, technical issues.</i>
+            <b>💰 Cost Overruns: {'No ESG Signal' if cost_sig.empty else 'Weak ESG Signal'}</b><br><br>
+            {cost_text}
             </div>
             """, unsafe_allow_html=True)
+        st.caption(f"Listed: every category result with p < {ALPHA} in the summary table, most significant first. "
+                   "FDR q is the Benjamini-Hochberg adjusted permutation p-value across all tests.")
         
         st.markdown("---")
         
@@ -1738,213 +1426,171 @@ with tab6:
         col1, col2 = st.columns([1, 3])
         with col1:
             pillar_select = st.radio("Select Pillar", ['E', 'S', 'G'], horizontal=False, key="cov_emerg_pillar")
-        pillar_labels = {'E': 'Environmental', 'S': 'Social', 'G': 'Governance'}
-        pillar_colors = {'E': '#81C784', 'S': '#64B5F6', 'G': '#FFB74D'}
-        cov_col = f'app_{pillar_select}_pct'
-        emerg_col = f'{pillar_select}_emergence_rate'
+            levels = [f"{pillar_select}: All {PILLAR_NAMES[pillar_select]}"] + [
+                f"{c}: {CAT_LABELS[c]}" for c in CAT_LABELS if c.startswith(pillar_select)]
+            unit = st.selectbox("Level", levels, key="cov_emerg_category").split(":")[0]
         with col2:
-            fig_scatter = go.Figure()
-            fig_scatter.add_trace(go.Scatter(
-                x=df_app[cov_col],
-                y=df_app[emerg_col],
-                mode='markers',
-                marker=dict(size=8, color=pillar_colors[pillar_select], opacity=0.6),
-                text=df_app['projectid'],
-                hovertemplate='<b>%{text}</b><br>Coverage: %{x:.1f}%<br>Emergence: %{y:.2f}<extra></extra>'
-            ))
-            z = np.polyfit(df_app[cov_col], df_app[emerg_col], 1)
-            p = np.poly1d(z)
-            x_line = np.linspace(df_app[cov_col].min(), df_app[cov_col].max(), 100)
-            fig_scatter.add_trace(go.Scatter(
-                x=x_line,
-                y=p(x_line),
-                mode='lines',
-                line=dict(color='red', dash='dash'),
-                name='Trend'
-            ))
-            corr = df_app[cov_col].corr(df_app[emerg_col])
-            fig_scatter.update_layout(
-                xaxis_title=f'{pillar_labels[pillar_select]} Coverage (%)',
-                yaxis_title=f'{pillar_labels[pillar_select]} Emergence Rate',
-                xaxis=dict(tickfont=dict(size=14), title_font=dict(size=16)),
-                yaxis=dict(tickfont=dict(size=14), title_font=dict(size=16)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=400,
-                showlegend=False
-            )
-            st.plotly_chart(fig_scatter, use_container_width=True)
-        st.caption(f"Correlation: r = {corr:.2f} — Lower coverage at planning stage is associated with higher emergence of issues during implementation.")
+            st.plotly_chart(cached_figure('coverage_emergence', unit=unit), use_container_width=True)
+        trend = trend_fits()[0].set_index('unit').loc[unit]
+        reading = ("Lower coverage at planning stage is associated with higher emergence of issues during implementation."
+                   if trend['spearman_rho'] < 0 else "Higher coverage does not come with lower emergence at this level.")
+        st.caption(f"Correlation: r = {trend['pearson_r']:.2f}, Spearman ρ = {trend['spearman_rho']:.2f}; "
+                   f"Theil-Sen slope {trend['theil_sen_slope']:+.3f} per coverage point — {reading}")
         st.markdown("---")
         # Subcategory Decomposition (Detailed)
         st.subheader("Subcategory Decomposition: Identifying the Drivers")
         st.markdown("We decomposed significant category-level findings into their constituent subcategories to identify which specific aspects drive the effects.")
-        
-        # S3 Subcategories → Cancellation
-        st.markdown("#### S3 (Land & Resettlement) → Cancellation")
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown("""
-            <div style="background-color:#f5f5f5; padding:15px; border-radius:10px;">
-            <b>Category-level finding:</b><br>
-            S3 Coverage OR = 0.10***<br>
-            (90% reduction in cancellation risk)<br><br>
-            <b>Question:</b> Which aspect matters more?<br>
-            • Land Acquisition (S3a)<br>
-            • Displacement & Resettlement (S3b)
-            </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            s3_data = pd.DataFrame({
-                'Subcategory': ['S3a: Land Acquisition\n& Property Rights', 'S3b: Displacement\n& Resettlement'],
-                'OR': [0.012, 0.059],
-                'Terms': [61, 51],
-                'p': [0.0001, 0.011]
-            })
-            fig_s3 = go.Figure()
-            fig_s3.add_trace(go.Bar(
-                x=s3_data['Subcategory'],
-                y=s3_data['OR'],
-                marker_color=['#C62828', '#EF5350'],
-                text=[f"OR={v:.3f}<br>p={p:.4f}" for v, p in zip(s3_data['OR'], s3_data['p'])],
-                textposition='outside',
-                textfont=dict(size=12)
-            ))
-            fig_s3.update_layout(
-                yaxis_title='Odds Ratio (lower = more protective)',
-                yaxis=dict(range=[0, 0.12], tickfont=dict(size=12), title_font=dict(size=14)),
-                xaxis=dict(tickfont=dict(size=11)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=300
-            )
-            st.plotly_chart(fig_s3, use_container_width=True)
-        st.markdown("""
-        <div style="background-color:#FFEBEE; padding:12px; border-radius:8px; border-left:4px solid #C62828;">
-        <b>Finding:</b> Both subcategories are significant, but <b>Land Acquisition (S3a)</b> has a stronger protective effect (99% reduction vs 94%).<br>
-        <b>Implication:</b> Prioritize thorough property rights documentation and land acquisition planning — this has the highest ROI for preventing cancellation.
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("---")
-        
-        # G2 Subcategories → Cancellation (Emergence)
-        st.markdown("#### G2 (Financial Management) Emergence → Cancellation")
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown("""
-            <div style="background-color:#f5f5f5; padding:15px; border-radius:10px;">
-            <b>Category-level finding:</b><br>
-            G2 Emergence OR = 33.9*<br>
-            (34x higher cancellation risk)<br><br>
-            <b>Question:</b> Which type of financial surprise matters?<br>
-            • Cost Analysis (G2a)<br>
-            • Fiscal Management (G2b)<br>
-            • Economic Efficiency (G2c)
-            </div>
-            """, unsafe_allow_html=True)
-        with col2:
-            g2_data = pd.DataFrame({
-                'Subcategory': ['G2a: Cost Analysis', 'G2b: Fiscal Management', 'G2c: Economic Efficiency'],
-                'OR': [1.09, 3.30, 1.39],
-                'Terms': [111, 206, 100],
-                'p': [0.837, 0.049, 0.497],
-                'Significant': [False, True, False]
-            })
-            colors = ['#CCCCCC', '#FF6F00', '#CCCCCC']
-            fig_g2 = go.Figure()
-            fig_g2.add_trace(go.Bar(
-                x=g2_data['Subcategory'],
-                y=g2_data['OR'],
-                marker_color=colors,
-                text=[f"OR={v:.2f}<br>p={p:.3f}" for v, p in zip(g2_data['OR'], g2_data['p'])],
-                textposition='outside',
-                textfont=dict(size=12)
-            ))
-            fig_g2.add_hline(y=1, line_dash="dash", line_color="black", annotation_text="OR=1 (no effect)")
-            fig_g2.update_layout(
-                yaxis_title='Odds Ratio (higher = more risk)',
-                yaxis=dict(range=[0, 4.5], tickfont=dict(size=12), title_font=dict(size=14)),
-                xaxis=dict(tickfont=dict(size=11)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=300
-            )
-            st.plotly_chart(fig_g2, use_container_width=True)
-        st.markdown("""
-        <div style="background-color:#FFF3E0; padding:12px; border-radius:8px; border-left:4px solid #FF6F00;">
-        <b>Finding:</b> Only <b>Fiscal Management (G2b)</b> emergence significantly predicts cancellation. Cost analysis and economic efficiency surprises do not.<br>
-        <b>Implication:</b> Monitor specifically for fiscal management vocabulary (budget execution, disbursement, funding flows). Budget EXECUTION problems — not just cost estimates — signal project failure.
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("---")
-        
-        # E3 Subcategories → Delay
-        st.markdown("#### E3 (Biodiversity) Coverage → Delay")
-        col1, col2 = st.columns([1, 2])
-        with col1:
-            st.markdown("""
-            <div style="background-color:#f5f5f5; padding:15px; border-radius:10px;">
-            <b>Category-level finding:</b><br>
-            E3 Coverage: -35.4 months*<br>
-            (~3 years less delay)<br><br>
-            <b>Question:</b> Which biodiversity aspect matters?<br>
-            • Habitats & Ecosystems (E3a)<br>
-            • Species & Wildlife (E3b)<br>
-            • Forestry (E3c)<br>
-            • Biodiversity Conservation (E3d)
+
+        decomposed = decomposition()
+
+        def subcategory_finding(subs):
+            sig = subs[subs['significant']]
+            if sig.empty:
+                return "No single subcategory is significant on its own; the effect is spread across them."
+            strongest = sig.loc[sig['coef'].abs().idxmax()]
+            listed = ", ".join(f"<b>{label} ({code})</b>" for code, label in zip(sig['subcategory'], sig['label']))
+            return f"Significant: {listed}. Strongest effect: <b>{strongest['label']} ({strongest['subcategory']})</b> ({interpretation(strongest)})."
+
+        # curated follow-ups, keyed by the subcategory result they rest on; shown only while it is significant
+        implications = {
+            ('S3a', 'coverage', 'cancellation'): "Prioritize thorough property rights documentation and land acquisition planning — this has the highest ROI for preventing cancellation.",
+            ('G2b', 'emergence', 'cancellation'): "Monitor specifically for fiscal management vocabulary (budget execution, disbursement, funding flows). Budget EXECUTION problems — not just cost estimates — signal project failure.",
+            ('E3a', 'coverage', 'delay'): "Prioritize habitat/ecosystem impact assessments at appraisal. These are often required by regulators — missing them causes downstream regulatory delays.",
+        }
+        actions = {
+            ('S3a', 'coverage'): "Document property rights thoroughly",
+            ('S3b', 'coverage'): "Plan resettlement early",
+            ('G2b', 'emergence'): "Monitor budget execution language",
+            ('E3a', 'coverage'): "Conduct habitat assessments upfront",
+        }
+        # (box background, border) per outcome/measure, matching the bar colors
+        styles = {
+            ('cancellation', 'coverage'): ('#FFEBEE', '#C62828'),
+            ('cancellation', 'emergence'): ('#FFF3E0', '#FF6F00'),
+        }
+
+        for (category, measure, outcome), subs in decomposed.groupby(['category', 'measure', 'outcome'], sort=False):
+            parent = fitted(results, category, measure, outcome)
+            st.markdown(f"#### {category} ({CAT_LABELS[category]}) {measure.title()} → {outcome_labels[outcome]}")
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                options = "".join(f"• {label} ({code})<br>" for code, label in zip(subs['subcategory'], subs['label']))
+                st.markdown(f"""
+                <div style="background-color:#f5f5f5; padding:15px; border-radius:10px;">
+                <b>Category-level finding:</b><br>
+                {category} {measure.title()}: {effect_text(parent)}{stars(parent['p'])}<br>
+                ({interpretation(parent)})<br><br>
+                <b>Question:</b> Which aspect matters more?<br>
+                {options}
+                </div>
+                """, unsafe_allow_html=True)
+            with col2:
+                st.plotly_chart(cached_figure('subcategory_plot', category=category, measure=measure, outcome=outcome), use_container_width=True)
+            background, border = styles.get((outcome, measure), ('#E3F2FD', '#1565C0'))
+            keys = [(code, measure, outcome) for code in subs.loc[subs['significant'], 'subcategory']]
+            implication = "".join(f"<br><b>Implication:</b> {implications[key]}" for key in keys if key in implications)
+            st.markdown(f"""
+            <div style="background-color:{background}; padding:12px; border-radius:8px; border-left:4px solid {border};">
+            <b>Finding:</b> {subcategory_finding(subs)}{implication}
             </div>
             """, unsafe_allow_html=True)
-        with col2:
-            e3_data = pd.DataFrame({
-                'Subcategory': ['E3a: Habitats', 'E3b: Species', 'E3c: Forestry', 'E3d: Biodiversity'],
-                'Coef': [-78.2, -36.4, -36.9, -675.7],
-                'Terms': [75, 32, 34, 15],
-                'p': [0.0002, 0.356, 0.354, 0.009],
-                'Significant': [True, False, False, True]
-            })
-            colors = ['#1565C0', '#CCCCCC', '#CCCCCC', '#42A5F5']
-            fig_e3 = go.Figure()
-            fig_e3.add_trace(go.Bar(
-                x=e3_data['Subcategory'],
-                y=e3_data['Coef'],
-                marker_color=colors,
-                text=[f"{v:.0f}mo<br>p={p:.3f}" for v, p in zip(e3_data['Coef'], e3_data['p'])],
-                textposition='outside',
-                textfont=dict(size=11)
-            ))
-            fig_e3.add_hline(y=0, line_dash="dash", line_color="black")
-            fig_e3.update_layout(
-                yaxis_title='Effect on Delay (months)',
-                yaxis=dict(range=[-800, 100], tickfont=dict(size=12), title_font=dict(size=14)),
-                xaxis=dict(tickfont=dict(size=11)),
-                margin=dict(t=30, b=20, l=20, r=20),
-                height=300
-            )
-            st.plotly_chart(fig_e3, use_container_width=True)
-        st.markdown("""
-        <div style="background-color:#E3F2FD; padding:12px; border-radius:8px; border-left:4px solid #1565C0;">
-        <b>Finding:</b> <b>Habitat & Ecosystem (E3a)</b> coverage is the primary driver (-78 months). E3d (Biodiversity) shows a large effect but has only 15 terms — interpret with caution.<br>
-        <b>Implication:</b> Prioritize habitat/ecosystem impact assessments at appraisal. These are often required by regulators — missing them causes downstream regulatory delays.
-        </div>
-        """, unsafe_allow_html=True)
-        st.markdown("---")
-        
-        # Summary Table
+            st.markdown("---")
+
+        # Summary Table: every subcategory that is significant on its own
         st.subheader("Summary: Targeted Interventions")
-        summary_subcat = {
-            'Category': ['S3: Land & Resettlement', 'S3: Land & Resettlement', 'G2: Financial (Emergence)', 'E3: Biodiversity'],
-            'Key Subcategory': ['S3a: Land Acquisition', 'S3b: Resettlement', 'G2b: Fiscal Management', 'E3a: Habitats & Ecosystems'],
-            'Effect': ['OR=0.01 (99% ↓)', 'OR=0.06 (94% ↓)', 'OR=3.3 (3.3x ↑)', '-78 months'],
-            'Outcome': ['Cancellation', 'Cancellation', 'Cancellation', 'Delay'],
-            'Action': [
-                'Document property rights thoroughly',
-                'Plan resettlement early',
-                'Monitor budget execution language',
-                'Conduct habitat assessments upfront'
-            ]
-        }
-        st.dataframe(pd.DataFrame(summary_subcat), use_container_width=True, hide_index=True)
-        
-        st.markdown("""
+        targets = decomposed[decomposed['significant']]
+        summary_subcat = []
+        for _, row in targets.iterrows():
+            default = (f"Cover {row['label'].lower()} thoroughly at appraisal" if row['measure'] == 'coverage'
+                       else f"Monitor {row['label'].lower()} during implementation")
+            summary_subcat.append({
+                'Category': f"{row['category']}: {CAT_LABELS[row['category']]} ({row['measure'].title()})",
+                'Key Subcategory': f"{row['subcategory']}: {row['label']}",
+                'Effect': f"{effect_text(row)}{stars(row['p'])}",
+                'Outcome': outcome_labels[row['outcome']],
+                'Action': actions.get((row['subcategory'], row['measure']), default)
+            })
+        if summary_subcat:
+            st.dataframe(pd.DataFrame(summary_subcat), use_container_width=True, hide_index=True)
+        else:
+            st.info("No subcategory is significant on its own, so no targeted intervention stands out.")
+        untargeted = decomposed.groupby(['category', 'measure', 'outcome'], sort=False)['significant'].any()
+        untargeted = [f"{category} {measure} → {outcome_labels[outcome].lower()}" for (category, measure, outcome), sig in untargeted.items() if not sig]
+        if untargeted:
+            st.caption(f"Not narrowed to a subcategory (no subcategory significant on its own, p < {ALPHA}): {', '.join(untargeted)}.")
+
+        focus = [f"instead of broadly addressing \"{CAT_LABELS[category]},\" focus on "
+                 + " and ".join(dict.fromkeys(rows['label'].str.lower()))
+                 for category, rows in targets.groupby('category', sort=False)]
+        takeaway = "; ".join(focus) if focus else "none yet, as no subcategory is significant on its own"
+        st.markdown(f"""
         <div style="background-color:#E8F5E9; padding:15px; border-radius:10px; border-left:4px solid #4CAF50; margin-top:15px;">
-        <b>Key Takeaway:</b> Subcategory analysis enables <b>targeted interventions</b>. Instead of broadly addressing "Land & Resettlement," focus specifically on land acquisition documentation. Instead of monitoring all financial metrics, track fiscal management vocabulary. Instead of general environmental assessments, prioritize habitat impact studies.
+        <b>Key Takeaway:</b> Subcategory analysis enables <b>targeted interventions</b>: {takeaway}.
         </div>
         """, unsafe_allow_html=True)
         st.markdown("---")
+
+
+def page_screening():
+    st.header("Screen a New Project")
+    st.markdown("##### Paste the extracted text of a new Project Appraisal Document (PAD) to get its ESG coverage profile and the cancellation and delay risk predicted by the screening models fitted on the 280 projects.")
+    st.markdown("---")
+    df_app = load_df_app()
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        uploaded = st.file_uploader("PAD text file", type=['txt'], key="screen_file")
+        text = st.text_area("...or paste the PAD text", height=200, key="screen_text")
+        if uploaded is not None:
+            text = uploaded.getvalue().decode('utf-8', errors='replace')
+    with col2:
+        planned_cost = st.number_input("Planned cost (millions, 2019 USD)", min_value=1.0,
+                                       value=float(df_app['planned_cost_adj_both'].median()), key="screen_cost")
+        sector = st.selectbox("Sector", list(df_app['sector_group'].cat.categories), key="screen_sector")
+        approval_year = st.number_input("Approval year", min_value=1980, max_value=2100, value=2012, key="screen_year")
+    if not text.strip():
+        st.info("Provide PAD text to score it.")
+        return
+    result = score_document(text, planned_cost, sector, int(approval_year))
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Cancellation probability", f"{result['cancellation_probability']:.0%}",
+                  delta=f"{result['cancellation_probability'] - df_app['cancellation'].mean():+.0%} vs sample",
+                  delta_color="inverse")
+    with col2:
+        st.metric("Expected delay", f"{result['expected_delay']:.0f} months",
+                  delta=f"{result['expected_delay'] - df_app['delay'].mean():+.0f} vs sample", delta_color="inverse")
+    with col3:
+        st.metric("Tokens scored", f"{result['n_tokens']:,}")
+    profile = result['profile']
+    rows = []
+    for code in CAT_LABELS:
+        col = f'app_{code}_pct'
+        rows.append({'Category': f"{code}: {CAT_LABELS[code]}", 'Coverage (%)': round(profile[col], 3),
+                     'Sample percentile': round((df_app[col] < profile[col]).mean() * 100)})
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    predictors = sorted({c[4:-4] for model in screening_models().values() for c in model['predictors']})
+    st.caption(f"Screening models: coverage of the categories significant in the Regression Analysis ({', '.join(predictors)}) "
+               f"plus log planned cost, sector and approval era ({result['controls']['era']}). Emergence needs the completion report and is not used.")
+
+
+# the page files import their section from this module, so only a run of app.py itself sets up the app
+if __name__ == "__main__":
+    st.set_page_config(
+        page_title="Infrastructure Project ESG Risk Analysis",
+        page_icon="🏗️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    st.title("ESG Challenges in Large-scale Infrastructure Project with Text Analysis")
+
+    pages = st.navigation([
+        st.Page("app_pages/introduction.py", title="Research Introduction", url_path="introduction", default=True),
+        st.Page("app_pages/projects.py", title="Infrastructure Projects Introduction", url_path="projects"),
+        st.Page("app_pages/seed_terms.py", title="ESG challenges Seed Term Extraxtion", url_path="seed-terms"),
+        st.Page("app_pages/metadata.py", title="Project Metadata", url_path="metadata"),
+        st.Page("app_pages/text_data.py", title="Project Text Data", url_path="text-data"),
+        st.Page("app_pages/analysis.py", title="Analysis", url_path="analysis"),
+        st.Page("app_pages/screening.py", title="Screen a New Project", url_path="screening"),
+    ], position="top")
+    pages.run()
@@ -0,0 +1,4 @@
+"""Analysis page of app.py."""
+from app import page_analysis
+
+page_analysis()
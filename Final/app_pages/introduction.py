@@ -0,0 +1,4 @@
+"""Research Introduction page of app.py."""
+from app import page_introduction
+
+page_introduction()
@@ -0,0 +1,4 @@
+"""Project Metadata page of app.py."""
+from app import page_metadata
+
+page_metadata()
@@ -0,0 +1,4 @@
+"""Infrastructure Projects Introduction page of app.py."""
+from app import page_projects
+
+page_projects()
@@ -0,0 +1,4 @@
+"""Screen a New Project page of app.py."""
+from app import page_screening
+
+page_screening()
@@ -0,0 +1,4 @@
+"""Seed Term Extraction page of app.py."""
+from app import page_seed_terms
+
+page_seed_terms()
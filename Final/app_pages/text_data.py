@@ -0,0 +1,4 @@
+"""Project Text Data page of app.py."""
+from app import page_text_data
+
+page_text_data()
@@ -0,0 +1,158 @@
+"""Batch feature extraction for a directory of extracted PAD/ICR texts.
+
+Every project is ``<projectid>_PAD.txt`` and, when its completion report is
+available, ``<projectid>_ICR.txt`` (UTF-8 text extracted from the PDFs). Projects
+are featurized in a process pool with the same steps as scoring.py: coverage
+from the PAD, emergence from PAD and ICR together (NaN without an ICR).
+
+Only a bounded number of projects is in flight at a time, and finished rows are
+appended to ``<output>.features.csv`` as they arrive, so an interrupted run
+resumes where it stopped. The final output has the df_app_streamlit.csv column
+layout, with project metadata, outcomes and the derived era, size and risk flags
+filled from a fin_project_metadata_280.csv-style file for the projects it covers:
+    python batch_score.py texts/ df_app_new.csv [--metadata fin_project_metadata_280.csv] [--workers N]
+"""
+import argparse
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data import BASE
+from regression import MEASURES
+from matcher import dictionary_matcher, match_text
+from scoring import SECTOR_GROUPS, coverage_profile, emergence_profile, profile_units
+
+DOCUMENT = re.compile(r'(?P<projectid>.+)_(?P<doc>PAD|ICR)\.txt', re.IGNORECASE)
+# projects per worker kept in flight; bounds memory to a few documents per process
+IN_FLIGHT = 4
+FLUSH_EVERY = 50
+ERAS = [(1994, '1989-94'), (1999, '1995-99'), (2005, '2000-05'), (np.inf, '2006-12')]
+# df_app flag -> (column, direction): below / above the median of the scored projects
+RISK_FLAGS = {
+    'low_S3_coverage': ('app_S3_pct', 'low'),
+    'low_S4_coverage': ('app_S4_pct', 'low'),
+    'low_E3_coverage': ('app_E3_pct', 'low'),
+    'high_G2_emergence': ('G2_emergence_rate', 'high'),
+}
+
+
+def find_documents(directory):
+    """projectid -> {'PAD': path, 'ICR': path} for every project with a PAD text."""
+    docs = {}
+    for path in sorted(Path(directory).iterdir()):
+        match = DOCUMENT.fullmatch(path.name)
+        if match:
+            docs.setdefault(match['projectid'], {})[match['doc'].upper()] = path
+    return {pid: paths for pid, paths in docs.items() if 'PAD' in paths}
+
+
+def _init():
+    # compile the dictionary once per worker rather than once per project
+    dictionary_matcher()
+    profile_units()
+
+
+def featurize(projectid, pad_path, icr_path=None):
+    """Coverage and emergence features of one project as a df_app row."""
+    pad, n_tokens = match_text(Path(pad_path).read_text(encoding='utf-8', errors='replace'))
+    row = coverage_profile(pad, n_tokens)
+    if icr_path is None:
+        emergence = pd.Series(np.nan, index=[MEASURES['emergence'].format(u) for u in profile_units()])
+    else:
+        icr, _ = match_text(Path(icr_path).read_text(encoding='utf-8', errors='replace'))
+        emergence = emergence_profile(pad, icr)
+    return pd.concat([pd.Series({'projectid': projectid}), row, emergence])
+
+
+def _append(rows, path):
+    frame = pd.DataFrame(rows)
+    frame.to_csv(path, mode='a', header=not path.exists(), index=False)
+
+
+def extract_features(directory, features_path, workers=None):
+    """Featurize every project in `directory` not yet in `features_path`, appending as results arrive."""
+    docs = find_documents(directory)
+    done = set(pd.read_csv(features_path, usecols=['projectid'])['projectid']) if features_path.exists() else set()
+    todo = [pid for pid in docs if pid not in done]
+    print(f"{len(docs)} projects, {len(done)} already done, {len(todo)} to featurize")
+    workers = workers or os.cpu_count()
+    start, finished, rows = time.perf_counter(), 0, []
+    pending = iter(todo)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init) as pool:
+        running = set()
+        while True:
+            while len(running) < workers * IN_FLIGHT:
+                pid = next(pending, None)
+                if pid is None:
+                    break
+                running.add(pool.submit(featurize, pid, docs[pid]['PAD'], docs[pid].get('ICR')))
+            if not running:
+                break
+            complete, running = wait(running, return_when=FIRST_COMPLETED)
+            rows.extend(future.result() for future in complete)
+            finished += len(complete)
+            if len(rows) >= FLUSH_EVERY or not running:
+                _append(rows, features_path)
+                rows = []
+                rate = finished / (time.perf_counter() - start)
+                print(f"{finished}/{len(todo)} projects ({rate:.1f}/s)")
+
+
+def metadata_columns(metadata):
+    """df_app metadata and outcome columns from a fin_project_metadata_280.csv-style frame."""
+    return pd.DataFrame({
+        'projectid': metadata['projectid'],
+        'countryname': metadata['countryname'],
+        'regionname': metadata['regionname'],
+        'sector_group': metadata['sector1'].replace(SECTOR_GROUPS),
+        'approval_year': metadata['approval_year'].astype('Int64'),
+        'closingyear': metadata['closingyear'].astype('Int64'),
+        'env_cat': metadata['envassesmentcategorycode'].where(metadata['envassesmentcategorycode'].isin(['A', 'B', 'C'])),
+        'planned_cost_adj_both': metadata['planned_cost_adj_both'],
+        'duration_planned': metadata['duration_planned'],
+        'cancellation': metadata['cancellation'],
+        'delay': metadata['delay'],
+        'cost_change_perc_num': pd.to_numeric(metadata['cost_change_perc'].astype(str).str.rstrip('%'), errors='coerce'),
+    })
+
+
+def assemble(features, metadata, layout):
+    """Features joined to metadata, with derived era/size/risk columns, in the column order `layout`."""
+    df = features.merge(metadata, on='projectid', how='left')
+    df['era'] = pd.cut(df['approval_year'], [-np.inf] + [end for end, _ in ERAS],
+                       labels=[label for _, label in ERAS], right=True)
+    cost = df['planned_cost_adj_both']
+    # cost terciles of the scored projects; lower edges are inclusive as in df_app
+    df['size_category'] = pd.cut(cost, [-np.inf, *cost.quantile([1 / 3, 2 / 3]), np.inf],
+                                 labels=['Small', 'Medium', 'Large'], right=False)
+    for flag, (col, direction) in RISK_FLAGS.items():
+        median = df[col].median()
+        df[flag] = (df[col] < median if direction == 'low' else df[col] > median).astype(int)
+    df['risk_score'] = df[list(RISK_FLAGS)].sum(axis=1)
+    return df.reindex(columns=layout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help="directory of <projectid>_PAD.txt / <projectid>_ICR.txt files")
+    parser.add_argument('output', help="CSV to write in the df_app_streamlit.csv layout")
+    parser.add_argument('--metadata', default=str(BASE / "fin_project_metadata_280.csv"),
+                        help="project metadata CSV with the fin_project_metadata_280.csv columns")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    output = Path(args.output)
+    features_path = output.with_suffix('.features.csv')
+    extract_features(args.directory, features_path, args.workers)
+    layout = pd.read_csv(BASE / "df_app_streamlit.csv", nrows=0).columns
+    metadata = metadata_columns(pd.read_csv(args.metadata))
+    assemble(pd.read_csv(features_path), metadata, layout).to_csv(output, index=False)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Bootstrap confidence intervals for the tab6 category models.
+
+Every chunk of resamples is drawn as one (resamples x projects) index matrix from
+its own seed (SeedSequence(SEED, spawn_key=(chunk,))), so results do not depend
+on the number of worker processes. Within a chunk each predictor's models are
+refitted for all resamples at once with the batched solvers in regression.py.
+A leave-one-out jackknife supplies the acceleration for the BCa intervals.
+
+Resampling runs offline; the app only reads the cached result:
+    python bootstrap.py [--resamples 2000] [--workers N]
+writes ``bootstrap_cache/bootstrap-<key>.csv``, keyed by the df_app data hash and
+the bootstrap settings. Rebuild the figure cache (``python figures.py``) afterwards.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from data import BASE, dataset_hash, load_df_app
+from regression import (ALPHA, OUTCOMES, control_matrix, predictor_columns, solve_logit, solve_ols,
+                        stack_designs)
+
+BOOTSTRAP_DIR = BASE / "bootstrap_cache"
+N_RESAMPLES = 2000
+CHUNK_SIZE = 250
+SEED = 20240601
+
+# per-process design arrays, set once by the pool initializer
+_arrays = {}
+
+
+def _init(X, Y):
+    _arrays['X'], _arrays['Y'] = X, Y
+
+
+def _refit(rows):
+    """Predictor coefficients for every (outcome, predictor) with the projects in `rows` (b, k)."""
+    X, Y = _arrays['X'], _arrays['Y']
+    coefs = np.empty((rows.shape[0], len(OUTCOMES), X.shape[0]))
+    for j in range(X.shape[0]):
+        Xb = X[j][rows]
+        for o, family in enumerate(OUTCOMES.values()):
+            solve = solve_logit if family == 'logit' else solve_ols
+            coefs[:, o, j] = solve(Xb, Y[o][rows])[0][:, 0]
+    return coefs
+
+
+def _resample_chunk(chunk, size):
+    n = _arrays['Y'].shape[1]
+    rng = np.random.default_rng(np.random.SeedSequence(SEED, spawn_key=(chunk,)))
+    return _refit(rng.integers(0, n, size=(size, n)))
+
+
+def _jackknife():
+    n = _arrays['Y'].shape[1]
+    rows = np.array([np.delete(np.arange(n), i) for i in range(n)])
+    return _refit(rows)
+
+
+def bootstrap_key(n_resamples=N_RESAMPLES):
+    payload = json.dumps({'data': dataset_hash("df_app_streamlit.csv"), 'resamples': n_resamples,
+                          'chunk': CHUNK_SIZE, 'seed': SEED, 'alpha': ALPHA}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def intervals(theta, boot, jack):
+    """Percentile and BCa intervals for estimates `theta` (k,) from draws `boot` (B, k) and `jack` (n, k).
+
+    Draws from non-converged fits are NaN and ignored.
+    """
+    lo, hi = ALPHA / 2, 1 - ALPHA / 2
+    pct = np.nanquantile(boot, [lo, hi], axis=0)
+    valid = np.isfinite(boot)
+    z0 = stats.norm.ppf((np.where(valid, boot < theta, False).sum(axis=0)) / valid.sum(axis=0))
+    dev = np.nanmean(jack, axis=0) - jack
+    accel = np.nansum(dev ** 3, axis=0) / (6 * np.nansum(dev ** 2, axis=0) ** 1.5)
+    bca = []
+    for q in (lo, hi):
+        z = z0 + stats.norm.ppf(q)
+        adjusted = stats.norm.cdf(z0 + z / (1 - accel * z))
+        bca.append([np.nanquantile(boot[:, k], adjusted[k]) if np.isfinite(adjusted[k]) else np.nan
+                    for k in range(boot.shape[1])])
+    return pct, np.array(bca), valid.sum(axis=0)
+
+
+def run_bootstrap(n_resamples=N_RESAMPLES, workers=None):
+    """Resample every category model and return one row of intervals per outcome x predictor."""
+    df = load_df_app()
+    predictors = predictor_columns()
+    X = stack_designs(control_matrix(df), df[[col for _, _, col in predictors]].to_numpy(dtype=float))
+    Y = np.stack([df[outcome].to_numpy(dtype=float) for outcome in OUTCOMES])
+    sizes = [min(CHUNK_SIZE, n_resamples - start) for start in range(0, n_resamples, CHUNK_SIZE)]
+
+    _init(X, Y)
+    theta = _refit(np.arange(len(df))[None, :])[0]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(X, Y)) as pool:
+        jack = pool.submit(_jackknife)
+        boot = np.concatenate(list(pool.map(_resample_chunk, range(len(sizes)), sizes)))
+        jack = jack.result()
+
+    rows = []
+    for o, (outcome, family) in enumerate(OUTCOMES.items()):
+        pct, bca, n_valid = intervals(theta[o], boot[:, o], jack[:, o])
+        transform = np.exp if family == 'logit' else (lambda v: v)
+        for j, (category, measure, column) in enumerate(predictors):
+            rows.append({
+                'outcome': outcome, 'category': category, 'measure': measure, 'column': column,
+                'coef': theta[o, j], 'boot_se': np.nanstd(boot[:, o, j], ddof=1), 'n_valid': int(n_valid[j]),
+                'pct_lower': transform(pct[0, j]), 'pct_upper': transform(pct[1, j]),
+                'bca_lower': transform(bca[0, j]), 'bca_upper': transform(bca[1, j]),
+            })
+    return pd.DataFrame(rows)
+
+
+def bootstrap_sources(n_resamples=N_RESAMPLES):
+    """The cached result file for the current data (relative to Final/), as a list of zero or one names."""
+    name = f"bootstrap_cache/bootstrap-{bootstrap_key(n_resamples)}.csv"
+    return [name] if (BASE / name).exists() else []
+
+
+@lru_cache(maxsize=4)
+def bootstrap_intervals(n_resamples=N_RESAMPLES):
+    """Cached bootstrap intervals for the current data, or None if `python bootstrap.py` has not been run."""
+    sources = bootstrap_sources(n_resamples)
+    return pd.read_csv(BASE / sources[0]) if sources else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--resamples', type=int, default=N_RESAMPLES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    BOOTSTRAP_DIR.mkdir(exist_ok=True)
+    key = bootstrap_key(args.resamples)
+    run_bootstrap(args.resamples, args.workers).to_csv(BOOTSTRAP_DIR / f"bootstrap-{key}.csv", index=False)
+    for path in BOOTSTRAP_DIR.glob("bootstrap-*.csv"):
+        if path.name != f"bootstrap-{key}.csv":
+            path.unlink()
+    print(f"built bootstrap-{key}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Build the columnar data bundle read by data.py.
+
+Every dataset in data.DATASETS is parsed once with its explicit dtypes and written to
+bundle/<name>.arrow as an uncompressed Arrow IPC file, which the app memory-maps and
+reads column by column without copying. bundle/manifest.json pins the bundle
+version and, per dataset, the source file hash, row count and Arrow schema; the app
+ignores any dataset whose source file or schema no longer matches.
+
+Run after changing any source CSV/JSON:
+    python build_bundle.py
+"""
+import json
+
+import pyarrow as pa
+
+from data import BUNDLE_DIR, BUNDLE_VERSION, DATASETS, dataset_hash
+
+
+def build_bundle():
+    BUNDLE_DIR.mkdir(exist_ok=True)
+    manifest = {'version': BUNDLE_VERSION, 'datasets': {}}
+    for name, (source, parse) in DATASETS.items():
+        table = pa.Table.from_pandas(parse(), preserve_index=False)
+        file_name = f"{name}.arrow"
+        with pa.OSFile(str(BUNDLE_DIR / file_name), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        manifest['datasets'][name] = {
+            'file': file_name,
+            'source': source,
+            'source_hash': dataset_hash(source),
+            'rows': table.num_rows,
+            'schema': table.schema.to_string(show_schema_metadata=False),
+        }
+        print(f"{name}: {table.num_rows} rows x {table.num_columns} columns")
+    (BUNDLE_DIR / "manifest.json").write_text(json.dumps(manifest, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    build_bundle()
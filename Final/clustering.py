@@ -0,0 +1,78 @@
+"""Hierarchical clustering of the seed terms behind the tab3 dendrograms.
+
+Seed terms are embedded once and each category's Ward linkage is computed on first
+use and cached per process. Embeddings are the MPNET sentence embeddings in the
+embedding store (embeddings.py); until every seed term is stored there
+(has_embeddings()), the app shows the dendrogram_*_horizontal.png figures built
+from the same embeddings instead.
+
+Run after changing seed_final_314.csv to encode any new terms (needs
+sentence-transformers and access to the model; terms already in the store, or in
+a legacy ``seed_embeddings.npz``, are not re-encoded):
+    python clustering.py
+"""
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+from scipy.cluster.hierarchy import linkage
+
+from data import BASE, load_seed_terms
+from embeddings import EMBEDDING_MODEL, add_vectors, encode_missing, load_index, lookup, normalize_term, store_dir
+
+LEGACY_EMBEDDING_FILE = "seed_embeddings.npz"
+
+
+def _seed_terms():
+    return load_seed_terms(columns=['Term'])['Term'].map(normalize_term).unique().tolist()
+
+
+@lru_cache(maxsize=1)
+def has_embeddings():
+    """Whether the embedding store has the MPNET embedding of every seed term."""
+    return set(_seed_terms()) <= set(load_index(EMBEDDING_MODEL)['terms'])
+
+
+def embedding_source():
+    """The data file the seed term embeddings are read from."""
+    return str((store_dir(EMBEDDING_MODEL) / "index.json").relative_to(BASE))
+
+
+@lru_cache(maxsize=1)
+def term_embeddings():
+    """Map of normalized term -> embedding vector, for the seed terms in the store."""
+    terms = _seed_terms()
+    vectors, found = lookup(terms, EMBEDDING_MODEL)
+    return {term: vector for term, vector, ok in zip(terms, vectors.astype(np.float64), found) if ok}
+
+
+@st.cache_data(show_spinner=False)
+def category_linkage(category):
+    """Ward linkage over the seed terms of `category`.
+
+    Returns (terms, linkage matrix, embedding matrix); terms without an embedding
+    are left out.
+    """
+    seed_terms = load_seed_terms(columns=['Category', 'Term'])
+    embeddings = term_embeddings()
+    terms = [t for t in seed_terms.loc[seed_terms['Category'] == category, 'Term']
+             if normalize_term(t) in embeddings]
+    vectors = np.array([embeddings[normalize_term(t)] for t in terms])
+    return terms, linkage(vectors, method='ward'), vectors
+
+
+def build_embeddings():
+    """Store embeddings for every seed term, importing a legacy npz first and encoding only the rest."""
+    legacy = BASE / LEGACY_EMBEDDING_FILE
+    if legacy.exists():
+        with np.load(legacy) as f:
+            if str(f['model']) == EMBEDDING_MODEL:
+                imported = add_vectors([str(t) for t in f['terms']], f['vectors'], EMBEDDING_MODEL)
+                print(f"{imported} terms imported from {legacy.name}")
+    terms = _seed_terms()
+    encoded = encode_missing(terms, EMBEDDING_MODEL)
+    print(f"{len(terms)} seed terms ({encoded} newly encoded) -> {store_dir(EMBEDDING_MODEL).relative_to(BASE)}/")
+
+
+if __name__ == "__main__":
+    build_embeddings()
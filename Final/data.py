@@ -0,0 +1,173 @@
+"""Cached data access for the Streamlit app.
+
+Each dataset is loaded once per process with explicit dtypes and shared by every
+session and rerun. The returned frames are shared objects: treat them as
+read-only and call ``.copy()`` before adding or changing columns.
+
+When a columnar bundle built by ``python build_bundle.py`` is present and matches
+the source files, datasets are read from memory-mapped Arrow files instead of
+being re-parsed, and only the requested ``columns`` are materialized. Otherwise
+the CSV/JSON sources are parsed directly.
+"""
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow as pa
+except ImportError:  # the bundle is optional; fall back to parsing the sources
+    pa = None
+
+BASE = Path(__file__).parent
+BUNDLE_DIR = BASE / "bundle"
+BUNDLE_VERSION = 1
+
+PROJECT_DATE_COLS = ['approvaldate', 'loan_effective_date', 'approvaldate.1',
+                     'closingdate_planned', 'closingdate_actual']
+PROJECT_CATEGORY_COLS = ['countryname', 'regionname', 'sector1', 'sector2', 'sector3', 'status',
+                         'envassesmentcategorycode', 'supplementprojectflg', 'projectfinancialtype']
+APP_CATEGORY_COLS = ['countryname', 'regionname', 'sector_group', 'env_cat', 'era', 'size_category']
+
+
+@lru_cache(maxsize=None)
+def dataset_hash(*names):
+    """Short content hash of one or more data files under Final/, used as a cache key."""
+    digest = hashlib.sha256()
+    for name in names:
+        digest.update(name.encode())
+        digest.update((BASE / name).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _addition_label(x):
+    if x is True or str(x).lower() == 'true':
+        return 'Yes'
+    if x is False or str(x).lower() == 'false':
+        return 'No'
+    return 'Unknown'
+
+
+def _parse_projects():
+    df = pd.read_csv(
+        BASE / "fin_project_metadata_280.csv",
+        dtype={col: 'category' for col in PROJECT_CATEGORY_COLS},
+    )
+    for col in PROJECT_DATE_COLS:
+        # a few cells are Excel serials instead of m/d/y strings; those become NaT
+        df[col] = pd.to_datetime(df[col], format='%m/%d/%y', errors='coerce')
+    df['cost_change_perc'] = pd.to_numeric(df['cost_change_perc'].str.rstrip('%'), errors='coerce')
+    df['addition_label'] = df['addition'].map(_addition_label)
+    return df
+
+
+def _parse_df_app():
+    df = pd.read_csv(
+        BASE / "df_app_streamlit.csv",
+        dtype={col: 'category' for col in APP_CATEGORY_COLS},
+    )
+    df['cost_change_perc_num'] = pd.to_numeric(df['cost_change_perc_num'], errors='coerce')
+    return df
+
+
+# dataset name -> (source file, parser producing the typed frame)
+DATASETS = {
+    'projects': ("fin_project_metadata_280.csv", _parse_projects),
+    'df_app': ("df_app_streamlit.csv", _parse_df_app),
+    'seed_source': ("seed_streamlit.json", lambda: pd.read_json(BASE / "seed_streamlit.json")),
+    'wb_seed': ("WB_seed.json", lambda: pd.read_json(BASE / "WB_seed.json")),
+    'seed_terms': ("seed_final_314.csv", lambda: pd.read_csv(BASE / "seed_final_314.csv")),
+    'esg_dict': ("esg_dictionary_final_2407.csv", lambda: pd.read_csv(BASE / "esg_dictionary_final_2407.csv")),
+    'viz_dict': ("esg_dictionary_viz.csv", lambda: pd.read_csv(BASE / "esg_dictionary_viz.csv")),
+    'wb_plr': ("WB_PLR.csv", lambda: pd.read_csv(BASE / "WB_PLR.csv", encoding='utf-8-sig')),
+    'us_ppi': ("IMF_US_PPI.csv", lambda: pd.read_csv(BASE / "IMF_US_PPI.csv")),
+}
+
+
+@lru_cache(maxsize=1)
+def bundle_manifest():
+    """The bundle manifest, or None when no usable bundle is installed."""
+    path = BUNDLE_DIR / "manifest.json"
+    if pa is None or not path.exists():
+        return None
+    manifest = json.loads(path.read_text())
+    if manifest.get('version') != BUNDLE_VERSION:
+        return None
+    return manifest
+
+
+def _read_bundle(name, columns):
+    manifest = bundle_manifest()
+    entry = manifest['datasets'].get(name) if manifest else None
+    # a bundle built from older source files is ignored rather than served stale
+    if entry is None or entry['source_hash'] != dataset_hash(entry['source']):
+        return None
+    reader = pa.ipc.open_file(pa.memory_map(str(BUNDLE_DIR / entry['file'])))
+    if reader.schema.to_string(show_schema_metadata=False) != entry['schema']:
+        return None
+    table = reader.read_all()
+    if columns is not None:
+        table = table.select(list(columns))
+    # split_blocks lets numeric columns without nulls stay zero-copy views of the map
+    return table.to_pandas(split_blocks=True)
+
+
+@st.cache_resource(show_spinner=False)
+def _load(name, columns=None):
+    df = _read_bundle(name, columns)
+    if df is None:
+        df = DATASETS[name][1]() if columns is None else _load(name)[list(columns)]
+    return df
+
+
+def _columns(columns):
+    return None if columns is None else tuple(columns)
+
+
+def load_projects(columns=None):
+    """Metadata for the 280 large-scale projects (fin_project_metadata_280.csv)."""
+    return _load('projects', _columns(columns))
+
+
+def load_df_app(columns=None):
+    """Project-level ESG coverage/emergence features and outcomes (df_app_streamlit.csv)."""
+    return _load('df_app', _columns(columns))
+
+
+def load_seed_source(columns=None):
+    """Cleaned ESF/IGAF source text, one row per category document (seed_streamlit.json)."""
+    return _load('seed_source', _columns(columns))
+
+
+def load_wb_seed(columns=None):
+    """Raw, cleaned and Americanized ESF/IGAF source text (WB_seed.json)."""
+    return _load('wb_seed', _columns(columns))
+
+
+def load_seed_terms(columns=None):
+    """The 314 curated seed terms (seed_final_314.csv)."""
+    return _load('seed_terms', _columns(columns))
+
+
+def load_esg_dict(columns=None):
+    """The expanded 2,407-term ESG dictionary (esg_dictionary_final_2407.csv)."""
+    return _load('esg_dict', _columns(columns))
+
+
+def load_viz_dict(columns=None):
+    """Dictionary terms with their 2D projection coordinates (esg_dictionary_viz.csv)."""
+    return _load('viz_dict', _columns(columns))
+
+
+def load_wb_plr(columns=None):
+    """World Bank price level ratios (WB_PLR.csv)."""
+    return _load('wb_plr', _columns(columns))
+
+
+def load_us_ppi(columns=None):
+    """IMF US producer price index (IMF_US_PPI.csv)."""
+    return _load('us_ppi', _columns(columns))
+
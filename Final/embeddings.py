@@ -0,0 +1,161 @@
+"""Persistent term embedding store shared by dictionary expansion, clustering and the 2D projection.
+
+Every model has its own directory ``embedding_store/<model>/``: ``vectors.bin``
+holds one STORE_DTYPE row per term, append-only, and ``index.json`` the model,
+dimension, dtype and the normalized terms in row order. Lookups memory-map
+vectors.bin, so reading a few hundred vectors never loads the whole store, and
+embed() encodes only the terms the store has not seen for that model.
+
+Embed the seed and dictionary terms, plus any candidate list (one term per
+line, or a CSV with a 'term' column), encoding only new ones (needs
+sentence-transformers from requirements-cli.txt and access to the model):
+    python embeddings.py [candidates.csv ...] [--model sentence-transformers/all-mpnet-base-v2]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data import BASE, load_esg_dict, load_seed_terms
+
+STORE_DIR = BASE / "embedding_store"
+STORE_VERSION = 1
+STORE_DTYPE = 'float16'
+EMBEDDING_MODEL = 'sentence-transformers/all-mpnet-base-v2'
+ENCODE_BATCH_SIZE = 64
+# terms encoded and appended at a time: bounds memory, and an interrupted run keeps its progress
+ENCODE_CHUNK = 10_000
+
+
+def normalize_term(term):
+    """Join key shared by the seed list ('land use'), the dictionary ('land_use') and the store."""
+    return term.strip().lower().replace(' ', '_')
+
+
+def store_dir(model=EMBEDDING_MODEL):
+    return STORE_DIR / model.replace('/', '--')
+
+
+def load_index(model=EMBEDDING_MODEL):
+    """The store index of `model`; an empty one when nothing has been stored for it."""
+    path = store_dir(model) / "index.json"
+    if path.exists():
+        index = json.loads(path.read_text())
+        if index.get('version') == STORE_VERSION:
+            return index
+    return {'version': STORE_VERSION, 'model': model, 'dim': None, 'dtype': STORE_DTYPE, 'terms': []}
+
+
+def _vectors(index):
+    if not index['terms']:
+        return np.zeros((0, index['dim'] or 0), dtype=index['dtype'])
+    return np.memmap(store_dir(index['model']) / "vectors.bin", dtype=index['dtype'], mode='r',
+                     shape=(len(index['terms']), index['dim']))
+
+
+def open_store(model=EMBEDDING_MODEL):
+    """The store of `model` for repeated lookups: its index, term -> row map and memory-mapped vectors."""
+    index = load_index(model)
+    return {'index': index, 'rows': {term: i for i, term in enumerate(index['terms'])}, 'vectors': _vectors(index)}
+
+
+def lookup(terms, model=EMBEDDING_MODEL, store=None):
+    """Stored vectors of `terms` as float32 (zero rows for unknown terms) and a mask of the terms found.
+
+    Pass an open_store() result as `store` to look up many batches without rereading the index.
+    """
+    store = store or open_store(model)
+    rows = store['rows']
+    found = np.array([normalize_term(t) in rows for t in terms], dtype=bool)
+    out = np.zeros((len(terms), store['index']['dim'] or 0), dtype=np.float32)
+    if found.any():
+        at = np.array([rows[normalize_term(t)] for t, ok in zip(terms, found) if ok])
+        out[found] = store['vectors'][at]
+    return out, found
+
+
+def add_vectors(terms, vectors, model=EMBEDDING_MODEL):
+    """Append vectors for normalized `terms` that are not stored yet."""
+    index = load_index(model)
+    known = set(index['terms'])
+    vectors = np.asarray(vectors)
+    new = {}
+    for i, term in enumerate(terms):
+        if term not in known:
+            new.setdefault(term, i)
+    if not new:
+        return 0
+    if index['dim'] is None:
+        index['dim'] = vectors.shape[1]
+    elif vectors.shape[1] != index['dim']:
+        raise ValueError(f"{model} vectors have {index['dim']} dimensions, got {vectors.shape[1]}")
+    directory = store_dir(model)
+    directory.mkdir(parents=True, exist_ok=True)
+    row_bytes = index['dim'] * np.dtype(index['dtype']).itemsize
+    with open(directory / "vectors.bin", 'ab') as f:
+        # drop rows an interrupted write left beyond the index
+        f.truncate(len(index['terms']) * row_bytes)
+        f.write(vectors[list(new.values())].astype(index['dtype']).tobytes())
+    index['terms'].extend(new)
+    tmp = directory / "index.json.tmp"
+    tmp.write_text(json.dumps(index) + "\n")
+    os.replace(tmp, directory / "index.json")
+    return len(new)
+
+
+def sentence_encoder(model=EMBEDDING_MODEL):
+    """Encode texts into unit-length vectors with a sentence-transformers model."""
+    from sentence_transformers import SentenceTransformer
+
+    encoder = SentenceTransformer(model)
+    return lambda texts: encoder.encode(texts, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True)
+
+
+def encode_missing(terms, model=EMBEDDING_MODEL, encode=None):
+    """Encode and store the terms the store of `model` does not have yet; returns how many were encoded.
+
+    `encode` maps a list of texts to vectors; by default the sentence-transformers
+    model is loaded, only when there is something to encode.
+    """
+    known = set(load_index(model)['terms'])
+    missing = list(dict.fromkeys(t for t in map(normalize_term, terms) if t not in known))
+    if missing:
+        encode = encode or sentence_encoder(model)
+    for start in range(0, len(missing), ENCODE_CHUNK):
+        chunk = missing[start:start + ENCODE_CHUNK]
+        add_vectors(chunk, encode([t.replace('_', ' ') for t in chunk]), model)
+    return len(missing)
+
+
+def embed(terms, model=EMBEDDING_MODEL, encode=None):
+    """Embeddings of `terms` (float32, one row each), encoding only the terms missing from the store."""
+    encode_missing(terms, model, encode)
+    vectors, _ = lookup(terms, model)
+    return vectors
+
+
+def read_terms(path):
+    if str(path).endswith('.csv'):
+        return pd.read_csv(path, usecols=['term'])['term'].dropna().tolist()
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('candidates', nargs='*', help="candidate term lists (text, one per line, or CSV with 'term')")
+    parser.add_argument('--model', default=EMBEDDING_MODEL)
+    args = parser.parse_args()
+    terms = load_seed_terms(columns=['Term'])['Term'].tolist() + load_esg_dict(columns=['term'])['term'].tolist()
+    for path in args.candidates:
+        terms += read_terms(path)
+    terms = list(dict.fromkeys(normalize_term(t) for t in terms))
+    encoded = encode_missing(terms, args.model)
+    stored = len(load_index(args.model)['terms'])
+    print(f"{len(terms):,} terms, {encoded:,} newly encoded; {stored:,} stored for {args.model}")
+
+
+if __name__ == "__main__":
+    main()
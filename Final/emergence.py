@@ -0,0 +1,97 @@
+"""Emergence rates of a whole PAD/ICR corpus from sparse project x term count matrices.
+
+Every PAD and ICR text is scanned once by the dictionary matcher
+(matcher.match_files: a process pool whose workers read the files, a bounded
+number at a time) into two sparse (projects x terms) count matrices. Emergence
+then needs no per-project loop (scoring.emergence_rates): for pillars and
+categories the terms new at completion are the sparse set difference of the
+presence matrices, ICR - ICR * PAD, and one product with the (terms x units)
+incidence gives the distinct and new completion terms of every unit of every
+project; for subcategories one product of the counts gives the hits behind
+df_app's signed change (ICR - PAD) / (ICR + PAD + 1). Column sums give the
+emergence of every dictionary term across the corpus. Projects without an ICR
+get NaN, as in batch_score.py.
+
+Writes the df_app *_emergence_rate columns per project and the term table:
+    python emergence.py texts/ [--output emergence.csv] [--terms term_emergence.csv] [--workers N]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from batch_score import find_documents
+from data import load_esg_dict
+from matcher import match_files
+from regression import MEASURES
+from scoring import emergence_rates, profile_units
+
+
+def count_matrices(directory, workers=None):
+    """Sparse (projects x terms) PAD and ICR term counts of the projects in `directory`.
+
+    Returns a dict with 'projectids', 'pad', 'icr' (all-zero rows for projects
+    without an ICR) and the 'has_icr' mask.
+    """
+    docs = find_documents(directory)
+    projectids = list(docs)
+    has_icr = np.array(['ICR' in docs[pid] for pid in projectids], dtype=bool)
+    paths = [docs[pid]['PAD'] for pid in projectids]
+    paths += [docs[pid]['ICR'] for pid in np.array(projectids, dtype=object)[has_icr]]
+    counts, _ = match_files(paths, workers)
+    pad = counts[:len(projectids)]
+    # ICR rows scattered back to their projects
+    n_icr = int(has_icr.sum())
+    place = sparse.csr_matrix((np.ones(n_icr, dtype=np.int64), (np.flatnonzero(has_icr), np.arange(n_icr))),
+                              shape=(len(projectids), n_icr))
+    icr = (place @ counts[len(projectids):]).tocsr()
+    return {'projectids': projectids, 'pad': pad, 'icr': icr, 'has_icr': has_icr}
+
+
+def project_emergence(counts):
+    """The df_app *_emergence_rate columns of every project; NaN without an ICR."""
+    rates = emergence_rates(counts['pad'], counts['icr'])
+    rates[~counts['has_icr']] = np.nan
+    frame = pd.DataFrame(rates, columns=[MEASURES['emergence'].format(u) for u in profile_units()])
+    frame.insert(0, 'projectid', counts['projectids'])
+    return frame
+
+
+def term_emergence(counts):
+    """Per dictionary term: projects whose ICR mentions it, how many of their PADs do not, and that share."""
+    icr = sparse.csr_matrix(counts['icr'][counts['has_icr']] > 0, dtype=np.int64)
+    pad = sparse.csr_matrix(counts['pad'][counts['has_icr']] > 0, dtype=np.int64)
+    icr_projects = np.asarray(icr.sum(axis=0)).ravel()
+    new_projects = icr_projects - np.asarray(icr.multiply(pad).sum(axis=0)).ravel()
+    terms = load_esg_dict(columns=['term', 'category_display', 'subcategory'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(icr_projects > 0, new_projects / icr_projects, np.nan)
+    out = pd.DataFrame({'term': terms['term'], 'category_display': terms['category_display'],
+                        'subcategory': terms['subcategory'], 'icr_projects': icr_projects,
+                        'new_projects': new_projects, 'emergence_rate': rate})
+    return out.sort_values(['icr_projects', 'term'], ascending=[False, True], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help="directory of <projectid>_PAD.txt / <projectid>_ICR.txt files")
+    parser.add_argument('--output', default="emergence.csv")
+    parser.add_argument('--terms', default="term_emergence.csv")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    start = time.perf_counter()
+    counts = count_matrices(args.directory, args.workers)
+    scanned = time.perf_counter()
+    projects, terms = project_emergence(counts), term_emergence(counts)
+    print(f"{len(projects)} projects ({counts['has_icr'].sum()} with an ICR): scanned in {scanned - start:.1f}s, "
+          f"{projects.shape[1] - 1} emergence columns and {len(terms):,} terms in {time.perf_counter() - scanned:.2f}s")
+    projects.to_csv(args.output, index=False)
+    terms.to_csv(args.terms, index=False)
+    print(f"-> {args.output}, {args.terms}")
+
+
+if __name__ == "__main__":
+    main()
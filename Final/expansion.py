@@ -0,0 +1,133 @@
+"""Dictionary expansion: candidate terms scored against the seed terms and subcategory centroids.
+
+Every candidate is compared with every seed term and every subcategory centroid
+(the normalized mean of its seeds) by cosine similarity. A subcategory scores
+the best of its centroid and its own seeds, and a candidate joins its
+best-scoring subcategory when that score, its subcat_sim, reaches
+SIMILARITY_THRESHOLD. Seeds score 1 against themselves.
+
+Similarities are blocked matrix products of unit vectors: candidates are read
+from the memory-mapped embedding store BLOCK_ROWS at a time, so memory is
+bounded by one block of vectors and its (block x seeds) scores however large the
+vocabulary is, and only the top k seeds and subcategories of each candidate are
+kept (argpartition).
+
+Embeddings come from the embedding store (embeddings.py), encoding only new terms:
+    python expansion.py candidates.csv [...] [--top-k 5] [--threshold 0.4] [--output expansion.csv]
+writes the expanded terms in the esg_dictionary_final_2407.csv layout, with the
+nearest seeds of each term.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from data import load_esg_dict, load_seed_terms
+from embeddings import encode_missing, lookup, normalize_term, open_store, read_terms
+
+SIMILARITY_THRESHOLD = 0.4
+TOP_K = 5
+BLOCK_ROWS = 4096
+
+
+def unit_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def top_k_rows(scores, k):
+    """Column indices and values of the k largest entries of every row, largest first."""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def match_candidates(read, n_rows, seed_vectors, subcategory_codes, k=TOP_K, block_rows=BLOCK_ROWS):
+    """Nearest seeds and subcategories of candidates [0, n_rows), read in blocks by `read(start, stop)`.
+
+    `subcategory_codes` (n_seeds,) are integer subcategory codes of the seeds.
+    Returns a dict of (n_rows, k) arrays: 'seeds' / 'seed_scores' and
+    'subcategories' / 'subcategory_scores', best first.
+    """
+    seeds = unit_rows(seed_vectors)
+    n_sub = subcategory_codes.max() + 1
+    centroids = np.zeros((n_sub, seeds.shape[1]), dtype=np.float32)
+    np.add.at(centroids, subcategory_codes, seeds)
+    keys = np.vstack([seeds, unit_rows(centroids)]).T
+    # key columns grouped by subcategory, so each group's best score is one reduceat
+    key_codes = np.concatenate([subcategory_codes, np.arange(n_sub)])
+    order = np.argsort(key_codes, kind='stable')
+    starts = np.searchsorted(key_codes[order], np.arange(n_sub))
+    blocks = []
+    for start in range(0, n_rows, block_rows):
+        scores = unit_rows(read(start, min(start + block_rows, n_rows))) @ keys
+        blocks.append((*top_k_rows(scores[:, :len(seeds)], k),
+                       *top_k_rows(np.maximum.reduceat(scores[:, order], starts, axis=1), k)))
+    names = ['seeds', 'seed_scores', 'subcategories', 'subcategory_scores']
+    return {name: np.concatenate(parts) for name, parts in zip(names, zip(*blocks))}
+
+
+def seed_table():
+    """Seed terms with their subcategory label, category code and pillar, in seed_final_314.csv order."""
+    seeds = load_seed_terms(columns=['Pillar', 'Category', 'Subcategory', 'Term'])
+    return pd.DataFrame({
+        'term': seeds['Term'].map(normalize_term),
+        'subcategory': seeds['Subcategory'].str.split(':', n=1).str[1].str.strip(),
+        'category_display': seeds['Category'].str.split(':').str[0].str.strip(),
+        'pillar': seeds['Pillar'],
+    }).drop_duplicates('term', ignore_index=True)
+
+
+def expand(candidates, k=TOP_K, threshold=SIMILARITY_THRESHOLD, encode=None, block_rows=BLOCK_ROWS):
+    """Seeds plus the candidates whose best subcategory reaches `threshold`, in the dictionary layout."""
+    seeds = seed_table()
+    seed_terms = set(seeds['term'])
+    candidates = [t for t in dict.fromkeys(map(normalize_term, candidates)) if t not in seed_terms]
+    terms = seeds['term'].tolist() + candidates
+    encode_missing(terms, encode=encode)
+    store = open_store()
+    labels = pd.Categorical(seeds['subcategory'])
+    seed_vectors, _ = lookup(seeds['term'].tolist(), store=store)
+    matches = match_candidates(lambda start, stop: lookup(terms[start:stop], store=store)[0], len(terms),
+                               seed_vectors, labels.codes.astype(np.int64), k, block_rows)
+    is_seed = np.arange(len(terms)) < len(seeds)
+    keep = np.flatnonzero(is_seed | (matches['subcategory_scores'][:, 0] >= threshold))
+    seed_names = seeds['term'].to_numpy(dtype=object)
+    out = pd.DataFrame({
+        'term': np.asarray(terms, dtype=object)[keep],
+        'subcategory': np.asarray(labels.categories)[matches['subcategories'][keep, 0]],
+        'subcat_sim': matches['subcategory_scores'][keep, 0],
+        'is_seed': is_seed[keep],
+        'nearest_seeds': ["; ".join(seed_names[row]) for row in matches['seeds'][keep]],
+    })
+    out.loc[out['is_seed'], 'subcategory'] = seeds['subcategory'].to_numpy()
+    out.loc[out['is_seed'], 'subcat_sim'] = 1.0
+    seed_info = seeds.groupby('subcategory').first()
+    out['category_display'] = out['subcategory'].map(seed_info['category_display'])
+    out['pillar'] = out['subcategory'].map(seed_info['pillar'])
+    codes = load_esg_dict(columns=['category', 'category_display']).drop_duplicates('category_display')
+    out['category'] = out['category_display'].map(codes.set_index('category_display')['category'])
+    columns = ['term', 'subcategory', 'subcat_sim', 'category', 'category_display', 'pillar', 'is_seed',
+               'nearest_seeds']
+    return out[columns].sort_values('term', ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('candidates', nargs='+', help="candidate term lists (text, one per line, or CSV with 'term')")
+    parser.add_argument('--top-k', type=int, default=TOP_K)
+    parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD)
+    parser.add_argument('--output', default="expansion.csv")
+    args = parser.parse_args()
+    candidates = [term for path in args.candidates for term in read_terms(path)]
+    expanded = expand(candidates, args.top_k, args.threshold)
+    expanded.to_csv(args.output, index=False)
+    print(f"{len(candidates):,} candidates -> {len(expanded):,} terms "
+          f"({(~expanded['is_seed']).sum():,} added) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""Plotly figure cache for the heavier views of the app.
+
+Every view is registered with the data files it is built from. A figure is keyed by
+the view name, a content hash of those files, a hash of the code that builds it
+(this module and the modules its builders compute with, CODE_MODULES) and the
+widget state that parameterizes it, so a cached figure is reused until the
+underlying data or the builder changes.
+
+- Static views (no widget state) are pre-rendered at build time with
+  ``python figures.py`` into ``figure_cache/<key>.json``.
+- Parameterized views are memoized in-process with LRU eviction.
+
+Callers get a copy of the cached figure, so update_layout() and the like on one
+page never change it for the next.
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from scipy.cluster.hierarchy import dendrogram as dendrogram_layout
+
+import aggregation
+import bootstrap
+import clustering
+import data
+import regression
+import trends
+from aggregation import category_summary, country_summary
+from bootstrap import bootstrap_intervals, bootstrap_sources
+from clustering import category_linkage, embedding_source, has_embeddings
+from regression import category_models, decomposition
+from trends import trend_fits
+from data import BASE, dataset_hash, load_df_app, load_viz_dict
+
+FIGURE_DIR = BASE / "figure_cache"
+MAX_MEMORY_FIGURES = 64
+# modules whose code shapes the figures, besides this one
+CODE_MODULES = [aggregation, bootstrap, clustering, data, regression, trends]
+
+CATEGORY_NAMES = {
+    'ESS3_P': 'E1: Pollution Prevention and Management',
+    'ESS3_R': 'E2: Resource Efficiency',
+    'ESS6': 'E3: Biodiversity Conservation',
+    'ESS2': 'S1: Labor and Working Conditions',
+    'ESS4': 'S2: Community Health and Safety',
+    'ESS5': 'S3: Land Acquisition and Involuntary Resettlement',
+    'ESS7': 'S4: Indigenous Peoples',
+    'ESS8': 'S5: Cultural Heritage',
+    'DIM1': 'G1: Legal Framework and Institutional Capacity',
+    'DIM2_3': 'G2: Financial and Economic',
+    'DIM6': 'G3: Procurement and Contract Management',
+    'DIM7': 'G4: Operations and Performance',
+    'DIM8_9': 'G5: Transparency and Integrity'
+}
+CAT_ORDER = ['E1', 'E2', 'E3', 'S1', 'S2', 'S3', 'S4', 'S5', 'G1', 'G2', 'G3', 'G4', 'G5']
+CAT_LABELS = {
+    'E1': 'Pollution', 'E2': 'Resource Efficiency', 'E3': 'Biodiversity',
+    'S1': 'Workers & Labor', 'S2': 'Community Health', 'S3': 'Land & Resettlement', 'S4': 'Indigenous Peoples', 'S5': 'Cultural Heritage',
+    'G1': 'Institutional', 'G2': 'Financial & Economic', 'G3': 'Procurement', 'G4': 'Operations', 'G5': 'Transparency'
+}
+PILLAR_NAMES = {'E': 'Environmental', 'S': 'Social', 'G': 'Governance'}
+PILLAR_COLORS = {'E': '#81C784', 'S': '#64B5F6', 'G': '#FFB74D'}
+SECTORS_DATA = ['Transport', 'Water', 'Energy']  # Actual values in data
+SECTORS_DISPLAY = ['Transportation', 'Water', 'Energy']  # For display
+# df_app grouping column -> axis label for the category heatmaps
+HEATMAP_GROUPS = {
+    'sector_group': 'Sector',
+    'regionname': 'Region',
+    'env_cat': 'Environmental Category',
+    'era': 'Approval Era',
+}
+
+VIEWS = {}
+# every (view, params) pair that `python figures.py` pre-renders
+STATIC_VIEWS = []
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+
+
+def view(name, sources, static_params=()):
+    """Register a figure builder under `name`, built from the given data files."""
+    def register(builder):
+        VIEWS[name] = (builder, tuple(sources))
+        STATIC_VIEWS.extend((name, params) for params in static_params)
+        return builder
+    return register
+
+
+@lru_cache(maxsize=1)
+def code_hash():
+    """Content hash of this module and CODE_MODULES, read once per process."""
+    digest = hashlib.sha256()
+    for module in [sys.modules[__name__], *CODE_MODULES]:
+        digest.update(Path(module.__file__).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def figure_key(name, params):
+    _, sources = VIEWS[name]
+    payload = json.dumps({'data': dataset_hash(*sources), 'code': code_hash(), 'params': params},
+                         sort_keys=True, default=str)
+    return f"{name}-{hashlib.sha256(payload.encode()).hexdigest()[:16]}"
+
+
+def cached_figure(name, **params):
+    """A copy of the figure for view `name` and widget state `params`, building it only on a miss."""
+    key = figure_key(name, params)
+    with _lock:
+        fig = _memory.get(key)
+        if fig is not None:
+            _memory.move_to_end(key)
+            return go.Figure(fig)
+    path = FIGURE_DIR / f"{key}.json"
+    if path.exists():
+        fig = pio.from_json(path.read_text(), skip_invalid=True)
+    else:
+        builder, _ = VIEWS[name]
+        fig = builder(**params)
+    with _lock:
+        _memory[key] = fig
+        while len(_memory) > MAX_MEMORY_FIGURES:
+            _memory.popitem(last=False)
+    return go.Figure(fig)
+
+
+@view('country_maps', sources=["fin_project_metadata_280.csv"], static_params=[{}])
+def country_maps():
+    country_stats = country_summary()
+
+    # Create side-by-side choropleth maps
+    fig_maps = make_subplots(
+        rows=1, cols=2,
+        subplot_titles=('Number of Projects per Country', 'Average Project Cost per Country'),
+        specs=[[{'type': 'choropleth'}, {'type': 'choropleth'}]],
+        horizontal_spacing=0.01
+    )
+
+    fig_maps.add_trace(
+        go.Choropleth(
+            locations=country_stats['countryname'],
+            locationmode='country names',
+            z=country_stats['total_projects'],
+            customdata=country_stats[['total_projects', 'main_sectors']],
+            hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Main Sectors: %{customdata[1]}<extra></extra>',
+            colorscale='Pinkyl',
+            colorbar=dict(x=0.4, y=0.8, len=0.5, title='Projects'),
+            showscale=True
+        ),
+        row=1, col=1
+    )
+
+    fig_maps.add_trace(
+        go.Choropleth(
+            locations=country_stats['countryname'],
+            locationmode='country names',
+            z=country_stats['avg_cost'],
+            customdata=country_stats[['total_projects', 'avg_cost', 'main_sectors']],
+            hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Avg Cost: $%{customdata[1]:.2f}M<br>Main Sectors: %{customdata[2]}<extra></extra>',
+            colorscale='Pinkyl',
+            colorbar=dict(x=0.95, y=0.8, len=0.5, title='Avg Cost (M USD)'),
+            showscale=True
+        ),
+        row=1, col=2
+    )
+
+    fig_maps.update_geos(
+        projection_type='natural earth',
+        showland=True,
+        landcolor='rgb(243, 243, 243)',
+        coastlinecolor='rgb(204, 204, 204)',
+        showcountries=True,
+        countrycolor='rgb(204, 204, 204)'
+    )
+
+    fig_maps.update_layout(
+        height=500,
+        font=dict(family='Arial'),
+        showlegend=False
+    )
+    return fig_maps
+
+
+@view('category_heatmap', sources=["df_app_streamlit.csv"],
+      static_params=[{'kind': kind, 'group': group}
+                     for group in HEATMAP_GROUPS for kind in ('appraisal', 'completion', 'emergence')])
+def category_heatmap(kind, group):
+    """Category x `group` heatmap of appraisal coverage, completion frequency or emergence rate."""
+    matrix = category_summary(group, tuple(CAT_ORDER))[kind]
+    if group == 'sector_group':
+        matrix = matrix[SECTORS_DATA]  # Use data values for column order
+        x = SECTORS_DISPLAY  # Use display values for x-axis
+    else:
+        x = [str(c) for c in matrix.columns]
+    z = matrix.to_numpy().tolist()
+    group_label = HEATMAP_GROUPS[group]
+    if kind == 'emergence':
+        colorscale, colorbar_title = 'RdYlGn_r', 'Emergence Rate'
+        hovertemplate = f'Category: %{{y}}<br>{group_label}: %{{x}}<br>Emergence: %{{z:.2f}}<extra></extra>'
+    else:
+        colorscale, colorbar_title = 'YlGn', 'Frequency (%)'
+        hovertemplate = f'Category: %{{y}}<br>{group_label}: %{{x}}<br>Frequency: %{{z:.2f}}%<extra></extra>'
+    fig = go.Figure(data=go.Heatmap(
+        z=z,
+        x=x,
+        y=[CAT_LABELS[c] for c in CAT_ORDER],
+        text=[[f"{v:.2f}" for v in row] for row in z],
+        texttemplate="%{text}",
+        textfont=dict(size=12),
+        colorscale=colorscale,
+        colorbar=dict(title=dict(text=colorbar_title, font=dict(size=12))),
+        hovertemplate=hovertemplate
+    ))
+    fig.update_layout(
+        xaxis=dict(title=group_label, tickfont=dict(size=12), title_font=dict(size=14)),
+        yaxis=dict(title='ESG Category', tickfont=dict(size=11), title_font=dict(size=14), autorange='reversed'),
+        margin=dict(t=30, b=20, l=20, r=20),
+        height=500
+    )
+    return fig
+
+
+@view('cluster_scatter', sources=["esg_dictionary_viz.csv"])
+def cluster_scatter(pillar, categories):
+    """2D term map with the selected categories of `pillar` colored by subcategory."""
+    viz_df = load_viz_dict(columns=['term', 'subcategory', 'category', 'pillar', 'x', 'y'])
+    fig = go.Figure()
+    other_df = viz_df[viz_df['pillar'] != pillar]
+    fig.add_trace(go.Scatter(
+        x=other_df['x'], y=other_df['y'],
+        mode='markers',
+        marker=dict(size=6, color='lightgray', opacity=0.3),
+        name='Other pillars',
+        hoverinfo='skip'
+    ))
+    all_colors = px.colors.qualitative.Set2 + px.colors.qualitative.Set3 + px.colors.qualitative.Pastel1
+    color_idx = 0
+    for cat in categories:
+        cat_df = viz_df[viz_df['category'] == cat]
+        cat_display = CATEGORY_NAMES.get(cat, cat)
+        subcategories = cat_df['subcategory'].unique()
+        for subcat in subcategories:
+            subcat_df = cat_df[cat_df['subcategory'] == subcat]
+            fig.add_trace(go.Scatter(
+                x=subcat_df['x'], y=subcat_df['y'],
+                mode='markers',
+                marker=dict(size=8, color=all_colors[color_idx % len(all_colors)], opacity=0.7),
+                name=subcat,
+                legendgroup=cat,
+                legendgrouptitle_text=cat_display,
+                text=subcat_df['term'],
+                hovertemplate='<b>%{text}</b><br>' + subcat + '<extra></extra>'
+            ))
+            color_idx += 1
+    fig.update_layout(
+        height=600,
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=True, linecolor='black', title='Dimension 1'),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, showline=True, linecolor='black', title='Dimension 2'),
+        legend=dict(orientation='v', yanchor='top', y=1, xanchor='left', x=1.02, title='Categories', tracegroupgap=10),
+        margin=dict(l=20, r=20, t=20, b=20),
+        plot_bgcolor='white'
+    )
+    return fig
+
+
+@view('dendrogram', sources=["seed_final_314.csv"] + ([embedding_source()] if has_embeddings() else []))
+def dendrogram(category, max_leaves):
+    """Horizontal Ward dendrogram of a category's seed terms, cut to at most `max_leaves` leaves."""
+    terms, Z, vectors = category_linkage(category)
+    n = len(terms)
+    members = {i: [i] for i in range(n)}
+    for i, (a, b, _, _) in enumerate(Z):
+        members[n + i] = members[int(a)] + members[int(b)]
+
+    def leaf_label(node):
+        if node < n:
+            return terms[node]
+        # a truncated subtree is labelled by the term nearest its centroid
+        idx = members[node]
+        centroid = vectors[idx].mean(axis=0)
+        rep = idx[int(np.argmin(((vectors[idx] - centroid) ** 2).sum(axis=1)))]
+        return f"{terms[rep]} (+{len(idx) - 1})"
+
+    truncate = {'truncate_mode': 'lastp', 'p': max_leaves} if max_leaves < n else {}
+    layout = dendrogram_layout(Z, no_plot=True, orientation='left', leaf_label_func=leaf_label, **truncate)
+
+    # matplotlib's C0..C9 cycle, which scipy uses to color clusters below the threshold
+    palette = px.colors.qualitative.D3
+    fig = go.Figure()
+    for color in dict.fromkeys(layout['color_list']):
+        xs, ys = [], []
+        for icoord, dcoord, c in zip(layout['icoord'], layout['dcoord'], layout['color_list']):
+            if c == color:
+                xs += dcoord + [None]
+                ys += icoord + [None]
+        fig.add_trace(go.Scatter(
+            x=xs, y=ys, mode='lines', hoverinfo='skip',
+            line=dict(color=palette[int(color[1:]) % len(palette)], width=1.5)
+        ))
+    leaf_y = [5 + 10 * i for i in range(len(layout['ivl']))]
+    leaf_terms = ['<br>'.join(terms[i] for i in members[node]) for node in layout['leaves']]
+    fig.add_trace(go.Scatter(
+        x=[0] * len(leaf_y), y=leaf_y, mode='markers',
+        marker=dict(size=6, color='rgba(0,0,0,0)'),
+        text=leaf_terms, hovertemplate='%{text}<extra></extra>'
+    ))
+    fig.update_layout(
+        height=120 + 22 * len(leaf_y),
+        showlegend=False,
+        xaxis=dict(title='Distance', autorange='reversed', showgrid=True, gridcolor='lightgray', griddash='dash', zeroline=False),
+        yaxis=dict(tickvals=leaf_y, ticktext=layout['ivl'], side='right', showgrid=False, zeroline=False,
+                   range=[0, 10 * len(leaf_y)]),
+        margin=dict(l=20, r=20, t=20, b=20),
+        plot_bgcolor='white'
+    )
+    return fig
+
+
+@view('coefficient_plot', sources=["df_app_streamlit.csv", *bootstrap_sources()],
+      static_params=[{'outcome': outcome, 'measure': measure}
+                     for outcome in ('cancellation', 'delay') for measure in ('coverage', 'emergence')])
+def coefficient_plot(outcome, measure):
+    """Per-category effect of coverage or emergence on an outcome, with 95% confidence intervals.
+
+    Intervals are BCa bootstrap intervals when `python bootstrap.py` has been run, Wald intervals otherwise.
+    """
+    results = category_models()
+    df = results[(results['outcome'] == outcome) & (results['measure'] == measure)]
+    df = df.set_index('category').loc[CAT_ORDER]
+    boot = bootstrap_intervals()
+    if boot is not None:
+        boot = boot[(boot['outcome'] == outcome) & (boot['measure'] == measure)].set_index('category')
+        df = df.assign(effect_lower=boot['bca_lower'], effect_upper=boot['bca_upper'])
+    labels = [f"{c}: {CAT_LABELS[c]}" for c in df.index]
+    if outcome == 'cancellation':
+        sig_color, unit = '#EF553B', 'OR: %{x:.2f}'
+    else:
+        sig_color, unit = '#636EFA', 'Effect: %{x:.1f} months'
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df['effect'],
+        y=labels,
+        mode='markers',
+        marker=dict(size=12, color=[sig_color if sig else '#888888' for sig in df['significant']]),
+        error_x=dict(
+            type='data',
+            symmetric=False,
+            array=df['effect_upper'] - df['effect'],
+            arrayminus=df['effect'] - df['effect_lower'],
+            color='gray'
+        ),
+        customdata=df[['p', 'effect_lower', 'effect_upper']],
+        hovertemplate='<b>%{y}</b><br>' + unit + '<br>95% CI: %{customdata[1]:.2f} to %{customdata[2]:.2f}'
+                      '<br>p = %{customdata[0]:.3f}<extra></extra>'
+    ))
+    if outcome == 'cancellation':
+        fig.add_vline(x=1, line_dash="dash", line_color="black", annotation_text="OR=1")
+        xaxis = dict(title='Odds Ratio (log scale)', type='log', tickfont=dict(size=12), title_font=dict(size=14))
+    else:
+        fig.add_vline(x=0, line_dash="dash", line_color="black", annotation_text="No effect")
+        xaxis = dict(title='Effect on Delay (months)', tickfont=dict(size=12), title_font=dict(size=14))
+    fig.update_layout(
+        xaxis=xaxis,
+        yaxis=dict(tickfont=dict(size=11), autorange='reversed'),
+        margin=dict(t=30, b=20, l=20, r=20),
+        height=450
+    )
+    return fig
+
+
+@view('subcategory_plot', sources=["df_app_streamlit.csv", "seed_final_314.csv"])
+def subcategory_plot(category, measure, outcome):
+    """Effect of each subcategory of a significant category-level result, significant bars highlighted."""
+    df = decomposition()
+    df = df[(df['category'] == category) & (df['measure'] == measure) & (df['outcome'] == outcome)]
+    labels = [f"{code}: {label}" for code, label in zip(df['subcategory'], df['label'])]
+    if outcome == 'cancellation':
+        color = '#C62828' if measure == 'coverage' else '#FF6F00'
+        text = [f"OR={v:.3f}<br>p={p:.4f}" for v, p in zip(df['effect'], df['p'])]
+        baseline, yaxis_title = 1, 'Odds Ratio'
+    elif outcome == 'delay':
+        color = '#1565C0'
+        text = [f"{v:.0f}mo<br>p={p:.3f}" for v, p in zip(df['effect'], df['p'])]
+        baseline, yaxis_title = 0, 'Effect on Delay (months)'
+    else:
+        color = '#1565C0'
+        text = [f"{v:+.1f}%<br>p={p:.3f}" for v, p in zip(df['effect'], df['p'])]
+        baseline, yaxis_title = 0, 'Effect on Cost Change (%)'
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=labels,
+        y=df['effect'],
+        marker_color=[color if sig else '#CCCCCC' for sig in df['significant']],
+        text=text,
+        textposition='outside',
+        textfont=dict(size=11),
+        cliponaxis=False
+    ))
+    fig.add_hline(y=baseline, line_dash="dash", line_color="black")
+    fig.update_layout(
+        yaxis_title=yaxis_title,
+        yaxis=dict(tickfont=dict(size=12), title_font=dict(size=14)),
+        xaxis=dict(tickfont=dict(size=11)),
+        margin=dict(t=30, b=20, l=20, r=20),
+        height=300
+    )
+    return fig
+
+
+@view('coverage_emergence', sources=["df_app_streamlit.csv"])
+def coverage_emergence(unit):
+    """Projects' coverage vs emergence for a pillar or category, with its precomputed trend lines."""
+    df_app = load_df_app(columns=['projectid', f'app_{unit}_pct', f'{unit}_emergence_rate'])
+    fits, curves = trend_fits()
+    fit = fits.set_index('unit').loc[unit]
+    curve = curves[curves['unit'] == unit]
+    name = PILLAR_NAMES[unit] if unit in PILLAR_NAMES else f"{unit}: {CAT_LABELS[unit]}"
+    x_line = np.array([fit['x_min'], fit['x_max']])
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_app[f'app_{unit}_pct'],
+        y=df_app[f'{unit}_emergence_rate'],
+        mode='markers',
+        marker=dict(size=8, color=PILLAR_COLORS[unit[0]], opacity=0.6),
+        text=df_app['projectid'],
+        hovertemplate='<b>%{text}</b><br>Coverage: %{x:.1f}%<br>Emergence: %{y:.2f}<extra></extra>',
+        name='Projects'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_line, y=fit['ols_intercept'] + fit['ols_slope'] * x_line,
+        mode='lines', line=dict(color='red', dash='dash'), name='OLS'
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_line, y=fit['theil_sen_intercept'] + fit['theil_sen_slope'] * x_line,
+        mode='lines', line=dict(color='black', dash='dot'), name='Theil-Sen'
+    ))
+    fig.add_trace(go.Scatter(
+        x=curve['coverage'], y=curve['emergence'],
+        mode='lines', line=dict(color='#6A1B9A', width=2), name='LOWESS'
+    ))
+    fig.update_layout(
+        xaxis_title=f'{name} Coverage (%)',
+        yaxis_title=f'{name} Emergence Rate',
+        xaxis=dict(tickfont=dict(size=14), title_font=dict(size=16)),
+        yaxis=dict(tickfont=dict(size=14), title_font=dict(size=16)),
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        margin=dict(t=30, b=20, l=20, r=20),
+        height=400
+    )
+    return fig
+
+
+def build_static_figures():
+    """Pre-render every static view into FIGURE_DIR, dropping entries for stale data."""
+    FIGURE_DIR.mkdir(exist_ok=True)
+    keep = set()
+    for name, params in STATIC_VIEWS:
+        key = figure_key(name, params)
+        builder, _ = VIEWS[name]
+        (FIGURE_DIR / f"{key}.json").write_text(pio.to_json(builder(**params), validate=False))
+        keep.add(f"{key}.json")
+        print(f"built {key}")
+    for path in FIGURE_DIR.glob("*.json"):
+        if path.name not in keep:
+            path.unlink()
+
+
+if __name__ == "__main__":
+    build_static_figures()
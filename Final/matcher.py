@@ -0,0 +1,162 @@
+"""Single-pass dictionary matcher behind the coverage and emergence features.
+
+The 2,407 dictionary terms are compiled once into a trie over token IDs: every
+word of every term gets an integer ID, and each trie state maps token IDs to its
+children. Scanning a document walks the trie from each position and takes the
+longest term that starts there, so a document costs one pass over its tokens with
+at most as many steps per position as the longest term has words (five),
+however large the dictionary is.
+Tokens already joined by the preprocessing ('water_supply') are one-step terms.
+
+Term hits are counted per term; a (terms x units) incidence matrix turns them into
+pillar, category and subcategory counts. match_documents() scans many texts in
+a process pool; match_files() scans text files, which the workers read
+themselves, so only a bounded number of texts is in memory at a time.
+"""
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from data import load_esg_dict
+
+# already-joined n-grams ('water_supply') stay one token
+TOKEN = re.compile(r'[a-z]+(?:_[a-z]+)*')
+CHUNK_SIZE = 16
+# chunks per worker queued by match_files; bounds the texts in memory
+IN_FLIGHT = 2
+
+
+def tokenize(text):
+    return TOKEN.findall(text.lower())
+
+
+def compile_dictionary(terms, categories, subcategories):
+    """Compile terms ('water_supply') with their category ('E2') and subcategory label into a matcher.
+
+    Units are the pillars, categories and (category, subcategory) pairs, in order
+    of first appearance.
+    """
+    vocab, children, terminal = {}, [{}], [-1]
+
+    def token_id(word):
+        return vocab.setdefault(word, len(vocab))
+
+    def add_path(ids, term_index):
+        state = 0
+        for i in ids:
+            nxt = children[state].get(i)
+            if nxt is None:
+                nxt = len(children)
+                children[state][i] = nxt
+                children.append({})
+                terminal.append(-1)
+            state = nxt
+        terminal[state] = term_index
+
+    for index, term in enumerate(terms):
+        add_path([token_id(word) for word in term.split('_')], index)
+        if '_' in term:
+            add_path([token_id(term)], index)
+
+    units, rows, cols = {}, [], []
+    for index, (category, subcategory) in enumerate(zip(categories, subcategories)):
+        for unit in (category[0], category, (category, subcategory)):
+            rows.append(index)
+            cols.append(units.setdefault(unit, len(units)))
+    incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(len(terms), len(units)))
+    return {'terms': list(terms), 'vocab': vocab, 'children': children, 'terminal': terminal,
+            'units': list(units), 'incidence': incidence}
+
+
+@lru_cache(maxsize=1)
+def dictionary_matcher():
+    """The compiled matcher for esg_dictionary_final_2407.csv, built once per process."""
+    terms = load_esg_dict(columns=['term', 'category_display', 'subcategory'])
+    return compile_dictionary(terms['term'].tolist(), terms['category_display'].tolist(),
+                              terms['subcategory'].tolist())
+
+
+def match_tokens(matcher, tokens):
+    """Term hit counts (n_terms,) and the token count after joining matched n-grams."""
+    vocab, children, terminal = matcher['vocab'], matcher['children'], matcher['terminal']
+    ids = [vocab.get(t, -1) for t in tokens]
+    root = children[0]
+    hits, n_tokens, i, n = [], 0, 0, len(ids)
+    while i < n:
+        state = root.get(ids[i])
+        end = i + 1
+        if state is not None:
+            best, j = terminal[state], i + 1
+            while j < n and (state := children[state].get(ids[j])) is not None:
+                j += 1
+                if terminal[state] >= 0:
+                    best, end = terminal[state], j
+            if best >= 0:
+                hits.append(best)
+        n_tokens += 1
+        i = end
+    return np.bincount(hits, minlength=len(matcher['terms'])), n_tokens
+
+
+def match_text(text, matcher=None):
+    return match_tokens(matcher or dictionary_matcher(), tokenize(text))
+
+
+def unit_counts(matcher, term_counts):
+    """Pillar, category and subcategory hits from term counts (n_terms,) or (docs, n_terms)."""
+    return term_counts @ matcher['incidence']
+
+
+def _match_chunk(texts):
+    matcher = dictionary_matcher()
+    counts, lengths = zip(*(match_text(text, matcher) for text in texts))
+    return sparse.csr_matrix(np.array(counts)), list(lengths)
+
+
+def match_documents(texts, workers=None):
+    """Term counts (docs x terms, sparse) and token counts for many texts, scanned in a process pool."""
+    texts = list(texts)
+    chunks = [texts[start:start + CHUNK_SIZE] for start in range(0, len(texts), CHUNK_SIZE)]
+    if not chunks:
+        return sparse.csr_matrix((0, len(dictionary_matcher()['terms'])), dtype=np.int64), []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=dictionary_matcher) as pool:
+        results = list(pool.map(_match_chunk, chunks))
+    return sparse.vstack([counts for counts, _ in results]).tocsr(), [n for _, lengths in results for n in lengths]
+
+
+def _match_files(paths):
+    return _match_chunk([Path(path).read_text(encoding='utf-8', errors='replace') for path in paths])
+
+
+def match_files(paths, workers=None):
+    """Term counts (files x terms, sparse) and token counts of UTF-8 text files, scanned in a process pool.
+
+    Workers read their own CHUNK_SIZE files and at most IN_FLIGHT chunks per
+    worker are pending, so the texts in memory are bounded however many files
+    there are.
+    """
+    paths = list(paths)
+    chunks = [paths[start:start + CHUNK_SIZE] for start in range(0, len(paths), CHUNK_SIZE)]
+    if not chunks:
+        return sparse.csr_matrix((0, len(dictionary_matcher()['terms'])), dtype=np.int64), []
+    workers = workers or os.cpu_count()
+    results, pending = [None] * len(chunks), iter(enumerate(chunks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=dictionary_matcher) as pool:
+        running = {}
+        while True:
+            while len(running) < workers * IN_FLIGHT:
+                index, chunk = next(pending, (None, None))
+                if chunk is None:
+                    break
+                running[pool.submit(_match_files, chunk)] = index
+            if not running:
+                break
+            complete, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in complete:
+                results[running.pop(future)] = future.result()
+    return sparse.vstack([counts for counts, _ in results]).tocsr(), [n for _, lengths in results for n in lengths]
@@ -0,0 +1,130 @@
+"""Permutation tests and multiple-comparison adjustment for the tab6 category models.
+
+Each outcome vector is shuffled N_PERMUTATIONS times, drawn as (permutations x
+projects) index matrices, and the 26 predictor statistics are recomputed for all
+permutations at once:
+
+- OLS outcomes use the predictor's t statistic. With each design's thin QR
+  factorization computed once, the fitted coefficients and residual sums of
+  squares of every permuted outcome are plain matrix products.
+- Cancellation uses the logistic score statistic, which only needs the
+  controls-only model refitted per permutation (one batched Newton solve).
+
+Permutation p-values over all 3 x 26 = 78 tests are then adjusted with Holm
+(family-wise error) and Benjamini-Hochberg (false discovery rate).
+
+    python permutation.py [--permutations 5000]
+prints the table; the app caches it per data hash.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from data import dataset_hash, load_df_app
+from regression import OUTCOMES, control_matrix, predictor_columns, solve_logit, stack_designs
+
+N_PERMUTATIONS = 5000
+CHUNK_SIZE = 1000
+SEED = 20240602
+
+
+def ols_t_stats(X, Y):
+    """t statistic of the first column of every design X (m, n, p) for every outcome row of Y (b, n) -> (b, m)."""
+    Q, R = np.linalg.qr(X)
+    # the predictor's coefficient is row 0 of R^-1 Q'y, so only that row of R^-1 is needed
+    row0 = np.linalg.inv(R)[:, 0, :]  # (m, p)
+    QtY = np.einsum('mnp,bn->bmp', Q, Y)
+    coef = np.einsum('mp,bmp->bm', row0, QtY)
+    rss = (Y ** 2).sum(axis=1)[:, None] - (QtY ** 2).sum(axis=2)
+    dof = X.shape[1] - X.shape[2]
+    se = np.sqrt(rss / dof * (row0 ** 2).sum(axis=1))
+    return coef / se
+
+
+def logit_score_stats(X0, Z, Y):
+    """Score statistic for adding each column of Z (n, m) to a logistic model on X0 (n, k), per outcome row of Y (b, n)."""
+    X = np.broadcast_to(X0, (Y.shape[0],) + X0.shape)
+    beta, _, _ = solve_logit(X, Y)
+    prob = 1 / (1 + np.exp(-beta @ X0.T))  # (b, n)
+    w = prob * (1 - prob)
+    score = (Y - prob) @ Z  # (b, m)
+    # information of z after projecting out the controls: z'Wz - z'WX0 (X0'WX0)^-1 X0'Wz
+    XtWX = np.einsum('ni,bn,nj->bij', X0, w, X0)
+    XtWZ = np.einsum('ni,bn,nm->bim', X0, w, Z)
+    ZtWZ = np.einsum('nm,bn,nm->bm', Z, w, Z)
+    info = ZtWZ - np.einsum('bim,bim->bm', XtWZ, np.linalg.solve(XtWX, XtWZ))
+    return score / np.sqrt(info)
+
+
+def _statistics(X0, Z, X, family, Y):
+    return logit_score_stats(X0, Z, Y) if family == 'logit' else ols_t_stats(X, Y)
+
+
+def holm(p):
+    """Holm step-down adjusted p-values."""
+    p = np.asarray(p, dtype=float)
+    order = np.argsort(p)
+    adjusted = np.maximum.accumulate((len(p) - np.arange(len(p))) * p[order])
+    out = np.empty_like(p)
+    out[order] = np.minimum(adjusted, 1)
+    return out
+
+
+def run_permutations(df, n_permutations=N_PERMUTATIONS):
+    """Observed statistic, permutation p and Holm/BH-adjusted p for every outcome x predictor."""
+    predictors = predictor_columns()
+    X0 = control_matrix(df)
+    Z = df[[col for _, _, col in predictors]].to_numpy(dtype=float)
+    X = stack_designs(X0, Z)
+    n = len(df)
+    rng = np.random.default_rng(SEED)
+    frames = []
+    for outcome, family in OUTCOMES.items():
+        y = df[outcome].to_numpy(dtype=float)
+        observed = _statistics(X0, Z, X, family, y[None, :])[0]
+        exceed = np.zeros(len(predictors))
+        for start in range(0, n_permutations, CHUNK_SIZE):
+            size = min(CHUNK_SIZE, n_permutations - start)
+            perms = rng.permuted(np.broadcast_to(np.arange(n), (size, n)), axis=1)
+            null = _statistics(X0, Z, X, family, y[perms])
+            exceed += (np.abs(null) >= np.abs(observed)).sum(axis=0)
+        frames.append(pd.DataFrame({
+            'outcome': outcome,
+            'category': [c for c, _, _ in predictors],
+            'measure': [m for _, m, _ in predictors],
+            'statistic': observed,
+            'p_perm': (exceed + 1) / (n_permutations + 1),
+        }))
+    results = pd.concat(frames, ignore_index=True)
+    results['p_holm'] = holm(results['p_perm'])
+    results['q_fdr'] = stats.false_discovery_control(results['p_perm'], method='bh')
+    return results
+
+
+@st.cache_data(show_spinner=False)
+def _permutation_tests(data_hash, n_permutations):
+    return run_permutations(load_df_app(), n_permutations)
+
+
+def permutation_tests(n_permutations=N_PERMUTATIONS):
+    """Permutation and adjusted p-values for all 78 category tests, recomputed whenever df_app changes."""
+    return _permutation_tests(dataset_hash("df_app_streamlit.csv"), n_permutations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--permutations', type=int, default=N_PERMUTATIONS)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    results = run_permutations(load_df_app(), args.permutations)
+    elapsed = time.perf_counter() - start
+    print(results.sort_values('p_perm').to_string(index=False, float_format='{:.4f}'.format))
+    print(f"{len(results)} tests x {args.permutations} permutations in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
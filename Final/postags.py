@@ -0,0 +1,166 @@
+"""POS-pattern n-gram candidates behind the tab3/tab5 "N-gram Extraction".
+
+Tagging is the slow step, so it runs once. ``parse`` tags every PAD/ICR text with
+spaCy's nlp.pipe in batches of BATCH_SIZE across worker processes, with every
+component except the tagger (and the attribute ruler that maps its tags to
+universal POS) excluded, and writes the result to pos_store/:
+
+- tokens.npy: lowercased token IDs (uint32) of all documents, concatenated
+- pos.npy: universal POS tag index (uint8) of every token
+- doc_starts.npy: first token of every document, plus the total
+- index.json: vocabulary, tag names, documents (projectid, PAD/ICR) and spaCy model
+
+Mining reads only these arrays. Each pattern of BIGRAM_PATTERNS and
+TRIGRAM_PATTERNS is a vectorized comparison of shifted tag arrays, so changing a
+pattern or a threshold re-mines the whole corpus without re-parsing:
+    python postags.py parse texts/ [--workers N]
+    python postags.py mine [--min-df 5] [--output ngram_candidates.csv]
+
+Needs spaCy and its SPACY_MODEL (requirements-cli.txt).
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from batch_score import find_documents
+from data import BASE
+from matcher import TOKEN
+
+STORE_DIR = BASE / "pos_store"
+STORE_VERSION = 1
+SPACY_MODEL = "en_core_web_sm"
+# POS tags need only the tagger and the attribute ruler
+EXCLUDED_COMPONENTS = ['parser', 'ner', 'lemmatizer', 'senter']
+BATCH_SIZE = 16
+# tagging without the parser is linear in length, so long PADs can skip spaCy's default 1M-character guard
+MAX_LENGTH = 5_000_000
+POS_TAGS = ['ADJ', 'ADP', 'ADV', 'AUX', 'CCONJ', 'DET', 'INTJ', 'NOUN', 'NUM', 'PART', 'PRON', 'PROPN', 'PUNCT',
+            'SCONJ', 'SYM', 'VERB', 'X', 'SPACE']
+BIGRAM_PATTERNS = [('ADJ', 'NOUN'), ('NOUN', 'NOUN')]
+TRIGRAM_PATTERNS = [('ADJ', 'ADJ', 'NOUN'), ('ADJ', 'NOUN', 'NOUN'), ('NOUN', 'NOUN', 'NOUN')]
+# percent of documents, as the tab5 "Doc Freq 5-100%"
+MIN_DOC_FREQ = 5.0
+
+
+def _texts(docs):
+    for projectid, paths in sorted(docs.items()):
+        for doc_type, path in sorted(paths.items()):
+            yield path.read_text(encoding='utf-8', errors='replace'), (projectid, doc_type)
+
+
+def parse_corpus(directory, workers=None):
+    """Tag every document in `directory` and write pos_store/."""
+    import spacy
+
+    nlp = spacy.load(SPACY_MODEL, exclude=EXCLUDED_COMPONENTS)
+    nlp.max_length = MAX_LENGTH
+    docs = find_documents(directory)
+    vocab, tag_index = {}, {tag: i for i, tag in enumerate(POS_TAGS)}
+    tokens, tags, starts, keys = [], [], [0], []
+    start = time.perf_counter()
+    parsed = nlp.pipe(_texts(docs), as_tuples=True, batch_size=BATCH_SIZE, n_process=workers or os.cpu_count())
+    for doc, key in parsed:
+        # whitespace tokens are PDF layout, not text
+        words = [t for t in doc if not t.is_space]
+        tokens.append(np.array([vocab.setdefault(t.lower_, len(vocab)) for t in words], dtype=np.uint32))
+        tags.append(np.array([tag_index.get(t.pos_, tag_index['X']) for t in words], dtype=np.uint8))
+        starts.append(starts[-1] + len(words))
+        keys.append(key)
+        if len(keys) % 50 == 0:
+            print(f"{len(keys)} documents, {starts[-1] / (time.perf_counter() - start):,.0f} tokens/s")
+    STORE_DIR.mkdir(exist_ok=True)
+    np.save(STORE_DIR / "tokens.npy", np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.uint32))
+    np.save(STORE_DIR / "pos.npy", np.concatenate(tags) if tags else np.zeros(0, dtype=np.uint8))
+    np.save(STORE_DIR / "doc_starts.npy", np.array(starts, dtype=np.int64))
+    index = {'version': STORE_VERSION, 'model': SPACY_MODEL, 'spacy': spacy.__version__,
+             'pos_tags': POS_TAGS, 'vocab': list(vocab), 'docs': keys}
+    (STORE_DIR / "index.json").write_text(json.dumps(index) + "\n")
+    print(f"{len(keys)} documents, {starts[-1]:,} tokens in {time.perf_counter() - start:.0f}s -> {STORE_DIR.name}/")
+
+
+def load_store():
+    """The parsed corpus: token IDs, POS indices, the document of every token, vocabulary, tags and documents."""
+    index = json.loads((STORE_DIR / "index.json").read_text())
+    starts = np.load(STORE_DIR / "doc_starts.npy")
+    return {
+        'tokens': np.load(STORE_DIR / "tokens.npy", mmap_mode='r'),
+        'pos': np.load(STORE_DIR / "pos.npy", mmap_mode='r'),
+        'doc_of': np.repeat(np.arange(len(starts) - 1), np.diff(starts)),
+        'vocab': index['vocab'], 'pos_tags': index['pos_tags'],
+        'docs': [tuple(key) for key in index['docs']],
+    }
+
+
+def ngram_counts(store, patterns):
+    """Every n-gram matching one of `patterns` (all of the same length): its words and a (docs x n-grams) count matrix.
+
+    N-grams never span two documents, and every word must be a TOKEN (letters,
+    optionally joined by underscores).
+    """
+    tokens, pos, doc_of = np.asarray(store['tokens']), np.asarray(store['pos']), store['doc_of']
+    n = len(patterns[0])
+    m = len(tokens) - n + 1
+    if m <= 0:
+        return [], sparse.csr_matrix((len(store['docs']), 0), dtype=np.int64)
+    word_ok = np.array([TOKEN.fullmatch(w) is not None for w in store['vocab']])
+    tag_id = {tag: i for i, tag in enumerate(store['pos_tags'])}
+    mask = np.zeros(m, dtype=bool)
+    for pattern in patterns:
+        match = np.ones(m, dtype=bool)
+        for k, tag in enumerate(pattern):
+            match &= pos[k:k + m] == tag_id[tag]
+        mask |= match
+    for k in range(n):
+        mask &= word_ok[tokens[k:k + m]]
+    mask &= doc_of[:m] == doc_of[n - 1:]
+    at = np.flatnonzero(mask)
+    grams, column = np.unique(np.stack([tokens[at + k] for k in range(n)], axis=1), axis=0, return_inverse=True)
+    counts = sparse.csr_matrix((np.ones(len(at), dtype=np.int64), (doc_of[at], column.ravel())),
+                               shape=(len(store['docs']), len(grams)))
+    words = [' '.join(store['vocab'][i] for i in gram) for gram in grams]
+    return words, counts
+
+
+def mine_ngrams(store, min_doc_freq=MIN_DOC_FREQ):
+    """Bigram and trigram candidates in at least `min_doc_freq` percent of documents, most frequent first."""
+    frames = []
+    for patterns in (BIGRAM_PATTERNS, TRIGRAM_PATTERNS):
+        words, counts = ngram_counts(store, patterns)
+        frames.append(pd.DataFrame({
+            'term': words, 'n': len(patterns[0]),
+            'count': np.asarray(counts.sum(axis=0)).ravel(),
+            'doc_freq_%': 100 * np.bincount(counts.indices, minlength=counts.shape[1]) / max(counts.shape[0], 1),
+        }))
+    candidates = pd.concat(frames, ignore_index=True)
+    candidates = candidates[candidates['doc_freq_%'] >= min_doc_freq]
+    return candidates.sort_values(['n', 'count'], ascending=[True, False], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    parse = commands.add_parser('parse', help="tag a directory of texts into pos_store/")
+    parse.add_argument('directory', help="directory of <projectid>_PAD.txt / <projectid>_ICR.txt files")
+    parse.add_argument('--workers', type=int, default=os.cpu_count())
+    mine = commands.add_parser('mine', help="mine POS-pattern n-grams from pos_store/")
+    mine.add_argument('--min-df', type=float, default=MIN_DOC_FREQ, help="minimum document frequency, percent")
+    mine.add_argument('--output', default="ngram_candidates.csv")
+    args = parser.parse_args()
+    if args.command == 'parse':
+        parse_corpus(args.directory, args.workers)
+    else:
+        start = time.perf_counter()
+        candidates = mine_ngrams(load_store(), args.min_df)
+        candidates.to_csv(args.output, index=False)
+        counts = candidates['n'].value_counts()
+        print(f"{counts.get(2, 0):,} bigrams, {counts.get(3, 0):,} trigrams in "
+              f"{time.perf_counter() - start:.1f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
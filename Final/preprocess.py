@@ -0,0 +1,388 @@
+"""Streaming preprocessing of extracted PAD/ICR texts (tab5 "Text Preprocessing").
+
+Every document flows through a chain of generator stages, one document at a time:
+
+    tokenize -> typo correction -> Americanize + n-gram join
+
+- Typo correction: tokens missing from the NLTK words corpus and PySpellChecker's
+  vocabulary are OCR/typo suspects and replaced by PySpellChecker's correction.
+  Each record keeps every document's share of unknown tokens, and documents above
+  UNKNOWN_LIMIT are flagged (``<column>_unknown_share`` / ``<column>_flagged``,
+  e.g. text_appraisal_flagged); the run reports how many. Every distinct
+  token is corrected once: corrections are kept in SPELL_CACHE (SQLite, shared by
+  all workers and runs, keyed by token and dictionary version) behind an in-memory
+  LRU of MAX_MEMORY_CORRECTIONS per worker.
+- Americanize: British -> American spellings from AMERICANIZE_FILE, a JSON object
+  of word pairs ({"labour": "labor", ...}) that is not shipped with the repo.
+  Without it spellings are left as they are, with a warning.
+- N-gram join: the preserved bigrams and trigrams in NGRAM_FILE (written by
+  ``python tfidf.py``) are joined with underscores, longest match first. Without
+  that file the dictionary's multi-word terms are used.
+
+Both tables are compiled into one token trie in which a British spelling and its
+American form share a token ID, so a single left-to-right pass Americanizes every
+token and joins the longest n-gram starting at it, however many entries there are.
+
+Projects are read lazily and sent to a worker pool in chunks, with a bounded
+number of chunks in flight, and finished records are written as they arrive, so
+memory stays flat however large the corpus is. Every stage counts the documents
+and tokens it handled and the time it spent; totals are reported as throughput.
+
+Input is a directory of ``<projectid>_PAD.txt`` / ``<projectid>_ICR.txt`` files;
+output is JSON lines with the text_data_sample.json columns, ready for
+``python textstore.py``:
+    python preprocess.py texts/ corpus.jsonl [--workers N]
+and the compiled pass is compared with one regex substitution per table entry by
+    python preprocess.py texts/ --benchmark
+
+Needs nltk (with the 'words' corpus) and pyspellchecker (requirements-cli.txt).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+import warnings
+from collections import Counter, OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from importlib.metadata import version
+from pathlib import Path
+
+import pandas as pd
+
+from batch_score import find_documents
+from data import BASE, load_esg_dict
+from matcher import tokenize
+
+AMERICANIZE_FILE = "british_spellings.json"
+NGRAM_FILE = "ngrams_preserved.csv"
+UNKNOWN_LIMIT = 0.15
+# shorter tokens are mostly abbreviations and unit symbols, not typos
+MIN_CORRECT_LENGTH = 4
+# OCR errors are single-character slips; distance 2 is ~250x slower per word
+SPELL_DISTANCE = 1
+SPELL_CACHE = BASE / "spell_cache.sqlite"
+MAX_MEMORY_CORRECTIONS = 50_000
+CHUNK_PROJECTS = 8
+IN_FLIGHT = 2
+DOC_TYPES = {'PAD': 'text_appraisal', 'ICR': 'text_completion'}
+STAGES = ['tokenize', 'typo', 'replace']
+
+# per-process resources, set once by the pool initializer
+_resources = {}
+_MISSING = object()
+
+
+def load_americanize(path=BASE / AMERICANIZE_FILE):
+    """British -> American word pairs; an empty mapping, with a warning, when AMERICANIZE_FILE is missing."""
+    if not Path(path).exists():
+        warnings.warn(f"{path} not found: British spellings will not be Americanized. Provide a JSON object "
+                      f"of British -> American word pairs to enable that stage.", stacklevel=2)
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_ngrams(path=BASE / NGRAM_FILE):
+    """Preserved n-grams as word tuples; the dictionary's multi-word terms when NGRAM_FILE is missing."""
+    if Path(path).exists():
+        return {tuple(term.split()) for term in pd.read_csv(path, usecols=['term'])['term'] if ' ' in term}
+    return {tuple(t.split('_')) for t in load_esg_dict(columns=['term'])['term'] if '_' in t}
+
+
+def load_spelling():
+    """(known words, PySpellChecker) for the typo stage."""
+    from nltk.corpus import words
+    from spellchecker import SpellChecker
+
+    checker = SpellChecker(distance=SPELL_DISTANCE)
+    return {w.lower() for w in words.words()}, checker
+
+
+def dictionary_version(checker):
+    """Short hash of everything a correction depends on: the spellchecker release, its dictionary and distance."""
+    frequency = checker.word_frequency
+    payload = json.dumps([version('pyspellchecker'), SPELL_DISTANCE, frequency.unique_words, frequency.total_words])
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def open_spell_cache(path=SPELL_CACHE):
+    db = sqlite3.connect(path, timeout=60)
+    # WAL lets every worker read while one of them writes
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE IF NOT EXISTS corrections "
+               "(version TEXT, token TEXT, correction TEXT, PRIMARY KEY (version, token))")
+    return db
+
+
+def correct(token, counts):
+    """PySpellChecker's correction of `token` (None if it has none), from memory, SPELL_CACHE or the checker."""
+    memory = _resources['corrections']
+    correction = memory.get(token, _MISSING)
+    if correction is not _MISSING:
+        memory.move_to_end(token)
+        counts['cache_memory'] += 1
+        return correction
+    row = _resources['db'].execute("SELECT correction FROM corrections WHERE version = ? AND token = ?",
+                                   (_resources['version'], token)).fetchone()
+    if row is not None:
+        correction = row[0]
+        counts['cache_disk'] += 1
+    else:
+        correction = _resources['checker'].correction(token)
+        _resources['new_corrections'].append((_resources['version'], token, correction))
+        counts['cache_miss'] += 1
+    memory[token] = correction
+    if len(memory) > MAX_MEMORY_CORRECTIONS:
+        memory.popitem(last=False)
+    return correction
+
+
+def flush_corrections():
+    """Write this worker's new corrections to SPELL_CACHE so other workers and later runs reuse them."""
+    new = _resources['new_corrections']
+    if new:
+        with _resources['db']:
+            _resources['db'].executemany("INSERT OR IGNORE INTO corrections VALUES (?, ?, ?)", new)
+        new.clear()
+
+
+def compile_replacements(americanize, ngrams):
+    """Compile British -> American word pairs and n-grams (word tuples) into one replacement trie.
+
+    Every word gets a token ID; a British spelling shares the ID of its American
+    form, and `words` maps IDs to the American output. Trie states map token IDs
+    to children, and `joined` holds the underscored phrase of states that end an
+    n-gram.
+    """
+    vocab, words = {}, []
+
+    def token_id(word):
+        word = americanize.get(word, word)
+        if word not in vocab:
+            vocab[word] = len(words)
+            words.append(word)
+        return vocab[word]
+
+    for british in americanize:
+        vocab[british] = token_id(british)
+    children, joined = [{}], [None]
+    for phrase in ngrams:
+        ids, state = [token_id(word) for word in phrase], 0
+        for i in ids:
+            nxt = children[state].get(i)
+            if nxt is None:
+                nxt = len(children)
+                children[state][i] = nxt
+                children.append({})
+                joined.append(None)
+            state = nxt
+        joined[state] = '_'.join(words[i] for i in ids)
+    return {'vocab': vocab, 'words': words, 'children': children, 'joined': joined}
+
+
+def replace_tokens(engine, tokens, counts):
+    """Americanize `tokens` and join the longest n-gram at every position, in one pass."""
+    vocab, words, children, joined = engine['vocab'], engine['words'], engine['children'], engine['joined']
+    ids = [vocab.get(t, -1) for t in tokens]
+    root = children[0]
+    out, i, n = [], 0, len(ids)
+    while i < n:
+        state, phrase, end = root.get(ids[i]), None, i + 1
+        if state is not None:
+            j = i + 1
+            while j < n and (state := children[state].get(ids[j])) is not None:
+                j += 1
+                if joined[state] is not None:
+                    phrase, end = joined[state], j
+        if phrase is not None:
+            out.append(phrase)
+            counts['joined'] += 1
+        elif ids[i] >= 0 and words[ids[i]] != tokens[i]:
+            out.append(words[ids[i]])
+            counts['replaced'] += 1
+        else:
+            out.append(tokens[i])
+        i = end
+    return out
+
+
+def sequential_replace(text, americanize, ngrams):
+    """The same replacements as one regex substitution per table entry, longest n-grams first (benchmark baseline)."""
+    for british, american in americanize.items():
+        text = re.sub(rf'\b{re.escape(british)}\b', american, text)
+    for phrase in sorted(ngrams, key=len, reverse=True):
+        text = re.sub(rf'\b{re.escape(" ".join(phrase))}\b', '_'.join(phrase), text)
+    return text
+
+
+def _init(americanize, engine):
+    _resources['engine'] = engine
+    known, _resources['checker'] = load_spelling()
+    # British spellings are left for the Americanize stage rather than "corrected"
+    _resources['known'] = known | set(americanize)
+    _resources['version'] = dictionary_version(_resources['checker'])
+    _resources['db'] = open_spell_cache()
+    _resources['corrections'] = OrderedDict()
+    _resources['new_corrections'] = []
+
+
+def correct_typos(doc, counts):
+    """Corrected tokens of `doc`; records its 'unknown_share' and whether it is 'flagged'."""
+    known, checker = _resources['known'], _resources['checker']
+    tokens = doc['tokens']
+    out, unknown = [], 0
+    for token in tokens:
+        if len(token) >= MIN_CORRECT_LENGTH and token not in known and not checker.known([token]):
+            unknown += 1
+            correction = correct(token, counts)
+            if correction and correction != token:
+                counts['corrected'] += 1
+                token = correction
+        out.append(token)
+    counts['unknown'] += unknown
+    doc['unknown_share'] = unknown / len(tokens) if tokens else 0.0
+    doc['flagged'] = doc['unknown_share'] > UNKNOWN_LIMIT
+    counts['flagged'] += doc['flagged']
+    return out
+
+
+def stage(name, step, docs, counters):
+    """Generator stage setting every document's tokens to step(doc, counts); counts docs, output tokens and seconds."""
+    counts = counters[name]
+    for doc in docs:
+        start = time.perf_counter()
+        doc['tokens'] = step(doc, counts)
+        counts['docs'] += 1
+        counts['tokens'] += len(doc['tokens'])
+        counts['seconds'] += time.perf_counter() - start
+        yield doc
+
+
+def pipeline(docs, counters):
+    """The preprocessing chain over a stream of {'text': ...} documents.
+
+    Yields them with cleaned 'tokens', their 'unknown_share' and whether they are 'flagged'.
+    """
+    docs = stage('tokenize', lambda doc, counts: tokenize(doc['text']), docs, counters)
+    docs = stage('typo', correct_typos, docs, counters)
+    return stage('replace', lambda doc, counts: replace_tokens(_resources['engine'], doc['tokens'], counts),
+                 docs, counters)
+
+
+def _read(project, paths):
+    for doc_type, path in paths.items():
+        yield {'projectid': project, 'doc_type': doc_type, 'text': path.read_text(encoding='utf-8', errors='replace')}
+
+
+def process_chunk(projects):
+    """Run the pipeline over a chunk of (projectid, {doc type: path}) and return records and stage counters."""
+    counters = {name: Counter() for name in STAGES}
+    records = {}
+    docs = (doc for project, paths in projects for doc in _read(project, paths))
+    for doc in pipeline(docs, counters):
+        record = records.setdefault(doc['projectid'], {'projectid': doc['projectid']})
+        column = DOC_TYPES[doc['doc_type']]
+        record[column] = doc['text']
+        record[column + '_ngram'] = ' '.join(doc['tokens'])
+        record[column + '_unknown_share'] = round(doc['unknown_share'], 4)
+        record[column + '_flagged'] = doc['flagged']
+    flush_corrections()
+    return list(records.values()), counters
+
+
+def run(directory, output, workers=None):
+    """Preprocess every project in `directory` into JSON lines at `output`; returns the stage counters."""
+    docs = find_documents(directory)
+    projects = iter(sorted(docs.items()))
+    totals = {name: Counter() for name in STAGES}
+    workers = workers or os.cpu_count()
+    americanize = load_americanize()
+    engine = compile_replacements(americanize, load_ngrams())
+    written = 0
+    with open(output, 'w', encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(americanize, engine)) as pool:
+        running = set()
+        while True:
+            while len(running) < workers * IN_FLIGHT:
+                chunk = [p for _, p in zip(range(CHUNK_PROJECTS), projects)]
+                if not chunk:
+                    break
+                running.add(pool.submit(process_chunk, chunk))
+            if not running:
+                break
+            complete, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in complete:
+                records, counters = future.result()
+                for record in records:
+                    out.write(json.dumps(record) + '\n')
+                for name in STAGES:
+                    totals[name].update(counters[name])
+                written += len(records)
+            print(f"{written}/{len(docs)} projects")
+    return totals
+
+
+def report(totals):
+    """One line per stage: documents, tokens, tokens/s and the stage's own counters."""
+    for name in STAGES:
+        counts = totals[name]
+        rate = counts['tokens'] / counts['seconds'] if counts['seconds'] else float('inf')
+        extra = ", ".join(f"{k} {v:,}" for k, v in counts.items() if k not in ('docs', 'tokens', 'seconds'))
+        print(f"{name:<12} {counts['docs']:>6,} docs {counts['tokens']:>12,} tokens {rate:>12,.0f} tokens/s"
+              + (f"  ({extra})" if extra else ""))
+    typo = totals['typo']
+    lookups = typo['cache_memory'] + typo['cache_disk'] + typo['cache_miss']
+    if lookups:
+        print(f"spell cache: {1 - typo['cache_miss'] / lookups:.1%} hit rate over {lookups:,} lookups "
+              f"({typo['cache_miss']:,} tokens corrected)")
+
+
+def benchmark_replacement(directory):
+    """Time the compiled pass against sequential regex substitution on every document and check they agree."""
+    americanize, ngrams = load_americanize(), load_ngrams()
+    start = time.perf_counter()
+    engine = compile_replacements(americanize, ngrams)
+    compile_seconds = time.perf_counter() - start
+    texts = [' '.join(tokenize(path.read_text(encoding='utf-8', errors='replace')))
+             for paths in find_documents(directory).values() for path in paths.values()]
+    counts, compiled_seconds, sequential_seconds, differ = Counter(), 0.0, 0.0, 0
+    for text in texts:
+        start = time.perf_counter()
+        compiled = ' '.join(replace_tokens(engine, text.split(), counts))
+        compiled_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        sequential = sequential_replace(text, americanize, ngrams)
+        sequential_seconds += time.perf_counter() - start
+        differ += compiled != sequential
+    n_tokens = sum(len(text.split()) for text in texts)
+    print(f"{len(texts)} documents, {n_tokens:,} tokens, {len(americanize):,} word pairs, {len(ngrams):,} n-grams")
+    print(f"sequential  {sequential_seconds:8.2f}s")
+    print(f"compiled    {compiled_seconds:8.2f}s (+{compile_seconds:.3f}s to compile), "
+          f"{sequential_seconds / compiled_seconds:.0f}x faster")
+    print(f"{differ} documents differ ({counts['replaced']:,} replaced, {counts['joined']:,} joined)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help="directory of <projectid>_PAD.txt / <projectid>_ICR.txt files")
+    parser.add_argument('output', nargs='?', help="JSON lines file to write")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--benchmark', action='store_true',
+                        help="compare the compiled replacement pass with sequential regex substitution")
+    args = parser.parse_args()
+    if args.benchmark:
+        benchmark_replacement(args.directory)
+        return
+    if args.output is None:
+        parser.error("output is required unless --benchmark is given")
+    start = time.perf_counter()
+    totals = run(args.directory, args.output, args.workers)
+    report(totals)
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""Outcome models behind the tab6 "Regression Analysis" view.
+
+Every ESG predictor (a coverage or emergence column of df_app) gets its own model
+for each outcome:
+
+    outcome ~ predictor + log(planned cost) + sector + era
+
+Cancellation is fitted by logistic regression (Newton-Raphson), delay (months)
+and cost change (%) by OLS. All predictors of an outcome share the control block
+of the design matrix, so their models are fitted together as one batch of
+stacked matrices rather than one at a time. Results are cached per data hash.
+
+Subcategory columns are discovered from df_app rather than listed by hand, and
+every significant category-level result is decomposed into its subcategories.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from data import dataset_hash, load_df_app, load_seed_terms
+
+CATEGORIES = ['E1', 'E2', 'E3', 'S1', 'S2', 'S3', 'S4', 'S5', 'G1', 'G2', 'G3', 'G4', 'G5']
+MEASURES = {'coverage': 'app_{}_pct', 'emergence': '{}_emergence_rate'}
+# outcome column -> model family
+OUTCOMES = {'cancellation': 'logit', 'delay': 'ols', 'cost_change_perc_num': 'ols'}
+# subcategory columns in df_app: app_{code}_{stem}_pct, e.g. app_S3a_Land_pct
+SUBCATEGORY_COLUMN = re.compile(r'app_(?P<code>(?P<category>[EGS]\d)[a-z])_(?P<stem>\w+)_pct')
+ALPHA = 0.05
+MAX_ITER = 50
+TOL = 1e-8
+
+
+def predictor_columns(categories=CATEGORIES):
+    """(category, measure, column) for every category x coverage/emergence predictor."""
+    return [(cat, measure, pattern.format(cat)) for cat in categories for measure, pattern in MEASURES.items()]
+
+
+def control_frame(df, drop_first=True):
+    """Intercept, log planned cost and sector/era dummies (first level dropped)."""
+    return pd.concat([
+        pd.Series(1.0, index=df.index, name='const'),
+        np.log(df['planned_cost_adj_both']).rename('log_cost'),
+        pd.get_dummies(df['sector_group'], prefix='sector', drop_first=drop_first, dtype=float),
+        pd.get_dummies(df['era'], prefix='era', drop_first=drop_first, dtype=float),
+    ], axis=1)
+
+
+def control_matrix(df):
+    return control_frame(df).to_numpy(dtype=float)
+
+
+def stack_designs(X0, Z):
+    # one design matrix per predictor: (m, n, 1 + k), predictor first
+    m, (n, k) = Z.shape[1], X0.shape
+    X = np.empty((m, n, k + 1))
+    X[:, :, 0] = Z.T
+    X[:, :, 1:] = X0
+    return X
+
+
+def solve_ols(X, Y):
+    """Batched OLS of Y (m, n) on X (m, n, p); returns coef and se, each (m, p), and the residual dof."""
+    XtX = np.einsum('mni,mnj->mij', X, X)
+    beta = np.linalg.solve(XtX, np.einsum('mni,mn->mi', X, Y)[..., None])[..., 0]
+    resid = Y - np.einsum('mni,mi->mn', X, beta)
+    dof = X.shape[1] - X.shape[2]
+    sigma2 = (resid ** 2).sum(axis=1) / dof
+    se = np.sqrt(sigma2[:, None] * np.diagonal(np.linalg.inv(XtX), axis1=1, axis2=2))
+    return beta, se, dof
+
+
+def solve_logit(X, Y):
+    """Batched logistic regression of Y (m, n) on X (m, n, p) by Newton steps.
+
+    Returns coef and se, each (m, p), and a convergence flag per model; models that
+    do not converge (e.g. under separation) get NaN coefficients.
+    """
+    beta = np.zeros((X.shape[0], X.shape[2]))
+    converged = np.zeros(X.shape[0], dtype=bool)
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(MAX_ITER):
+            prob = 1 / (1 + np.exp(-np.einsum('mni,mi->mn', X, beta)))
+            hessian = np.einsum('mni,mn,mnj->mij', X, prob * (1 - prob), X)
+            grad = np.einsum('mni,mn->mi', X, Y - prob)
+            try:
+                step = np.linalg.solve(hessian, grad[..., None])[..., 0]
+            except np.linalg.LinAlgError:
+                # one singular model (a degenerate resample) must not sink the whole batch
+                step = np.einsum('mij,mj->mi', np.linalg.pinv(hessian), grad)
+            # models that have converged stop moving; the rest keep iterating
+            step[converged] = 0
+            beta += step
+            converged |= np.abs(step).max(axis=1) < TOL
+            if converged.all():
+                break
+        prob = 1 / (1 + np.exp(-np.einsum('mni,mi->mn', X, beta)))
+        hessian = np.einsum('mni,mn,mnj->mij', X, prob * (1 - prob), X)
+        se = np.sqrt(np.diagonal(np.linalg.pinv(hessian), axis1=1, axis2=2))
+    beta[~converged] = np.nan
+    return beta, se, converged
+
+
+def _summary(coef, se, p, crit, converged):
+    return pd.DataFrame({
+        'coef': coef, 'se': se, 'p': p,
+        'lower': coef - crit * se, 'upper': coef + crit * se, 'converged': converged,
+    })
+
+
+def fit_ols_batch(X0, Z, y):
+    """OLS of y on [z_j, X0] for every column z_j of Z; returns predictor coef, se and t-test p."""
+    X = stack_designs(X0, Z)
+    beta, se, dof = solve_ols(X, np.broadcast_to(y, X.shape[:2]))
+    coef, se = beta[:, 0], se[:, 0]
+    return _summary(coef, se, 2 * stats.t.sf(np.abs(coef / se), dof), stats.t.ppf(1 - ALPHA / 2, dof), True)
+
+
+def fit_logit_batch(X0, Z, y):
+    """Logistic regression of y on [z_j, X0] for every column z_j of Z; Wald z-test p."""
+    X = stack_designs(X0, Z)
+    beta, se, converged = solve_logit(X, np.broadcast_to(y, X.shape[:2]))
+    coef, se = beta[:, 0], se[:, 0]
+    return _summary(coef, se, 2 * stats.norm.sf(np.abs(coef / se)), stats.norm.ppf(1 - ALPHA / 2), converged)
+
+
+def fit_models(df, predictors):
+    """Fit every outcome against every (category, measure, column) predictor.
+
+    Returns one row per outcome x predictor with the predictor's coefficient, its
+    standard error, p-value and confidence interval; for cancellation `effect`,
+    `effect_lower` and `effect_upper` are odds ratios, otherwise they equal the
+    coefficient and interval.
+    """
+    X0 = control_matrix(df)
+    Z = df[[col for _, _, col in predictors]].to_numpy(dtype=float)
+    keys = pd.DataFrame(predictors, columns=['category', 'measure', 'column'])
+    frames = []
+    for outcome, family in OUTCOMES.items():
+        y = df[outcome].to_numpy(dtype=float)
+        fit = fit_logit_batch(X0, Z, y) if family == 'logit' else fit_ols_batch(X0, Z, y)
+        transform = np.exp if family == 'logit' else (lambda v: v)
+        fit['effect'] = transform(fit['coef'])
+        fit['effect_lower'] = transform(fit['lower'])
+        fit['effect_upper'] = transform(fit['upper'])
+        frames.append(pd.concat([keys.assign(outcome=outcome), fit], axis=1))
+    results = pd.concat(frames, ignore_index=True)
+    results['significant'] = results['p'] < ALPHA
+    return results
+
+
+@st.cache_data(show_spinner=False)
+def _category_models(data_hash):
+    df = load_df_app()
+    return fit_models(df, predictor_columns())
+
+
+def category_models():
+    """All 3 outcomes x 13 categories x coverage/emergence, refitted whenever df_app changes."""
+    return _category_models(dataset_hash("df_app_streamlit.csv"))
+
+
+def discover_subcategories(columns, seed_terms):
+    """category -> subcategory code -> (column stem, label) for every subcategory with both measures in `columns`.
+
+    Labels come from the seed list's subcategory names ("S3_1: Land Acquisition &
+    Property Rights") of the same category, matched on the column stem ('Land').
+    """
+    names = {}
+    for name in seed_terms['Subcategory'].unique():
+        prefix, label = name.split(': ', 1)
+        names.setdefault(prefix.split('_')[0], []).append(label)
+    columns = set(columns)
+    found = {}
+    for col in sorted(columns):
+        match = SUBCATEGORY_COLUMN.fullmatch(col)
+        if not match:
+            continue
+        stem = f"{match['code']}_{match['stem']}"
+        if not all(pattern.format(stem) in columns for pattern in MEASURES.values()):
+            continue
+        label = next((l for l in names.get(match['category'], []) if l.lower().startswith(match['stem'].lower())),
+                     match['stem'])
+        found.setdefault(match['category'], {})[match['code']] = (stem, label)
+    return found
+
+
+def _subcategory_hash():
+    # subcategory labels come from the seed list, so it is part of the key
+    return dataset_hash("df_app_streamlit.csv", "seed_final_314.csv")
+
+
+@st.cache_data(show_spinner=False)
+def _subcategories(data_hash):
+    return discover_subcategories(load_df_app().columns, load_seed_terms(columns=['Subcategory']))
+
+
+def subcategories():
+    """Subcategories of every category that has subcategory columns in df_app."""
+    return _subcategories(_subcategory_hash())
+
+
+@st.cache_data(show_spinner=False)
+def _subcategory_models(data_hash):
+    predictors = [(code, measure, pattern.format(stem))
+                  for found in _subcategories(data_hash).values()
+                  for code, (stem, _) in found.items()
+                  for measure, pattern in MEASURES.items()]
+    return fit_models(load_df_app(), predictors)
+
+
+def subcategory_models():
+    """The same models for every discovered subcategory, fitted as one batch per outcome."""
+    return _subcategory_models(_subcategory_hash())
+
+
+def decompose(results, subresults, found, threshold=ALPHA):
+    """Subcategory fits behind every category-level result with p < `threshold`.
+
+    Returns one row per (significant parent result, subcategory) with the parent's
+    `parent_effect` and `parent_p`, the subcategory code and label, and the
+    subcategory's own fit; parents are ordered by p.
+    """
+    parents = results[(results['p'] < threshold) & results['category'].isin(list(found))]
+    parents = parents[['category', 'measure', 'outcome', 'effect', 'p']].rename(
+        columns={'effect': 'parent_effect', 'p': 'parent_p'})
+    parent_of = {code: cat for cat, codes in found.items() for code in codes}
+    labels = {code: label for codes in found.values() for code, (_, label) in codes.items()}
+    subs = subresults.rename(columns={'category': 'subcategory'})
+    subs = subs.assign(category=subs['subcategory'].map(parent_of), label=subs['subcategory'].map(labels))
+    table = parents.merge(subs.drop(columns='column'), on=['category', 'measure', 'outcome'])
+    return table.sort_values(['parent_p', 'subcategory'], ignore_index=True)
+
+
+@st.cache_data(show_spinner=False)
+def _decomposition(data_hash, threshold):
+    return decompose(category_models(), _subcategory_models(data_hash), _subcategories(data_hash), threshold)
+
+
+def decomposition(threshold=ALPHA):
+    """Subcategory breakdown of every significant category-level result, recomputed whenever the data changes."""
+    return _decomposition(_subcategory_hash(), threshold)
@@ -0,0 +1,210 @@
+"""Risk screening of a new project's appraisal document (PAD).
+
+A PAD's text is scanned by the dictionary matcher (matcher.py), which joins
+multi-word terms ('water supply' -> 'water_supply') and counts every match toward
+its pillar, category and subcategory. The counts as a share of all tokens
+give the same app_*_pct coverage profile as df_app_streamlit.csv; with the
+completion report (ICR) as well, emergence_profile() gives the *_emergence_rate
+columns (emergence_rates() for many projects at once, see emergence.py).
+
+The profile is scored with screening models fitted on df_app: for each outcome,
+the coverage predictors that are significant in the tab6 category models,
+together with the same controls (log planned cost, sector, era). Logistic for
+cancellation, OLS for delay (months). Emergence rates need the completion
+report, so they are not used for screening.
+
+The dictionary and the fitted models are loaded once per process:
+    python scoring.py pad.txt [--cost 1200] [--sector Water] [--year 2010]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import sparse
+
+from data import dataset_hash, load_df_app
+from matcher import dictionary_matcher, match_text
+from regression import (ALPHA, CATEGORIES, MEASURES, category_models, control_frame, solve_logit, solve_ols,
+                        subcategories)
+from trends import PILLARS
+
+SCREENING_OUTCOMES = {'cancellation': 'logit', 'delay': 'ols'}
+# project metadata sector labels -> df_app sector_group
+SECTOR_GROUPS = {'Transportation': 'Transport'}
+
+
+def profile_units():
+    """Pillars, categories and subcategory stems that have df_app columns, in df_app's order."""
+    return PILLARS + CATEGORIES + [stem for found in subcategories().values() for stem, _ in found.values()]
+
+
+def coverage_columns():
+    return [MEASURES['coverage'].format(unit) for unit in profile_units()]
+
+
+def profile_incidence():
+    """(terms x profile_units()) incidence: the dictionary terms counted toward each df_app unit.
+
+    Pillars and categories map to the matcher units of the same code,
+    subcategory stems to their (category, subcategory) unit.
+    """
+    matcher = dictionary_matcher()
+    position = {unit: i for i, unit in enumerate(matcher['units'])}
+    for category, found in subcategories().items():
+        for stem, label in found.values():
+            position[stem] = position.get((category, label))
+    pairs = [(position[unit], j) for j, unit in enumerate(profile_units()) if position.get(unit) is not None]
+    rows, cols = zip(*pairs) if pairs else ((), ())
+    select = sparse.csr_matrix((np.ones(len(pairs), dtype=np.int64), (rows, cols)),
+                               shape=(len(matcher['units']), len(profile_units())))
+    return (matcher['incidence'] @ select).tocsr()
+
+
+def coverage_profile(term_counts, n_tokens):
+    """Percentage of a document's tokens that are dictionary terms of each pillar, category and subcategory."""
+    counts = np.asarray(term_counts @ profile_incidence(), dtype=float).ravel()
+    return pd.Series(100 * counts / max(n_tokens, 1), index=coverage_columns())
+
+
+def emergence_rates(appraisal_counts, completion_counts):
+    """Emergence rates of many projects from their (projects x terms) appraisal and completion term counts.
+
+    Dense or sparse counts. Pillars and categories take the share of the
+    distinct dictionary terms of the unit in the completion report that the
+    appraisal never mentions: the terms new at completion are a sparse set
+    difference of the two presence matrices, and one product with the
+    (terms x units) profile_incidence() gives every unit's distinct completion
+    terms and new terms at once; units without any completion term get 0. Subcategories, as in df_app, take the signed relative
+    change of their term hits, (completion - appraisal) / (completion + appraisal + 1),
+    from one product of the counts. Returns a (projects x profile_units()) array.
+    """
+    incidence = profile_incidence()
+    completion_counts = sparse.csr_matrix(completion_counts, dtype=np.int64)
+    appraisal_counts = sparse.csr_matrix(appraisal_counts, dtype=np.int64)
+    completion = sparse.csr_matrix(completion_counts > 0, dtype=np.int64)
+    appraisal = sparse.csr_matrix(appraisal_counts > 0, dtype=np.int64)
+    new = completion - completion.multiply(appraisal)
+    found = np.asarray((completion @ incidence).todense(), dtype=float)
+    new = np.asarray((new @ incidence).todense(), dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rates = np.where(found > 0, new / found, 0.0)
+    subcategory = np.arange(len(profile_units())) >= len(PILLARS) + len(CATEGORIES)
+    before = np.asarray((appraisal_counts @ incidence[:, subcategory]).todense(), dtype=float)
+    after = np.asarray((completion_counts @ incidence[:, subcategory]).todense(), dtype=float)
+    rates[:, subcategory] = (after - before) / (after + before + 1)
+    return rates
+
+
+def emergence_profile(appraisal_counts, completion_counts):
+    """The *_emergence_rate columns of one project from its appraisal and completion term counts (see emergence_rates)."""
+    rates = emergence_rates(np.atleast_2d(appraisal_counts), np.atleast_2d(completion_counts))[0]
+    return pd.Series(rates, index=[MEASURES['emergence'].format(u) for u in profile_units()])
+
+
+def _fit_screening(df, results):
+    models = {}
+    for outcome, family in SCREENING_OUTCOMES.items():
+        sig = results[(results['outcome'] == outcome) & (results['measure'] == 'coverage') & (results['p'] < ALPHA)]
+        predictors = sig['column'].tolist()
+        controls = control_frame(df)
+        X = np.hstack([df[predictors].to_numpy(dtype=float), controls.to_numpy(dtype=float)])
+        y = df[outcome].to_numpy(dtype=float)
+        solve = solve_logit if family == 'logit' else solve_ols
+        models[outcome] = {'family': family, 'predictors': predictors, 'controls': list(controls.columns),
+                           'coef': solve(X[None], y[None])[0][0]}
+    return models
+
+
+@st.cache_resource(show_spinner=False)
+def _screening_models(data_hash):
+    return _fit_screening(load_df_app(), category_models())
+
+
+def screening_models():
+    """Fitted cancellation and delay screening models, refitted whenever df_app changes."""
+    return _screening_models(dataset_hash("df_app_streamlit.csv"))
+
+
+def era_of(year):
+    """The df_app approval era of `year`; years outside the sample fall in the nearest era."""
+    ends = load_df_app(columns=['era', 'approval_year']).groupby('era', observed=True)['approval_year'].max()
+    ends = ends.sort_values()
+    return next((era for era, end in ends.items() if year <= end), ends.index[-1])
+
+
+def sector_group(sector):
+    """The df_app sector_group of a sector label ('Transportation' -> 'Transport').
+
+    Raises ValueError for a sector df_app does not have: the screening models have
+    no dummy for it, so it would silently be scored as the reference sector.
+    """
+    group = SECTOR_GROUPS.get(sector, sector)
+    known = list(load_df_app(columns=['sector_group'])['sector_group'].cat.categories)
+    if group not in known:
+        raise ValueError(f"unknown sector {sector!r}; expected one of {', '.join(known)}")
+    return group
+
+
+def project_controls(planned_cost=None, sector=None, approval_year=None):
+    """Control values for a new project; missing ones default to the sample median cost, modal sector and latest era."""
+    df = load_df_app(columns=['planned_cost_adj_both', 'sector_group', 'era'])
+    return {
+        'planned_cost_adj_both': float(df['planned_cost_adj_both'].median()) if planned_cost is None else planned_cost,
+        'sector_group': df['sector_group'].mode()[0] if sector is None else sector_group(sector),
+        'era': df['era'].cat.categories[-1] if approval_year is None else era_of(approval_year),
+    }
+
+
+def predict(profile, controls):
+    """Cancellation probability and expected delay (months) for one coverage profile and its controls."""
+    row = control_frame(pd.DataFrame([controls]), drop_first=False)
+    out = {}
+    for outcome, model in screening_models().items():
+        x = np.concatenate([profile[model['predictors']].to_numpy(dtype=float),
+                            row.reindex(columns=model['controls'], fill_value=0.0).iloc[0].to_numpy(dtype=float)])
+        eta = x @ model['coef']
+        out[outcome] = 1 / (1 + np.exp(-eta)) if model['family'] == 'logit' else eta
+    return out
+
+
+def score_document(text, planned_cost=None, sector=None, approval_year=None):
+    """Coverage profile and predicted outcomes for the raw text of one PAD.
+
+    `planned_cost` is in millions of 2019 USD (as planned_cost_adj_both); see
+    project_controls() for the defaults of missing metadata.
+    """
+    term_counts, n_tokens = match_text(text)
+    profile = coverage_profile(term_counts, n_tokens)
+    controls = project_controls(planned_cost, sector, approval_year)
+    prediction = predict(profile, controls)
+    return {
+        'profile': profile, 'n_tokens': n_tokens, 'controls': controls,
+        'cancellation_probability': float(prediction['cancellation']),
+        'expected_delay': float(prediction['delay']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help="extracted PAD text (UTF-8)")
+    parser.add_argument('--cost', type=float, help="planned cost, millions of 2019 USD")
+    parser.add_argument('--sector', help="sector group (Transport, Water, Energy; 'Transportation' is Transport)")
+    parser.add_argument('--year', type=int, help="approval year")
+    args = parser.parse_args()
+    if args.sector is not None:
+        try:
+            sector_group(args.sector)
+        except ValueError as e:
+            parser.error(str(e))
+    with open(args.path, encoding='utf-8') as f:
+        result = score_document(f.read(), args.cost, args.sector, args.year)
+    categories = [MEASURES['coverage'].format(c) for c in PILLARS + CATEGORIES]
+    print(result['profile'][categories].to_string(float_format='{:.3f}'.format))
+    print(f"{result['n_tokens']:,} tokens; controls: {result['controls']}")
+    print(f"cancellation probability {result['cancellation_probability']:.1%}, "
+          f"expected delay {result['expected_delay']:.1f} months")
+
+
+if __name__ == "__main__":
+    main()
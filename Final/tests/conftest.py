@@ -0,0 +1,82 @@
+"""Shared fixtures: Final/ on the import path, and df_app projects rebuilt as PAD/ICR texts.
+
+The PAD and ICR texts behind df_app_streamlit.csv are not in the repo, but a
+df_app row pins down the term hits they must have contained: every app_*_pct is
+100 * hits / tokens with one token count per project, and every subcategory
+emergence rate is (icr - pad) / (icr + pad + 1) of whole hit counts. The
+fixture solves a row for these counts and writes texts that have them.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from data import load_df_app, load_esg_dict  # noqa: E402
+from regression import CATEGORIES, MEASURES, subcategories  # noqa: E402
+
+FILLER = "lorem"
+# a few df_app rows: the first ones and the largest subcategory emergence
+N_PROJECTS = 3
+
+
+def _whole(values, name):
+    counts = np.round(values).astype(int)
+    assert np.allclose(values, counts, atol=1e-6), f"{name} is not a whole number of hits"
+    return counts
+
+
+def token_count(pcts):
+    """The smallest token count that makes every coverage percentage a whole number of hits."""
+    pcts = pcts[pcts > 0]
+    top = pcts.max()
+    for hits in range(1, 100_000):
+        n = round(100 * hits / top)
+        if np.allclose(pcts * n / 100, np.round(pcts * n / 100), atol=1e-6):
+            return n
+    raise ValueError("no token count fits the coverage percentages")
+
+
+def project_hits(row):
+    """Token count and PAD/ICR hits per term of one df_app row, one representative term per unit."""
+    terms = load_esg_dict(columns=['term', 'category_display', 'subcategory'])
+    coverage = [MEASURES['coverage'].format(c) for c in CATEGORIES]
+    n_tokens = token_count(row[coverage].to_numpy(float))
+    pad, icr = {}, {}
+    split = subcategories()
+    for category in CATEGORIES:
+        if category in split:
+            continue
+        term = terms.loc[terms['category_display'] == category, 'term'].iloc[0]
+        pad[term] = _whole(row[MEASURES['coverage'].format(category)] * n_tokens / 100, category)
+    for category, found in split.items():
+        for stem, label in found.values():
+            term = terms.loc[(terms['category_display'] == category) & (terms['subcategory'] == label), 'term'].iloc[0]
+            before = _whole(row[MEASURES['coverage'].format(stem)] * n_tokens / 100, stem)
+            rate = row[MEASURES['emergence'].format(stem)]
+            pad[term] = before
+            icr[term] = _whole((before + rate * (before + 1)) / (1 - rate), stem)
+    return n_tokens, pad, icr
+
+
+def write_text(path, hits, n_tokens):
+    words = [term for term, count in hits.items() for _ in range(int(count))]
+    words += [FILLER] * (n_tokens - len(words))
+    path.write_text(" ".join(words), encoding='utf-8')
+
+
+@pytest.fixture(scope='session')
+def df_app_texts(tmp_path_factory):
+    """(directory of <projectid>_PAD.txt / _ICR.txt, the df_app rows they were rebuilt from)."""
+    df = load_df_app()
+    stems = [stem for found in subcategories().values() for stem, _ in found.values()]
+    largest = df[[MEASURES['emergence'].format(stem) for stem in stems]].max(axis=1).idxmax()
+    rows = df.loc[list(dict.fromkeys([*df.index[:N_PROJECTS], largest]))].set_index('projectid')
+    directory = tmp_path_factory.mktemp("texts")
+    for projectid, row in rows.iterrows():
+        n_tokens, pad, icr = project_hits(row)
+        write_text(directory / f"{projectid}_PAD.txt", pad, n_tokens)
+        write_text(directory / f"{projectid}_ICR.txt", icr, sum(icr.values()))
+    return directory, rows
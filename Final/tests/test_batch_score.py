@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from batch_score import featurize, find_documents
+from regression import MEASURES, subcategories
+from scoring import coverage_columns
+
+
+def _subcategory_emergence_columns():
+    return [MEASURES['emergence'].format(stem) for found in subcategories().values() for stem, _ in found.values()]
+
+
+def test_featurize_reproduces_df_app(df_app_texts):
+    directory, expected = df_app_texts
+    docs = find_documents(directory)
+    rows = pd.DataFrame([featurize(pid, paths['PAD'], paths.get('ICR')) for pid, paths in docs.items()])
+    rows = rows.set_index('projectid').loc[expected.index]
+    columns = coverage_columns() + _subcategory_emergence_columns()
+    np.testing.assert_allclose(rows[columns].to_numpy(float), expected[columns].to_numpy(float), rtol=1e-9, atol=1e-12)
+
+
+def test_featurize_without_icr_has_no_emergence(df_app_texts):
+    directory, expected = df_app_texts
+    pid = expected.index[0]
+    row = featurize(pid, find_documents(directory)[pid]['PAD'])
+    emergence = [c for c in row.index if c.endswith('_emergence_rate')]
+    assert row[emergence].isna().all()
+    assert row[coverage_columns()].notna().all()
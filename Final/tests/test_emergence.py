@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from batch_score import featurize, find_documents
+from emergence import count_matrices, project_emergence, term_emergence
+from regression import MEASURES, subcategories
+
+
+def test_project_emergence_reproduces_df_app(df_app_texts):
+    directory, expected = df_app_texts
+    rates = project_emergence(count_matrices(directory, workers=2)).set_index('projectid').loc[expected.index]
+    columns = [MEASURES['emergence'].format(stem) for found in subcategories().values() for stem, _ in found.values()]
+    np.testing.assert_allclose(rates[columns].to_numpy(float), expected[columns].to_numpy(float), rtol=1e-9, atol=1e-12)
+
+
+def test_project_emergence_matches_featurize(tmp_path, df_app_texts):
+    directory, _ = df_app_texts
+    for path in directory.iterdir():
+        (tmp_path / path.name).write_text(path.read_text())
+    # a project without an ICR, and a second ICR term so pillar and category shares are not trivial
+    (tmp_path / "P0_PAD.txt").write_text("land_acquisition water_supply lorem")
+    icr = next(tmp_path.glob("*_ICR.txt"))
+    icr.write_text(icr.read_text() + " water_supply resettlement")
+    rates = project_emergence(count_matrices(tmp_path, workers=2)).set_index('projectid')
+    docs = find_documents(tmp_path)
+    rows = pd.DataFrame([featurize(pid, paths['PAD'], paths.get('ICR')) for pid, paths in docs.items()])
+    rows = rows.set_index('projectid').loc[rates.index, rates.columns]
+    np.testing.assert_array_equal(rates.to_numpy(), rows.to_numpy(float))
+    assert rates.loc['P0'].isna().all()
+
+
+def test_term_emergence_counts_projects(tmp_path):
+    texts = {'A': ("water_supply land_acquisition", "water_supply resettlement"),
+             'B': ("resettlement", "resettlement water_supply water_supply"),
+             'C': ("water_supply", None)}
+    for pid, (pad, icr) in texts.items():
+        (tmp_path / f"{pid}_PAD.txt").write_text(pad)
+        if icr is not None:
+            (tmp_path / f"{pid}_ICR.txt").write_text(icr)
+    terms = term_emergence(count_matrices(tmp_path, workers=1)).set_index('term')
+    assert terms.loc['water_supply', ['icr_projects', 'new_projects']].tolist() == [2, 1]
+    assert terms.loc['resettlement', ['icr_projects', 'new_projects']].tolist() == [2, 1]
+    assert terms.loc['land_acquisition', 'icr_projects'] == 0
+    assert np.isnan(terms.loc['land_acquisition', 'emergence_rate'])
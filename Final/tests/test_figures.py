@@ -0,0 +1,24 @@
+import figures
+from figures import cached_figure, figure_key
+
+
+def test_callers_get_independent_copies():
+    fig = cached_figure('coefficient_plot', outcome='delay', measure='coverage')
+    title = fig.layout.title.text
+    fig.update_layout(title="changed", height=123)
+    fig.data[0].name = "changed"
+    again = cached_figure('coefficient_plot', outcome='delay', measure='coverage')
+    assert again.layout.title.text == title and again.layout.height != 123
+    assert again.data[0].name != "changed"
+
+
+def test_key_changes_with_the_builder_code(monkeypatch):
+    params = {'outcome': 'delay', 'measure': 'coverage'}
+    key = figure_key('coefficient_plot', params)
+    monkeypatch.setattr(figures, 'code_hash', lambda: "edited")
+    assert figure_key('coefficient_plot', params) != key
+
+
+def test_static_views_are_prebuilt():
+    for name, params in figures.STATIC_VIEWS:
+        assert (figures.FIGURE_DIR / f"{figure_key(name, params)}.json").exists(), "run python figures.py"
@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+import pytest
+
+from matcher import compile_dictionary, dictionary_matcher, match_files, match_text, tokenize
+
+
+def naive_match(terms, text):
+    """Longest-match term counts with one regex alternation over the tokens, longest terms first."""
+    tokens = tokenize(text)
+    index = {}
+    for i, term in enumerate(terms):
+        index[term.replace('_', ' ')] = i
+        index[term] = i
+    alternatives = sorted(index, key=lambda form: (-form.count(' '), form))
+    pattern = re.compile(r'(?<!\S)(?:' + '|'.join(map(re.escape, alternatives)) + r')(?!\S)')
+    counts, joined = np.zeros(len(terms), dtype=int), 0
+    for found in pattern.finditer(' '.join(tokens)):
+        counts[index[found.group()]] += 1
+        joined += found.group().count(' ')
+    return counts, len(tokens) - joined
+
+
+def test_longest_match_on_overlapping_terms():
+    terms = ['land', 'land_acquisition', 'land_acquisition_plan', 'acquisition_plan', 'plan']
+    matcher = compile_dictionary(terms, ['S3'] * 5, ['a'] * 5)
+    text = "Land acquisition plan; land acquisition, a plan: land_acquisition acquisition plan land."
+    counts, n_tokens = match_text(text, matcher)
+    assert dict(zip(terms, counts)) == {'land': 1, 'land_acquisition': 2, 'land_acquisition_plan': 1,
+                                        'acquisition_plan': 1, 'plan': 1}
+    assert n_tokens == 7
+    assert (counts == naive_match(terms, text)[0]).all()
+
+
+@pytest.fixture(scope='module')
+def random_texts():
+    """Texts of dictionary words, some already joined, mixed with filler and punctuation."""
+    rng = np.random.default_rng(2)
+    terms = dictionary_matcher()['terms']
+    words = sorted({word for term in terms for word in term.split('_')}) + ["the", "project", "of"]
+    texts = []
+    for _ in range(20):
+        pieces = []
+        for _ in range(300):
+            roll = rng.random()
+            if roll < 0.3:
+                term = terms[rng.integers(len(terms))]
+                pieces.append(term if rng.random() < 0.3 else term.replace('_', ' '))
+            else:
+                pieces.append(words[rng.integers(len(words))] + ("," if roll > 0.95 else ""))
+        texts.append(" ".join(pieces))
+    return texts
+
+
+def test_trie_matches_naive_regex(random_texts):
+    matcher = dictionary_matcher()
+    for text in random_texts:
+        counts, n_tokens = match_text(text, matcher)
+        expected, expected_tokens = naive_match(matcher['terms'], text)
+        np.testing.assert_array_equal(counts, expected)
+        assert n_tokens == expected_tokens
+
+
+def test_match_files_keeps_file_order(random_texts, tmp_path):
+    paths = []
+    for i, text in enumerate(random_texts):
+        paths.append(tmp_path / f"{i}.txt")
+        paths[-1].write_text(text, encoding='utf-8')
+    counts, lengths = match_files(paths, workers=2)
+    matcher = dictionary_matcher()
+    for row, text, n_tokens in zip(counts.toarray(), random_texts, lengths):
+        expected, expected_tokens = match_text(text, matcher)
+        np.testing.assert_array_equal(row, expected)
+        assert n_tokens == expected_tokens
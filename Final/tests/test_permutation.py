@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from data import load_df_app
+from permutation import holm, logit_score_stats, ols_t_stats, run_permutations
+from regression import fit_ols_batch, solve_logit, stack_designs
+
+# unsorted p-values with a tie; adjusted values as R's p.adjust gives them
+P = np.array([0.01, 0.04, 0.03, 0.005, 0.04, 0.5])
+HOLM = np.array([0.05, 0.12, 0.12, 0.03, 0.12, 0.5])
+BH = np.array([0.03, 0.048, 0.048, 0.03, 0.048, 0.5])
+
+
+def test_holm_reference_values():
+    np.testing.assert_allclose(holm(P), HOLM)
+    np.testing.assert_allclose(holm([0.2, 0.5, 0.6]), [0.6, 1, 1])
+
+
+def test_bh_reference_values():
+    np.testing.assert_allclose(stats.false_discovery_control(P, method='bh'), BH)
+
+
+@pytest.fixture
+def toy():
+    rng = np.random.default_rng(1)
+    n = 150
+    X0 = np.column_stack([np.ones(n), rng.normal(size=(n, 2))])
+    Z = rng.normal(size=(n, 3))
+    Y = X0 @ [0.5, 1.0, -1.0] + 0.4 * Z[:, [0]].T + rng.normal(size=(4, n))
+    binary = (rng.random((4, n)) < 1 / (1 + np.exp(-(X0[:, 1] + Z[:, 1])))).astype(float)
+    return X0, Z, Y, binary
+
+
+def test_ols_t_stats_match_the_fitted_models(toy):
+    X0, Z, Y, _ = toy
+    t = ols_t_stats(stack_designs(X0, Z), Y)
+    for b, y in enumerate(Y):
+        fit = fit_ols_batch(X0, Z, y)
+        np.testing.assert_allclose(t[b], fit['coef'] / fit['se'], rtol=1e-8)
+
+
+def test_logit_score_stats_match_a_direct_score_test(toy):
+    X0, Z, _, binary = toy
+    score = logit_score_stats(X0, Z, binary)
+    for b, y in enumerate(binary):
+        beta, _, _ = solve_logit(X0[None], y[None])
+        prob = 1 / (1 + np.exp(-X0 @ beta[0]))
+        w = prob * (1 - prob)
+        for j, z in enumerate(Z.T):
+            # score and information of z in the full model [z, X0], evaluated at the controls-only fit
+            X = np.column_stack([z, X0])
+            info = np.linalg.inv(X.T @ (X * w[:, None]))[0, 0]
+            np.testing.assert_allclose(score[b, j], (y - prob) @ z * np.sqrt(info), rtol=1e-8)
+
+
+def test_run_permutations_adjusts_all_tests():
+    results = run_permutations(load_df_app(), n_permutations=199)
+    assert len(results) == 78
+    assert results['p_perm'].between(1 / 200, 1).all()
+    np.testing.assert_allclose(results['p_holm'], holm(results['p_perm']))
+    assert (results['q_fdr'] >= results['p_perm'] - 1e-12).all()
+    assert (results['p_holm'] >= results['q_fdr'] - 1e-12).all()
@@ -0,0 +1,86 @@
+from collections import Counter, OrderedDict
+
+import numpy as np
+import pytest
+
+import preprocess
+from preprocess import compile_replacements, load_americanize, load_ngrams, replace_tokens, sequential_replace
+
+AMERICANIZE = {'labour': 'labor', 'centre': 'center', 'organisation': 'organization', 'programme': 'program',
+               'behaviour': 'behavior', 'licence': 'license'}
+
+
+def compiled_replace(text, americanize, ngrams):
+    counts = Counter()
+    return ' '.join(replace_tokens(compile_replacements(americanize, ngrams), text.split(), counts)), counts
+
+
+def disjoint_ngrams(ngrams):
+    """A greedy subset of n-grams no two of which share a word, so the replacement order cannot matter."""
+    used, out = set(), set()
+    for phrase in sorted(ngrams):
+        if used.isdisjoint(phrase):
+            used.update(phrase)
+            out.add(phrase)
+    return out
+
+
+def test_british_spelling_inside_an_ngram():
+    ngrams = {('labor', 'market'), ('resettlement', 'action', 'plan'), ('action', 'plan')}
+    text = "the labour market and a resettlement action plan an action plan in the centre"
+    compiled, counts = compiled_replace(text, AMERICANIZE, ngrams)
+    assert compiled == "the labor_market and a resettlement_action_plan an action_plan in the center"
+    assert compiled == sequential_replace(text, AMERICANIZE, ngrams)
+    assert counts == {'joined': 3, 'replaced': 1}
+
+
+def test_leftmost_longest_on_overlapping_ngrams():
+    # sequential substitution of equal-length n-grams depends on their order; the trie joins leftmost-longest
+    compiled, _ = compiled_replace("land acquisition plan", {}, {('land', 'acquisition'), ('acquisition', 'plan')})
+    assert compiled == "land_acquisition plan"
+
+
+def test_trie_matches_sequential_regex():
+    ngrams = disjoint_ngrams(load_ngrams(path="missing.csv"))
+    assert len(ngrams) > 100
+    rng = np.random.default_rng(3)
+    phrases = sorted(ngrams)
+    british = list(AMERICANIZE) + list(AMERICANIZE.values())
+    words = sorted({word for phrase in ngrams for word in phrase}) + british + ["the", "of", "project"]
+    for _ in range(20):
+        pieces = []
+        for _ in range(300):
+            if rng.random() < 0.3:
+                pieces.extend(phrases[rng.integers(len(phrases))])
+            else:
+                pieces.append(words[rng.integers(len(words))])
+        text = ' '.join(pieces)
+        compiled, _ = compiled_replace(text, AMERICANIZE, ngrams)
+        assert compiled == sequential_replace(text, AMERICANIZE, ngrams)
+
+
+def test_missing_spelling_table_warns_and_leaves_spellings(tmp_path):
+    with pytest.warns(UserWarning, match="not be Americanized"):
+        americanize = load_americanize(tmp_path / "british_spellings.json")
+    assert americanize == {}
+    assert compiled_replace("the labour market", americanize, {('labor', 'market')})[0] == "the labour market"
+
+
+def test_records_flag_documents_with_many_unknown_tokens(tmp_path, monkeypatch):
+    spellchecker = pytest.importorskip('spellchecker')
+    # what _init sets up in every worker, with a small known-word list in place of the nltk corpus
+    checker = spellchecker.SpellChecker(distance=1)
+    resources = {'engine': compile_replacements(AMERICANIZE, {('labor', 'market')}), 'checker': checker,
+                 'known': {'the', 'labour', 'market', 'project'}, 'version': "test",
+                 'db': preprocess.open_spell_cache(tmp_path / "spell_cache.sqlite"),
+                 'corrections': OrderedDict(), 'new_corrections': []}
+    monkeypatch.setattr(preprocess, '_resources', resources)
+    (tmp_path / "P1_PAD.txt").write_text("the labour market project " * 10, encoding='utf-8')
+    (tmp_path / "P1_ICR.txt").write_text("the project xqzvbtr wqplmnk kvtrzxq", encoding='utf-8')
+    records, counters = preprocess.process_chunk([('P1', {'PAD': tmp_path / "P1_PAD.txt",
+                                                          'ICR': tmp_path / "P1_ICR.txt"})])
+    record = records[0]
+    assert record['text_appraisal_unknown_share'] == 0 and not record['text_appraisal_flagged']
+    assert record['text_completion_unknown_share'] == pytest.approx(0.6) and record['text_completion_flagged']
+    assert record['text_appraisal_ngram'].startswith("the labor_market project")
+    assert counters['typo']['flagged'] == 1
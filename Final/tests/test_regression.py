@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from regression import fit_logit_batch, fit_ols_batch, solve_logit, solve_ols, stack_designs
+
+linear_model = pytest.importorskip('sklearn.linear_model')
+
+
+@pytest.fixture
+def toy():
+    """Controls X0 (n, k) with an intercept, candidate predictors Z (n, m) and both outcomes."""
+    rng = np.random.default_rng(0)
+    n = 200
+    X0 = np.column_stack([np.ones(n), rng.normal(size=(n, 2))])
+    Z = rng.normal(size=(n, 4))
+    y = X0 @ [1.0, 0.5, -0.3] + 0.8 * Z[:, 0] + rng.normal(size=n)
+    logit = X0 @ [-0.2, 0.7, -0.4] + 0.9 * Z[:, 1]
+    binary = (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(float)
+    return X0, Z, y, binary
+
+
+def test_solve_ols_matches_sklearn(toy):
+    X0, Z, y, _ = toy
+    X = stack_designs(X0, Z)
+    beta, se, dof = solve_ols(X, np.broadcast_to(y, X.shape[:2]))
+    assert dof == X.shape[1] - X.shape[2]
+    for j, design in enumerate(X):
+        fit = linear_model.LinearRegression(fit_intercept=False).fit(design, y)
+        np.testing.assert_allclose(beta[j], fit.coef_, rtol=1e-8)
+        resid = y - design @ fit.coef_
+        cov = resid @ resid / dof * np.linalg.inv(design.T @ design)
+        np.testing.assert_allclose(se[j], np.sqrt(np.diag(cov)), rtol=1e-8)
+
+
+def test_solve_logit_matches_sklearn(toy):
+    X0, Z, _, binary = toy
+    X = stack_designs(X0, Z)
+    beta, se, converged = solve_logit(X, np.broadcast_to(binary, X.shape[:2]))
+    assert converged.all()
+    for j, design in enumerate(X):
+        fit = linear_model.LogisticRegression(C=np.inf, fit_intercept=False, tol=1e-10, max_iter=1000)
+        fit.fit(design, binary)
+        np.testing.assert_allclose(beta[j], fit.coef_[0], rtol=1e-4, atol=1e-6)
+        prob = fit.predict_proba(design)[:, 1]
+        info = design.T @ (design * (prob * (1 - prob))[:, None])
+        np.testing.assert_allclose(se[j], np.sqrt(np.diag(np.linalg.inv(info))), rtol=1e-4)
+
+
+def test_solve_logit_flags_separation(toy):
+    X0, Z, _, _ = toy
+    separated = (Z[:, 0] > 0).astype(float)
+    X = stack_designs(X0, Z[:, :1])
+    beta, _, converged = solve_logit(X, separated[None, :])
+    assert not converged[0]
+    assert np.isnan(beta[0]).all()
+
+
+def test_batches_report_the_predictor(toy):
+    X0, Z, y, binary = toy
+    ols, logit = fit_ols_batch(X0, Z, y), fit_logit_batch(X0, Z, binary)
+    assert len(ols) == len(logit) == Z.shape[1]
+    # the simulated effects: Z0 on y, Z1 on the binary outcome
+    assert ols['p'].idxmin() == 0 and logit['p'].idxmin() == 1
+    assert (ols['lower'] < ols['coef']).all() and (ols['coef'] < ols['upper']).all()
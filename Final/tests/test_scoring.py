@@ -0,0 +1,30 @@
+import sys
+
+import pytest
+
+import scoring
+from scoring import project_controls, score_document, sector_group
+
+TEXT = "resettlement action plan for land acquisition and biodiversity offsets " * 20
+
+
+def test_sector_labels_map_to_df_app_groups():
+    assert sector_group('Transportation') == 'Transport'
+    assert project_controls(sector='Transportation')['sector_group'] == 'Transport'
+    assert (score_document(TEXT, sector='Transportation')['expected_delay']
+            == score_document(TEXT, sector='Transport')['expected_delay'])
+
+
+@pytest.mark.parametrize('sector', ["Transprot", "water", "Mining"])
+def test_unknown_sector_is_rejected(sector):
+    with pytest.raises(ValueError, match="unknown sector"):
+        score_document(TEXT, sector=sector)
+
+
+def test_cli_rejects_unknown_sector(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "pad.txt"
+    path.write_text(TEXT, encoding='utf-8')
+    monkeypatch.setattr(sys, 'argv', ['scoring.py', str(path), '--sector', 'Transprot'])
+    with pytest.raises(SystemExit):
+        scoring.main()
+    assert "expected one of" in capsys.readouterr().err
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from tfidf import add_counts, add_documents, count_matrix, new_index, percentile, tfidf, top_k
+
+feature_extraction = pytest.importorskip('sklearn.feature_extraction.text')
+
+
+@pytest.fixture
+def documents():
+    rng = np.random.default_rng(4)
+    words = [f"w{i}" for i in range(60)]
+    # skewed word frequencies, so document frequencies and IDFs differ
+    p = 1 / np.arange(1, 61)
+    return [list(rng.choice(words, size=rng.integers(1, 40), p=p / p.sum())) for _ in range(30)]
+
+
+def sklearn_tfidf(documents, terms):
+    vectorizer = feature_extraction.TfidfVectorizer(analyzer=lambda doc: doc, vocabulary=terms)
+    return vectorizer.fit_transform(documents).toarray()
+
+
+def test_tfidf_matches_sklearn(documents):
+    index = new_index()
+    add_documents(index, documents)
+    weights, doc_freq = tfidf(count_matrix(index))
+    np.testing.assert_allclose(weights.toarray(), sklearn_tfidf(documents, index['terms']), rtol=1e-12, atol=1e-15)
+    assert doc_freq.tolist() == [sum(term in doc for doc in documents) for term in index['terms']]
+
+
+def test_growing_vocabulary_matches_one_pass(documents):
+    grown = new_index()
+    for start in range(0, len(documents), 7):
+        add_documents(grown, documents[start:start + 7])
+    one_pass = new_index()
+    add_documents(one_pass, documents)
+    assert sorted(grown['terms']) == sorted(one_pass['terms'])
+    order = [grown['vocab'][term] for term in one_pass['terms']]
+    np.testing.assert_array_equal(count_matrix(grown).toarray()[:, order], count_matrix(one_pass).toarray())
+
+
+def test_add_counts_maps_onto_the_vocabulary():
+    index = new_index()
+    add_documents(index, [["a", "b", "b"]])
+    add_counts(index, ["c", "a"], np.array([[1, 2]]))
+    assert index['terms'] == ["a", "b", "c"]
+    np.testing.assert_array_equal(count_matrix(index).toarray(), [[1, 2, 0], [2, 0, 1]])
+
+
+def test_top_k_and_percentile_match_full_sorts():
+    values = np.random.default_rng(5).normal(size=1001)
+    for k in (0, 1, 10, 1001, 2000):
+        np.testing.assert_array_equal(top_k(values, k), np.argsort(-values, kind='stable')[:k])
+    for q in (0, 12.5, 50, 99, 99.5, 100):
+        assert percentile(values, q) == pytest.approx(np.percentile(values, q))
@@ -0,0 +1,108 @@
+"""Indexed PAD/ICR text store behind the tab5 document viewer.
+
+All documents are concatenated into ``text_store/texts.bin`` (UTF-8). For every
+document, ``text_store/offsets.npy`` holds the byte offset of every
+WORDS_PER_BLOCK-th word, and ``text_store/index.json`` maps
+(project, document, version) to its first checkpoint, word count and byte range.
+A page of words is then a single seek + read between two checkpoints, so the
+viewer never loads more than the visible window.
+
+Build from a JSON export with the text_data_sample.json columns (projectid,
+text_appraisal, text_appraisal_ngram, text_completion, text_completion_ngram),
+or from the JSON lines written by preprocess.py:
+    python textstore.py [source.json | corpus.jsonl]
+"""
+import json
+import re
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data import BASE
+
+STORE_DIR = BASE / "text_store"
+STORE_VERSION = 1
+WORDS_PER_BLOCK = 250
+# viewer page size; a multiple of WORDS_PER_BLOCK so pages start on checkpoints
+WORDS_PER_PAGE = 1000
+DOC_TYPES = {'appraisal': 'text_appraisal', 'completion': 'text_completion'}
+VERSIONS = {'raw': '', 'clean': '_ngram'}
+
+_WORD = re.compile(rb'\S+')
+
+
+def _doc_key(projectid, doc_type, version):
+    return f"{projectid}/{doc_type}/{version}"
+
+
+@lru_cache(maxsize=1)
+def store_index():
+    """The store index, or None when no store has been built."""
+    path = STORE_DIR / "index.json"
+    if not path.exists():
+        return None
+    index = json.loads(path.read_text())
+    return index if index.get('version') == STORE_VERSION else None
+
+
+@st.cache_resource(show_spinner=False)
+def _offsets():
+    return np.load(STORE_DIR / "offsets.npy", mmap_mode='r')
+
+
+def list_projects():
+    """Project IDs in the store, in build order."""
+    index = store_index()
+    return index['projects'] if index else []
+
+
+def word_count(projectid, doc_type, version):
+    return store_index()['docs'][_doc_key(projectid, doc_type, version)][1]
+
+
+def read_window(projectid, doc_type, version, start_word, n_words):
+    """Text of words [start_word, start_word + n_words), both multiples of WORDS_PER_BLOCK."""
+    first, total, start, end = store_index()['docs'][_doc_key(projectid, doc_type, version)]
+    if start_word >= total:
+        return ''
+    offsets = _offsets()
+    lo = first + start_word // WORDS_PER_BLOCK
+    hi = first + (start_word + n_words) // WORDS_PER_BLOCK
+    n_blocks = -(-total // WORDS_PER_BLOCK)
+    begin = int(offsets[lo])
+    stop = int(offsets[hi]) if hi < first + n_blocks else end
+    with open(STORE_DIR / "texts.bin", 'rb') as f:
+        f.seek(begin)
+        return f.read(stop - begin).decode('utf-8').strip()
+
+
+def build_store(source):
+    """Write texts.bin, offsets.npy and index.json from a JSON export of the corpus."""
+    STORE_DIR.mkdir(exist_ok=True)
+    records = pd.read_json(source, lines=str(source).endswith('.jsonl'))
+    docs, offsets, position = {}, [], 0
+    with open(STORE_DIR / "texts.bin", 'wb') as out:
+        for row in records.itertuples(index=False):
+            for doc_type, column in DOC_TYPES.items():
+                for version, suffix in VERSIONS.items():
+                    text = getattr(row, column + suffix)
+                    data = (text if isinstance(text, str) else '').encode('utf-8') + b'\n'
+                    starts = [m.start() for m in _WORD.finditer(data)]
+                    docs[_doc_key(row.projectid, doc_type, version)] = [
+                        len(offsets), len(starts), position, position + len(data)
+                    ]
+                    offsets.extend(position + s for s in starts[::WORDS_PER_BLOCK])
+                    out.write(data)
+                    position += len(data)
+    np.save(STORE_DIR / "offsets.npy", np.array(offsets, dtype=np.uint64))
+    index = {'version': STORE_VERSION, 'words_per_block': WORDS_PER_BLOCK,
+             'projects': records['projectid'].tolist(), 'docs': docs}
+    (STORE_DIR / "index.json").write_text(json.dumps(index) + "\n")
+    print(f"{len(records)} projects, {len(docs)} documents, {position:,} bytes -> {STORE_DIR.name}/")
+
+
+if __name__ == "__main__":
+    build_store(sys.argv[1] if len(sys.argv) > 1 else BASE / "text_data_sample.json")
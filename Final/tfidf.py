@@ -0,0 +1,186 @@
+"""Sparse TF-IDF behind the seed terms (tab3) and the preserved n-grams (tab5).
+
+Documents are held as sparse term-count blocks over a shared vocabulary that
+grows as documents are added (add_documents / add_counts), so new projects never
+force a recount of the old ones. TF-IDF uses the smoothed IDF
+ln((1 + n) / (1 + df)) + 1 with l2-normalized rows. Top terms and percentile
+cuts use partial sorts (argpartition / partition), never a full sort of the
+vocabulary.
+
+Seed terms: every category document of seed_streamlit.json is one document.
+Preserved n-grams: the POS-pattern candidates of postags.py, scored by their mean
+TF-IDF over the PAD/ICR documents. A bigram or trigram is kept when its score is
+at or above the NGRAM_PERCENTILES cut for its length and its document frequency
+is within DOC_FREQ_RANGE. The full list goes to ngrams_preserved.csv, which
+preprocess.py joins, and the tab5 summary tables go to ngram_tables.json. Until
+that is run on the parsed corpus, ngram_tables.json holds the legacy tables of
+the original analysis (source 'legacy'), whose scores are on a different scale:
+    python tfidf.py            (needs pos_store/ from ``python postags.py parse``)
+    python tfidf.py --seeds    prints the top seed-document terms
+"""
+import argparse
+import json
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from data import BASE, load_seed_source
+from matcher import tokenize
+from postags import BIGRAM_PATTERNS, TRIGRAM_PATTERNS, load_store, ngram_counts
+
+NGRAM_PERCENTILES = {2: 99.0, 3: 99.5}
+# percent of documents
+DOC_FREQ_RANGE = (5.0, 100.0)
+NGRAM_PATTERNS = {2: BIGRAM_PATTERNS, 3: TRIGRAM_PATTERNS}
+NGRAM_NAMES = {2: 'bigram', 3: 'trigram'}
+TOP_TERMS = 50
+PRESERVED_FILE = "ngrams_preserved.csv"
+TABLES_FILE = "ngram_tables.json"
+TABLES_VERSION = 1
+
+
+def new_index():
+    return {'vocab': {}, 'terms': [], 'blocks': []}
+
+
+def add_counts(index, terms, counts):
+    """Append documents given as a (docs x len(terms)) count matrix over `terms`, growing the vocabulary."""
+    vocab, known = index['vocab'], index['terms']
+    for term in terms:
+        if term not in vocab:
+            vocab[term] = len(known)
+            known.append(term)
+    columns = np.array([vocab[term] for term in terms], dtype=np.int64)
+    block = sparse.coo_matrix(counts)
+    index['blocks'].append(sparse.csr_matrix((block.data, (block.row, columns[block.col])),
+                                             shape=(block.shape[0], len(known))))
+
+
+def add_documents(index, documents):
+    """Append tokenized documents (lists of terms)."""
+    counters = [Counter(doc) for doc in documents]
+    local = {}
+    rows, cols, data = [], [], []
+    for row, counter in enumerate(counters):
+        for term, count in counter.items():
+            rows.append(row)
+            cols.append(local.setdefault(term, len(local)))
+            data.append(count)
+    counts = sparse.csr_matrix((np.array(data, dtype=np.int64), (rows, cols)), shape=(len(counters), len(local)))
+    add_counts(index, list(local), counts)
+
+
+def count_matrix(index):
+    """All documents as one (docs x vocabulary) count matrix; earlier blocks are widened to the current vocabulary."""
+    width = len(index['terms'])
+    blocks = [sparse.csr_matrix((b.data, b.indices, b.indptr), shape=(b.shape[0], width)) for b in index['blocks']]
+    if not blocks:
+        return sparse.csr_matrix((0, width), dtype=np.int64)
+    return sparse.vstack(blocks, format='csr')
+
+
+def tfidf(counts):
+    """(TF-IDF weights with l2-normalized rows, document frequency) of a (docs x terms) count matrix."""
+    counts = sparse.csr_matrix(counts, dtype=float)
+    counts.sum_duplicates()
+    n_docs = counts.shape[0]
+    doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1
+    weights = counts @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+    weights = sparse.diags(1 / np.where(norms > 0, norms, 1)) @ weights
+    return weights.tocsr(), doc_freq
+
+
+def top_k(values, k):
+    """Indices of the `k` largest values, largest first, from a partial sort."""
+    values = np.asarray(values)
+    k = min(k, len(values))
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    part = np.argpartition(-values, k - 1)[:k]
+    return part[np.argsort(-values[part], kind='stable')]
+
+
+def percentile(values, q):
+    """np.percentile(values, q) with linear interpolation, partitioning only around the two ranks it needs."""
+    values = np.asarray(values, dtype=float)
+    position = (len(values) - 1) * q / 100
+    lo, hi = int(np.floor(position)), int(np.ceil(position))
+    part = np.partition(values, [lo, hi])
+    return part[lo] + (part[hi] - part[lo]) * (position - lo)
+
+
+def seed_term_scores(top=TOP_TERMS):
+    """The `top` TF-IDF terms of every seed category document (code, term, tfidf), best first per code."""
+    from wordcloud import STOPWORDS
+
+    source = load_seed_source(columns=['code', 'text'])
+    index = new_index()
+    add_documents(index, ([t for t in tokenize(text) if t not in STOPWORDS] for text in source['text']))
+    weights, _ = tfidf(count_matrix(index))
+    rows = []
+    for code, row in zip(source['code'], weights):
+        for i in top_k(row.data, top):
+            rows.append({'code': code, 'term': index['terms'][row.indices[i]], 'tfidf': row.data[i]})
+    return pd.DataFrame(rows)
+
+
+def preserve_ngrams(store):
+    """Preserved bigrams and trigrams of the parsed corpus (term, n, tfidf, doc_freq_%), best first per n."""
+    frames = []
+    for n, patterns in NGRAM_PATTERNS.items():
+        index = new_index()
+        add_counts(index, *ngram_counts(store, patterns))
+        weights, doc_freq = tfidf(count_matrix(index))
+        score = np.asarray(weights.mean(axis=0)).ravel()
+        doc_share = 100 * doc_freq / max(weights.shape[0], 1)
+        keep = (score >= percentile(score, NGRAM_PERCENTILES[n])) if len(score) else np.zeros(0, dtype=bool)
+        keep &= (doc_share >= DOC_FREQ_RANGE[0]) & (doc_share <= DOC_FREQ_RANGE[1])
+        kept = np.flatnonzero(keep)
+        kept = kept[top_k(score[kept], len(kept))]
+        frames.append(pd.DataFrame({'term': np.array(index['terms'], dtype=object)[kept], 'n': n,
+                                    'tfidf': score[kept], 'doc_freq_%': doc_share[kept]}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def ngram_summary(preserved, top=TOP_TERMS):
+    """The tab5 tables: per n-gram length, the preserved count, the cuts used and the `top` terms."""
+    tables = []
+    for n, name in NGRAM_NAMES.items():
+        rows = preserved[preserved['n'] == n]
+        best = rows.iloc[top_k(rows['tfidf'].to_numpy(), top)]
+        tables.append({'n': n, 'name': name, 'preserved': len(rows), 'percentile': NGRAM_PERCENTILES[n],
+                       'doc_freq': list(DOC_FREQ_RANGE),
+                       'top': best[['term', 'tfidf', 'doc_freq_%']].round({'tfidf': 4, 'doc_freq_%': 1})
+                       .to_dict('records')})
+    return {'version': TABLES_VERSION, 'source': "tfidf.py", 'tables': tables}
+
+
+@lru_cache(maxsize=1)
+def ngram_tables():
+    """ngram_tables.json: its 'source' ("tfidf.py", or 'legacy') and the tab5 'tables', one per n-gram length."""
+    return json.loads((BASE / TABLES_FILE).read_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seeds', action='store_true', help="print the top terms of every seed category document")
+    args = parser.parse_args()
+    if args.seeds:
+        scores = seed_term_scores(top=10)
+        for code, rows in scores.groupby('code', sort=False):
+            print(f"{code}: " + ", ".join(f"{r.term} ({r.tfidf:.3f})" for r in rows.itertuples()))
+        return
+    preserved = preserve_ngrams(load_store())
+    preserved.to_csv(BASE / PRESERVED_FILE, index=False)
+    (BASE / TABLES_FILE).write_text(json.dumps(ngram_summary(preserved), indent=1) + "\n")
+    counts = preserved['n'].value_counts()
+    print(f"{counts.get(2, 0):,} bigrams, {counts.get(3, 0):,} trigrams -> {PRESERVED_FILE}, {TABLES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
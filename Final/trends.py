@@ -0,0 +1,123 @@
+"""Coverage vs emergence trend fits behind the tab6 "Mechanism" scatter.
+
+For every pillar (E, S, G) and category, the emergence rate is related to appraisal
+coverage by an OLS line, a Theil-Sen line (median of pairwise slopes, robust to
+the outlying projects), Pearson and Spearman correlations, and a LOWESS curve
+sampled on LOWESS_POINTS evenly spaced coverage values. All 16 series are fitted
+together as stacked (series x projects) arrays and the table is cached per data
+hash, so the scatter only draws precomputed lines.
+
+    python trends.py
+prints the table.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy import stats
+
+from data import dataset_hash, load_df_app
+from regression import CATEGORIES, MEASURES
+
+PILLARS = ['E', 'S', 'G']
+LOWESS_FRAC = 2 / 3
+LOWESS_ITERATIONS = 3
+LOWESS_POINTS = 50
+
+
+def trend_units():
+    """Every pillar and category code, pillars first."""
+    return PILLARS + CATEGORIES
+
+
+def _correlation(x, y):
+    """Row-wise Pearson r and its two-sided t-test p for (m, n) arrays."""
+    xc = x - x.mean(axis=1, keepdims=True)
+    yc = y - y.mean(axis=1, keepdims=True)
+    r = (xc * yc).sum(axis=1) / np.sqrt((xc ** 2).sum(axis=1) * (yc ** 2).sum(axis=1))
+    dof = x.shape[1] - 2
+    with np.errstate(divide='ignore'):
+        t = r * np.sqrt(dof / (1 - r ** 2))
+    return r, 2 * stats.t.sf(np.abs(t), dof)
+
+
+def theil_sen(x, y):
+    """Row-wise Theil-Sen slope and intercept for (m, n) arrays."""
+    i, j = np.triu_indices(x.shape[1], k=1)
+    dx, dy = x[:, j] - x[:, i], y[:, j] - y[:, i]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = np.where(dx != 0, dy / dx, np.nan)
+    slope = np.nanmedian(slopes, axis=1)
+    return slope, np.median(y - slope[:, None] * x, axis=1)
+
+
+def _local_linear(x, y, points, robustness, k):
+    """Tricube-weighted local linear fit of each row of y on x, evaluated at `points` (m, t)."""
+    dist = np.abs(x[:, None, :] - points[:, :, None])  # (m, t, n)
+    h = np.partition(dist, k - 1, axis=2)[:, :, k - 1:k]
+    u = np.clip(dist / np.maximum(h, 1e-12), 0, 1)
+    w = (1 - u ** 3) ** 3 * robustness[:, None, :]
+    dx = x[:, None, :] - points[:, :, None]
+    s0, s1, s2 = w.sum(axis=2), (w * dx).sum(axis=2), (w * dx ** 2).sum(axis=2)
+    t0, t1 = (w * y[:, None, :]).sum(axis=2), (w * dx * y[:, None, :]).sum(axis=2)
+    denom = s0 * s2 - s1 ** 2
+    # a window with a single distinct x has no slope; fall back to its weighted mean
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denom > 1e-12 * s0 ** 2, (s2 * t0 - s1 * t1) / denom, t0 / s0)
+
+
+def lowess(x, y, grid, frac=LOWESS_FRAC, iterations=LOWESS_ITERATIONS):
+    """Row-wise LOWESS (Cleveland 1979) of y on x, evaluated at `grid` (m, t)."""
+    k = max(int(np.ceil(frac * x.shape[1])), 2)
+    robustness = np.ones_like(x)
+    for _ in range(iterations):
+        resid = y - _local_linear(x, y, x, robustness, k)
+        scale = 6 * np.median(np.abs(resid), axis=1, keepdims=True)
+        u = np.clip(resid / np.maximum(scale, 1e-12), -1, 1)
+        robustness = (1 - u ** 2) ** 2
+    return _local_linear(x, y, grid, robustness, k)
+
+
+def fit_trends(df, units):
+    """Trend fits of emergence on coverage for every unit code.
+
+    Returns (fits, curves): one row per unit with OLS, Theil-Sen, Pearson and
+    Spearman results, and the LOWESS curve as (unit, coverage, emergence) rows.
+    """
+    x = np.stack([df[MEASURES['coverage'].format(u)].to_numpy(dtype=float) for u in units])
+    y = np.stack([df[MEASURES['emergence'].format(u)].to_numpy(dtype=float) for u in units])
+    xc = x - x.mean(axis=1, keepdims=True)
+    ols_slope = (xc * y).sum(axis=1) / (xc ** 2).sum(axis=1)
+    ols_intercept = y.mean(axis=1) - ols_slope * x.mean(axis=1)
+    pearson_r, pearson_p = _correlation(x, y)
+    spearman_rho, spearman_p = _correlation(stats.rankdata(x, axis=1), stats.rankdata(y, axis=1))
+    ts_slope, ts_intercept = theil_sen(x, y)
+    fits = pd.DataFrame({
+        'unit': units, 'level': ['pillar' if u in PILLARS else 'category' for u in units],
+        'n': x.shape[1], 'x_min': x.min(axis=1), 'x_max': x.max(axis=1),
+        'ols_slope': ols_slope, 'ols_intercept': ols_intercept,
+        'theil_sen_slope': ts_slope, 'theil_sen_intercept': ts_intercept,
+        'pearson_r': pearson_r, 'pearson_p': pearson_p,
+        'spearman_rho': spearman_rho, 'spearman_p': spearman_p,
+    })
+    grid = np.linspace(x.min(axis=1), x.max(axis=1), LOWESS_POINTS, axis=1)
+    curves = pd.DataFrame({
+        'unit': np.repeat(units, LOWESS_POINTS),
+        'coverage': grid.ravel(),
+        'emergence': lowess(x, y, grid).ravel(),
+    })
+    return fits, curves
+
+
+@st.cache_data(show_spinner=False)
+def _trend_fits(data_hash):
+    return fit_trends(load_df_app(), trend_units())
+
+
+def trend_fits():
+    """(fits, curves) for all pillars and categories, recomputed whenever df_app changes."""
+    return _trend_fits(dataset_hash("df_app_streamlit.csv"))
+
+
+if __name__ == "__main__":
+    fits, _ = fit_trends(load_df_app(), trend_units())
+    print(fits.drop(columns=['n', 'x_min', 'x_max']).to_string(index=False, float_format='{:.4f}'.format))
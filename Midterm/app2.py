@@ -1,3 +1,6 @@
+import sys
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
@@ -6,6 +9,10 @@ from scipy import stats
 import numpy as np
 import plotly.express as px
 
+# the country aggregation is shared with the final app (Final/aggregation.py)
+sys.path.append(str(Path(__file__).resolve().parents[1] / "Final"))
+from aggregation import summarize_by_country  # noqa: E402
+
 # Page configuration
 st.set_page_config(
     page_title="Infrastructure Project Risk Analysis",
@@ -110,15 +117,25 @@ selected_size = st.sidebar.selectbox(
 )
 
 # Apply filters to create filtered dataframe
-df_filtered = df.copy()
+def filter_projects(df, selected_sector, selected_size):
+    df_filtered = df
+    if selected_sector != 'All Sectors':
+        df_filtered = df_filtered[df_filtered['sector1'] == selected_sector]
+    if selected_size == 'Large ($500M-$1B)':
+        df_filtered = df_filtered[df_filtered['project_size'] == 'large']
+    elif selected_size == 'Mega (≥$1B)':
+        df_filtered = df_filtered[df_filtered['project_size'] == 'mega']
+    return df_filtered.copy()
+
+
+@st.cache_data
+def country_summary(selected_sector, selected_size):
+    """Per-country project count, cost and top-3 sectors for the current filters."""
+    return summarize_by_country(filter_projects(load_data(), selected_sector, selected_size),
+                                'totalcost_initial_adj')
 
-if selected_sector != 'All Sectors':
-    df_filtered = df_filtered[df_filtered['sector1'] == selected_sector]
 
-if selected_size == 'Large ($500M-$1B)':
-    df_filtered = df_filtered[df_filtered['project_size'] == 'large']
-elif selected_size == 'Mega (≥$1B)':
-    df_filtered = df_filtered[df_filtered['project_size'] == 'mega']
+df_filtered = filter_projects(df, selected_sector, selected_size)
 
 # Display filter summary in sidebar
 st.sidebar.markdown("---")
@@ -131,19 +148,12 @@ sector_colors = {'Energy': '#d95f02', 'Transportation': '#57c4ad', 'Water': '#05
 risk_level_colors = {0: '#fcc5c0', 1: '#fa9fb5', 2: '#c51b8a'}
 size_colors = {'medium': '#dfe318', 'large': '#8bd646', 'mega': '#2fb47c'}
 
-# Create tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🔍 Project Overview",
-    "📌 Key Findings Summary",
-    "⚠️ Risk Analysis",
-    "👀 Additional Analysis",
-    "📊 Data & Processing"
-])
+# Each section is a page function; st.navigation (bottom of file) runs only the selected one
 
 # ============================================================================
 # TAB 1: OVERVIEW
 # ============================================================================
-with tab1:
+def page_overview():
     st.title("🔍 Project Overview")
     
     # Key metrics at the top
@@ -165,18 +175,7 @@ with tab1:
     st.subheader("Geographic Distribution")
     
     # Prepare data for choropleth maps
-    country_total = df_filtered.groupby('countryname').agg({
-        'projectid': 'count',
-        'sector1': lambda x: ', '.join(x.value_counts().index[:3])
-    }).reset_index()
-    country_total.columns = ['countryname', 'total_projects', 'main_sectors']
-    
-    country_avg_cost = df_filtered.groupby('countryname').agg({
-        'projectid': 'count',
-        'totalcost_initial_adj': 'mean',
-        'sector1': lambda x: ', '.join(x.value_counts().index[:3])
-    }).reset_index()
-    country_avg_cost.columns = ['countryname', 'total_projects', 'avg_cost', 'main_sectors']
+    country_stats = country_summary(selected_sector, selected_size)
     
     # Create side-by-side choropleth maps
     fig_maps = make_subplots(
@@ -188,10 +187,10 @@ with tab1:
     
     fig_maps.add_trace(
         go.Choropleth(
-            locations=country_total['countryname'],
+            locations=country_stats['countryname'],
             locationmode='country names',
-            z=country_total['total_projects'],
-            customdata=country_total[['total_projects', 'main_sectors']],
+            z=country_stats['total_projects'],
+            customdata=country_stats[['total_projects', 'main_sectors']],
             hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Main Sectors: %{customdata[1]}<extra></extra>',
             colorscale='Pinkyl',
             colorbar=dict(x=0.4, y=0.8, len=0.5, title='Projects'),
@@ -202,10 +201,10 @@ with tab1:
     
     fig_maps.add_trace(
         go.Choropleth(
-            locations=country_avg_cost['countryname'],
+            locations=country_stats['countryname'],
             locationmode='country names',
-            z=country_avg_cost['avg_cost'],
-            customdata=country_avg_cost[['total_projects', 'avg_cost', 'main_sectors']],
+            z=country_stats['avg_cost'],
+            customdata=country_stats[['total_projects', 'avg_cost', 'main_sectors']],
             hovertemplate='<b>%{location}</b><br>Total Projects: %{customdata[0]}<br>Avg Cost: $%{customdata[1]:.2f}M<br>Main Sectors: %{customdata[2]}<extra></extra>',
             colorscale='Pinkyl',
             colorbar=dict(x=0.95, y=0.8, len=0.5, title='Avg Cost (M USD)'),
@@ -605,7 +604,7 @@ with tab1:
 # ============================================================================
 # TAB 2: KEY FINDINGS
 # ============================================================================
-with tab2:
+def page_key_findings():
     st.title("📌 Key Findings")
     
     # st.markdown("""
@@ -650,7 +649,7 @@ with tab2:
 # ============================================================================
 # TAB 3: RISK ANALYSIS
 # ============================================================================
-with tab3:
+def page_risk_analysis():
     st.title("⚠️ Risk Analysis")
     
     st.markdown("""
@@ -1610,7 +1609,7 @@ with tab3:
 # ============================================================================
 # TAB 4: ADDITIONAL ANALYSIS 
 # ============================================================================
-with tab4:
+def page_additional_analysis():
     st.title("👀 Additional Analysis")
     
     # ========================================================================
@@ -1899,13 +1898,13 @@ with tab4:
 # ============================================================================
 # TAB 5: DATA & PROCESSING
 # ============================================================================
-with tab5:
+def page_data_processing():
     st.title("📊 Data & Processing")
     
-    # Create sub-tabs for better organization
-    subtab1, subtab2 = st.tabs(["Raw Data", "Preprocessing Steps"])
+    # Sub-views for better organization
+    view = st.radio("View", ["Raw Data", "Preprocessing Steps"], horizontal=True, label_visibility="collapsed", key="data_view")
     
-    with subtab1:
+    if view == "Raw Data":
         st.header("Raw Data Preview")
         st.dataframe(df.head(100), use_container_width=True)
         
@@ -1918,7 +1917,7 @@ with tab5:
             mime='text/csv',
         )
     
-    with subtab2:
+    if view == "Preprocessing Steps":
         st.header("Data Merging and Preprocessing")
         
         st.markdown("""
@@ -2127,6 +2126,15 @@ beforecovid
             })
             st.dataframe(schema_data, use_container_width=True, hide_index=True)
 
+pages = st.navigation([
+    st.Page(page_overview, title="Project Overview", icon="🔍", url_path="overview", default=True),
+    st.Page(page_key_findings, title="Key Findings Summary", icon="📌", url_path="key-findings"),
+    st.Page(page_risk_analysis, title="Risk Analysis", icon="⚠️", url_path="risk-analysis"),
+    st.Page(page_additional_analysis, title="Additional Analysis", icon="👀", url_path="additional-analysis"),
+    st.Page(page_data_processing, title="Data & Processing", icon="📊", url_path="data-processing"),
+], position="top")
+pages.run()
+
 # Footer
 st.markdown("---")
 st.caption("Infrastructure Project Risk Analysis | Data: Asian Development Bank")
@@ -0,0 +1,209 @@
+"""Headless performance benchmark for Final/app.py and Midterm/app2.py.
+
+Each scenario runs in a fresh process through Streamlit's AppTest harness, so
+the first run is a true cold start. For every scenario we record
+
+- wall_s: wall time of the slowest measured run (cold start, or a widget rerun)
+- peak_rss_mb: peak resident set size of the scenario process
+- figure_bytes: largest Plotly payload (sum of chart specs) sent by a measured run
+
+Every scenario is repeated REPEATS times, each in its own process; wall_s is the
+median of the repeats, peak RSS and figure bytes their maximum. All three are
+compared against benchmark_budgets.json; any exceeded budget, or an exception
+raised by the app, makes the script exit with status 1. A sub-second rerun can
+double on a busy machine, so wall budgets get WALL_HEADROOM plus WALL_SLACK_S.
+
+Usage:
+    python benchmark.py                    # run everything, check budgets
+    python benchmark.py final/sector_radio # run selected scenarios
+    python benchmark.py --repeats 5        # more repeats for a steadier median
+    python benchmark.py --update-budgets   # rewrite budgets from this run plus headroom
+"""
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import statistics
+import sys
+import time
+from itertools import groupby
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+BUDGETS_PATH = ROOT / "benchmark_budgets.json"
+FINAL_APP = ROOT / "Final" / "app.py"
+MIDTERM_APP = ROOT / "Midterm" / "app2.py"
+# a PAD-sized document to score: the ESF/IGAF source text (~37k words)
+SCREENING_TEXT = "\n".join(doc['text'] for doc in json.loads((ROOT / "Final" / "seed_streamlit.json").read_text()))
+HEADROOM = 1.5
+WALL_HEADROOM = 3.0
+WALL_SLACK_S = 1.0
+REPEATS = 3
+METRICS = ['wall_s', 'peak_rss_mb', 'figure_bytes']
+
+# scenario -> (app script, page file relative to it, session state preset, measured steps)
+# a step is (widget type, key, value); the preset run that opens the page is
+# only measured for cold-start scenarios (no steps)
+SCENARIOS = {
+    'final/cold_start': (FINAL_APP, None, {}, []),
+    'final/sector_radio': (FINAL_APP, 'app_pages/projects.py', {}, [
+        ('radio', 'sector_radio', 'Transport'),
+        ('radio', 'sector_radio', 'Water'),
+        ('radio', 'sector_radio', 'Energy'),
+    ]),
+    'final/seed_terms': (FINAL_APP, 'app_pages/seed_terms.py', {'seed_view': 'Result'}, [
+        ('selectbox', 'seed_pillar', 'S'),
+        ('selectbox', 'seed_category', 'S3: Land Acquisition and Involuntary Resettlement'),
+        ('selectbox', 'seed_pillar', 'G'),
+        ('selectbox', 'seed_category', 'G2: Financial and Economic'),
+    ]),
+    'final/viz_pillar': (FINAL_APP, 'app_pages/text_data.py', {'text_view': 'Result'}, [
+        ('radio', 'viz_pillar', 'S'),
+        ('radio', 'viz_pillar', 'G'),
+        ('radio', 'viz_pillar', 'E'),
+    ]),
+    'final/heatmap_group': (FINAL_APP, 'app_pages/analysis.py', {'analysis_view': 'Explolatory Data Analysis'}, [
+        ('radio', 'heatmap_group', 'regionname'),
+        ('radio', 'heatmap_group', 'env_cat'),
+        ('radio', 'heatmap_group', 'era'),
+        ('radio', 'heatmap_group', 'sector_group'),
+    ]),
+    'final/cov_emerg_pillar': (FINAL_APP, 'app_pages/analysis.py', {'analysis_view': 'Regression Analysis'}, [
+        ('radio', 'cov_emerg_pillar', 'S'),
+        ('radio', 'cov_emerg_pillar', 'G'),
+        ('radio', 'cov_emerg_pillar', 'E'),
+    ]),
+    'final/cov_emerg_category': (FINAL_APP, 'app_pages/analysis.py', {'analysis_view': 'Regression Analysis'}, [
+        ('selectbox', 'cov_emerg_category', 'E3: Biodiversity'),
+        ('selectbox', 'cov_emerg_category', 'E1: Pollution'),
+        ('radio', 'cov_emerg_pillar', 'S'),
+        ('selectbox', 'cov_emerg_category', 'S3: Land & Resettlement'),
+        ('selectbox', 'cov_emerg_category', 'S: All Social'),
+    ]),
+    'final/coef_measure': (FINAL_APP, 'app_pages/analysis.py', {'analysis_view': 'Regression Analysis'}, [
+        ('radio', 'coef_measure', 'emergence'),
+        ('radio', 'coef_measure', 'coverage'),
+    ]),
+    'final/screening': (FINAL_APP, 'app_pages/screening.py', {}, [
+        ('text_area', 'screen_text', SCREENING_TEXT),
+        ('selectbox', 'screen_sector', 'Energy'),
+        ('number_input', 'screen_year', 1998),
+    ]),
+    'midterm/cold_start': (MIDTERM_APP, None, {}, []),
+    'midterm/global_filters': (MIDTERM_APP, None, {}, [
+        ('selectbox', 'global_sector_filter', 'Energy'),
+        ('selectbox', 'global_size_filter', 'Mega (≥$1B)'),
+        ('selectbox', 'global_sector_filter', 'Water'),
+        ('selectbox', 'global_size_filter', 'All Sizes'),
+        ('selectbox', 'global_sector_filter', 'All Sectors'),
+    ]),
+}
+
+
+def _figure_bytes(at):
+    return sum(len(chart.proto.spec) for chart in at.get('plotly_chart'))
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed, _figure_bytes(at)
+
+
+def run_scenario(name):
+    """Run one scenario in the current process and return its measurements."""
+    from streamlit.testing.v1 import AppTest
+
+    script, page, preset, steps = SCENARIOS[name]
+    at = AppTest.from_file(str(script), default_timeout=300)
+    for key, value in preset.items():
+        at.session_state[key] = value
+    wall, payload = _timed_run(at)
+    if page is not None:
+        at.switch_page(page)
+        wall, payload = _timed_run(at)
+    if steps:
+        wall, payload = 0.0, 0
+        for widget, key, value in steps:
+            getattr(at, widget)(key=key).set_value(value)
+            elapsed, size = _timed_run(at)
+            wall, payload = max(wall, elapsed), max(payload, size)
+    # ru_maxrss is reported in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / 1024 ** 2 if sys.platform == 'darwin' else rss / 1024
+    return {'wall_s': round(wall, 3), 'peak_rss_mb': round(rss_mb, 1), 'figure_bytes': payload}
+
+
+def _run_isolated(name):
+    try:
+        return name, run_scenario(name), None
+    except Exception as e:
+        return name, None, f"{type(e).__name__}: {e}"
+
+
+def _combine(runs):
+    """Median wall time and the largest RSS and payload of repeated runs of one scenario."""
+    return {'wall_s': round(statistics.median(r['wall_s'] for r in runs), 3),
+            'peak_rss_mb': max(r['peak_rss_mb'] for r in runs),
+            'figure_bytes': max(r['figure_bytes'] for r in runs)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help="scenario names (default: all)")
+    parser.add_argument('--update-budgets', action='store_true',
+                        help="write measured values plus headroom to benchmark_budgets.json")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="runs per scenario; wall time is their median")
+    args = parser.parse_args(argv)
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    budgets = json.loads(BUDGETS_PATH.read_text()) if BUDGETS_PATH.exists() else {}
+    # one fresh process per scenario keeps cold starts cold and RSS peaks separate
+    ctx = mp.get_context('spawn')
+    failed = False
+    results = {}
+    jobs = [name for name in names for _ in range(args.repeats)]
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        # the repeats of a scenario come back consecutively
+        for name, outcomes in groupby(pool.imap(_run_isolated, jobs), key=lambda outcome: outcome[0]):
+            outcomes = list(outcomes)
+            errors = [error for _, _, error in outcomes if error]
+            if errors:
+                print(f"{name:28s} ERROR {errors[0]}")
+                failed = True
+                continue
+            measured = results[name] = _combine([m for _, m, _ in outcomes])
+            budget = budgets.get(name, {})
+            # a metric without a budget fails too, so a check cannot silently drop out
+            missing = [m for m in METRICS if m not in budget]
+            over = [m for m in METRICS if m in budget and measured[m] > budget[m]]
+            failed = failed or bool(over) or (bool(missing) and not args.update_budgets)
+            status = []
+            if over:
+                status.append("OVER " + ", ".join(over))
+            if missing:
+                status.append("NO BUDGET " + ", ".join(missing))
+            print(f"{name:28s} {measured['wall_s']:7.3f}s {measured['peak_rss_mb']:8.1f}MB "
+                  f"{measured['figure_bytes']:>10,d}B  {'; '.join(status) or 'ok'}")
+
+    if args.update_budgets:
+        for name, measured in results.items():
+            budgets[name] = {
+                'wall_s': round(measured['wall_s'] * WALL_HEADROOM + WALL_SLACK_S, 1),
+                'peak_rss_mb': round(measured['peak_rss_mb'] * HEADROOM),
+                'figure_bytes': int(measured['figure_bytes'] * HEADROOM),
+            }
+        BUDGETS_PATH.write_text(json.dumps(budgets, indent=2) + "\n")
+        print(f"updated {BUDGETS_PATH.name}")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())